@@ -1,6 +1,13 @@
 from autogen import ConversableAgent
-from src.tools.jira_create_tool import create_jira_story
+from src.tools.jira_create_tool import BULK_BATCH_SIZE, IN_FLIGHT, create_jira_stories
 from src.config.settings import LLM_CONFIG
+from src.workflow import emit_signal, JIRA_CREATED, CODE_GENERATED
+from src.pipeline import create_jira_issue, run_story_pipeline
+from src.stories import iter_stories
+from src.dedupe_index import dedupe_index, DEDUPE_MODE
+from src.jira_ledger import jira_ledger, story_hash
+from src.tracing import span, traced
+from src.logs import Sampler
 import json
 import os
 from pathlib import Path
@@ -8,6 +15,145 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Generate code for each story as soon as its issue exists instead of after all issues
+STORY_PIPELINE = os.getenv("SDLC_STORY_PIPELINE", "0") == "1"
+# Create issues through Jira's bulk endpoint instead of one request per story
+BULK_CREATE = os.getenv("SDLC_JIRA_BULK", "1") == "1"
+
+def _create_checked_issue(story: dict, duplicates: list = None) -> str:
+    if dedupe_index is None:
+        return create_jira_issue(story)
+    issue_key, duplicate = dedupe_index.check_and_add(story, create_jira_issue, merge=DEDUPE_MODE == "merge")
+    if duplicate is not None:
+        logger.warning("Story '%s' is a near-duplicate (%.2f) of '%s' (%s)", story["summary"],
+                       duplicate.similarity, duplicate.summary, duplicate.issue_key or "no issue")
+        if duplicates is not None:
+            duplicates.append({"summary": story["summary"], "issue_key": issue_key,
+                               "duplicate_of": duplicate.summary, "duplicate_issue_key": duplicate.issue_key,
+                               "similarity": duplicate.similarity})
+    return issue_key
+
+
+def create_issue(story: dict, duplicates: list = None, source: str = "") -> str:
+    """Create the story's Jira issue.
+
+    A story the Jira ledger already has for this `source` (stories file)
+    reuses its issue; near-duplicates of earlier stories are appended to
+    `duplicates` and, in merge mode, reuse its issue.
+    """
+    if jira_ledger is None:
+        return _create_checked_issue(story, duplicates)
+    return jira_ledger.issue_for(story, lambda s: _create_checked_issue(s, duplicates), source)
+
+
+class _PendingIssue:
+    __slots__ = ("story", "issue_key", "error", "dedupe_id", "duplicate", "same_as", "ledger_hash", "in_ledger")
+
+    def __init__(self, story):
+        self.story = story
+        self.issue_key = self.error = self.dedupe_id = self.duplicate = self.same_as = self.ledger_hash = None
+        self.in_ledger = False
+
+
+def _check_existing(item: _PendingIssue, duplicates: list, batch_hashes: dict, source: str) -> None:
+    """Fill item.issue_key where create_issue would reuse an issue instead of creating one."""
+    story = item.story
+    if jira_ledger is not None:
+        item.ledger_hash = story_hash(story, source)
+        item.issue_key = jira_ledger.issue_key(item.ledger_hash)
+        if item.issue_key:
+            item.in_ledger = True
+            return
+        if item.ledger_hash in batch_hashes:
+            item.same_as = batch_hashes[item.ledger_hash]
+            return
+        batch_hashes[item.ledger_hash] = item
+    if dedupe_index is None:
+        return
+    duplicate, item.dedupe_id = dedupe_index.reserve(story)
+    if duplicate is None:
+        return
+    logger.warning("Story '%s' is a near-duplicate (%.2f) of '%s' (%s)", story["summary"],
+                   duplicate.similarity, duplicate.summary, duplicate.issue_key or "no issue")
+    item.duplicate = {"summary": story["summary"], "issue_key": None,
+                      "duplicate_of": duplicate.summary, "duplicate_issue_key": duplicate.issue_key,
+                      "similarity": duplicate.similarity}
+    duplicates.append(item.duplicate)
+    if DEDUPE_MODE == "merge" and duplicate.issue_key:
+        item.issue_key = duplicate.issue_key
+
+
+def _record_in_ledger(created) -> None:
+    """Write (item, issue_key) pairs not yet in the ledger to it."""
+    entries = [(item.ledger_hash, issue_key, item.story["summary"])
+               for item, issue_key in created if item.ledger_hash and not item.in_ledger]
+    if entries:
+        jira_ledger.record(entries)
+    for item, _ in created:
+        item.in_ledger = True
+
+
+def _flush_batch(batch: list, batch_size: int, in_flight: int) -> None:
+    to_create = [item for item in batch if item.issue_key is None and item.same_as is None]
+    failure = None
+    if to_create:
+        def record_created(results):
+            # Runs as each request returns, so its issues are on disk even if a later request fails
+            for result in results:
+                item = to_create[result.index]
+                item.issue_key, item.error = result.issue_key, result.error
+            _record_in_ledger([(to_create[r.index], r.issue_key) for r in results if r.issue_key])
+
+        try:
+            with span("jira.create", size=len(to_create)):
+                create_jira_stories([item.story for item in to_create], batch_size, in_flight, on_batch=record_created)
+        except Exception as e:
+            # Still record the requests that succeeded and drop the reservations of the rest
+            failure = e
+    for item in batch:
+        if item.same_as is not None:
+            item.issue_key, item.error = item.same_as.issue_key, item.same_as.error
+        if item.issue_key is None:
+            # Near-duplicate checks of later runs must not match a story Jira never created
+            if item.dedupe_id is not None:
+                dedupe_index.release(item.dedupe_id)
+            continue
+        if item.dedupe_id is not None:
+            dedupe_index.set_issue_key(item.dedupe_id, item.issue_key)
+        if item.duplicate is not None:
+            item.duplicate["issue_key"] = item.issue_key
+    _record_in_ledger([(item, item.issue_key) for item in batch if item.issue_key])
+    if failure is not None:
+        raise failure
+
+
+def create_issues(stories, duplicates: list = None, batch_size: int = BULK_BATCH_SIZE, in_flight: int = IN_FLIGHT,
+                  source: str = ""):
+    """Bulk counterpart of create_issue: yields (story, issue_key, error) in input order.
+
+    Stories are sent to Jira `batch_size` per request, `in_flight` requests at
+    a time; a story Jira rejects has issue_key None and the error message.
+    """
+    duplicates = [] if duplicates is None else duplicates
+    batch, batch_hashes, to_create, resumed = [], {}, 0, 0
+    for story in stories:
+        item = _PendingIssue(story)
+        _check_existing(item, duplicates, batch_hashes, source)
+        resumed += item.in_ledger
+        batch.append(item)
+        if item.issue_key is None and item.same_as is None:
+            to_create += 1
+        if to_create >= batch_size * in_flight:
+            _flush_batch(batch, batch_size, in_flight)
+            yield from ((i.story, i.issue_key, i.error) for i in batch)
+            batch, batch_hashes, to_create = [], {}, 0
+    _flush_batch(batch, batch_size, in_flight)
+    yield from ((i.story, i.issue_key, i.error) for i in batch)
+    if resumed:
+        logger.info("Skipped %d stories already created in Jira", resumed)
+
+
+@traced("tool.process_stories")
 def process_stories(state: dict) -> str:
     """Create Jira stories from the stories folder using state."""
     try:
@@ -25,60 +171,129 @@ def process_stories(state: dict) -> str:
         stories_path = os.path.join(stories_dir, stories_file)
 
         if not os.path.exists(stories_path):
-            logger.warning(f"Stories file not found: {stories_path}")
+            logger.warning("Stories file not found: %s", stories_path)
             return "Stories file not found"
 
-        # Load stories
-        with open(stories_path, 'r') as f:
-            stories = json.load(f)
+        # Stories are read lazily, so creation starts before the file is fully parsed
+        stories = iter_stories(stories_path)
+        if STORY_PIPELINE:
+            return _process_stories_pipelined(stories, state)
 
-        if not stories:
-            logger.warning("No stories found in file.")
-            return "No stories to create"
-
-        logger.info(f"Creating {len(stories)} Jira stories...")
-        issue_keys = []
-        for story in stories:
-            if "summary" not in story or "description" not in story:
-                logger.warning(f"Invalid story format: {story}")
+        issue_keys, duplicates, failures = [], [], []
+        sample = Sampler(logger)
+        if BULK_CREATE:
+            created = create_issues(_valid_stories(stories), duplicates, source=stories_file)
+        else:
+            created = ((story, create_issue(story, duplicates, stories_file), None)
+                       for story in _valid_stories(stories))
+        for story, issue_key, error in created:
+            if error is not None:
+                logger.warning("Jira rejected story '%s': %s", story["summary"], error)
+                failures.append({"summary": story["summary"], "error": error})
                 continue
-
-            issue_key = create_jira_story({
-                "summary": story["summary"],
-                "description": story["description"]
-            })
             issue_keys.append(issue_key)
-            logger.info(f"Created Jira issue: {issue_key}")
+            if sample():
+                logger.info("Created Jira issue %d: %s", sample.seen, issue_key)
+
+        state["jira_failures"] = failures
+        if not issue_keys:
+            if failures:
+                return f"Error in Jira_Agent: Jira rejected all {len(failures)} stories ({failures[0]['error']})"
+            logger.warning("No stories found in file.")
+            return "No stories to create"
 
-        logger.info("✅ Jira story creation complete.")
+        logger.info("✅ Jira story creation complete: %d issues.", len(issue_keys), extra={"count": len(issue_keys)})
         state["workflow_status"] = "jira_created"
         state["jira_issues"] = issue_keys
+        state["duplicate_stories"] = duplicates
+        emit_signal(JIRA_CREATED, jira_issues=issue_keys)
 
-        return "Stories created in Jira"
+        return _created_message(duplicates, failures)
 
     except json.JSONDecodeError:
         logger.error("Invalid JSON format in stories file.")
         return "Invalid JSON format"
     except Exception as e:
-        logger.error(f"Error in Jira_Agent: {str(e)}")
+        logger.error("Error in Jira_Agent: %s", e)
         return f"Error in Jira_Agent: {str(e)}"
 
+def _valid_stories(stories):
+    for story in stories:
+        if "summary" in story and "description" in story:
+            yield story
+        else:
+            logger.warning("Invalid story format: %s", story)
+
+
+def _process_stories_pipelined(stories, state: dict) -> str:
+    duplicates = []
+    source = state["stories_file"]
+    results = run_story_pipeline(_valid_stories(stories),
+                                 create_issue=lambda story: create_issue(story, duplicates, source))
+    if not results:
+        logger.warning("No stories found in file.")
+        return "No stories to create"
+
+    issue_keys, code_files, failures = [], [], []
+    for result in results:
+        if result.error is not None:
+            failures.append({"stage": result.failed_stage, "error": str(result.error)})
+            continue
+        issue_keys.append(result.value["issue_key"])
+        code_files.append(result.value["code_file"])
+
+    state["jira_failures"] = [failure for failure in failures if failure["stage"] == "jira"]
+    if not issue_keys:
+        return f"Error in Jira_Agent: all {len(failures)} stories failed ({failures[0]['error']})"
+
+    logger.info("✅ Pipelined %d stories through Jira and code generation (%d failed).",
+                len(issue_keys), len(failures))
+    state["workflow_status"] = "jira_created"
+    state["jira_issues"] = issue_keys
+    state["duplicate_stories"] = duplicates
+    emit_signal(JIRA_CREATED, jira_issues=issue_keys)
+    if code_files:
+        state["code_file"] = code_files[0]
+        state["code_files"] = code_files
+        state["workflow_status"] = "code_generated"
+        emit_signal(CODE_GENERATED, code_file=code_files[0], code_files=code_files)
+
+    return _created_message(duplicates, state["jira_failures"])
+
+
+def _created_message(duplicates: list, failures: list = None) -> str:
+    notes = []
+    if duplicates:
+        notes.append(f"{len(duplicates)} near-duplicates flagged")
+    if failures:
+        notes.append(f"{len(failures)} rejected by Jira")
+    if notes:
+        return f"Stories created in Jira ({', '.join(notes)})"
+    return "Stories created in Jira"
+
 # Define the Jira Agent
-jira_agent = ConversableAgent(
-    name="Jira_Agent",
-    system_message="""You are a Jira Agent.
+JIRA_SYSTEM_MESSAGE = """You are a Jira Agent.
 Tasks:
 1. Read stories from the /stories folder
 2. Create Jira stories with issue type 'Story' and project 'SDLC'
-3. Return 'Stories created in Jira' on success.""",
-    llm_config=LLM_CONFIG,
-    human_input_mode="NEVER",
-    max_consecutive_auto_reply=3,
-    code_execution_config=False
-)
-
-# Register the story processing function
-@jira_agent.register_for_execution()
-@jira_agent.register_for_llm(description="Create Jira stories from the stories folder.")
-def process_stories_wrapper(state: dict) -> str:
-    return process_stories(state)
+3. Return 'Stories created in Jira' on success."""
+
+
+def build_jira_agent() -> ConversableAgent:
+    """Create a Jira_Agent with its tools registered."""
+    agent = ConversableAgent(
+        name="Jira_Agent",
+        system_message=JIRA_SYSTEM_MESSAGE,
+        llm_config=LLM_CONFIG,
+        human_input_mode="NEVER",
+        max_consecutive_auto_reply=3,
+        code_execution_config=False
+    )
+
+    # Register the story processing function
+    @agent.register_for_execution()
+    @agent.register_for_llm(description="Create Jira stories from the stories folder.")
+    def process_stories_wrapper(state: dict) -> str:
+        return process_stories(state)
+
+    return agent
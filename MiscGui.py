@@ -8,12 +8,13 @@ import docx, PyPDF2
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
-from src.orchestrator import start_agent_workflow
-from src.agents.user_agent import user_agent
+from src.stories import DISPLAY_LIMIT, load_stories
+from src.orchestrator import start_agent_workflow, continue_workflow
+from src.logs import configure_logging
 
 state = {
     "workflow_status": "initial",
-    "chat_manager": None,
+    "run_id": None,
     "uploaded_file_path": None,
     "stories_approved": False,
     "stories_file": None,
@@ -22,6 +23,7 @@ state = {
 }
 
 logger = logging.getLogger(__name__)
+configure_logging()
 
 def extract_text_from_file(file_content: bytes, filename: str) -> str:
     ext = filename.split('.')[-1].lower()
@@ -90,8 +92,7 @@ with ui.row().classes("w-full"):
         if state["workflow_status"] == "stories_generated" and state["stories_file"]:
             stories_path = os.path.join(project_root, "stories", state["stories_file"])
             if os.path.exists(stories_path):
-                with open(stories_path, 'r') as f:
-                    stories = json.load(f)
+                stories = load_stories(stories_path, limit=DISPLAY_LIMIT)
                 ui.label("Generated Stories").classes("text-xl font-semibold mt-4")
                 ui.json(stories)
 
@@ -100,10 +101,11 @@ with ui.row().classes("w-full"):
                         state["stories_approved"] = True
                         state["workflow_status"] = "stories_approved"
                         ui.notify("✅ Stories approved. Proceeding to JIRA creation...")
-                        if state["chat_manager"]:
+                        if state["run_id"]:
                             try:
-                                user_agent.initiate_chat(
-                                    state["chat_manager"],
+                                continue_workflow(
+                                    state["run_id"],
+                                    state=state,
                                     message="Stories approved. Please proceed with creating Jira tickets."
                                 )
                                 app.reload()
@@ -123,10 +125,11 @@ with ui.row().classes("w-full"):
                         state["code_approved"] = True
                         state["workflow_status"] = "code_approved"
                         ui.notify("✅ Code approved. Workflow complete!")
-                        if state["chat_manager"]:
+                        if state["run_id"]:
                             try:
-                                user_agent.initiate_chat(
-                                    state["chat_manager"],
+                                continue_workflow(
+                                    state["run_id"],
+                                    state=state,
                                     message="Code approved. Workflow completed."
                                 )
                                 app.reload()
@@ -142,7 +145,7 @@ with ui.row().classes("w-full"):
             ui.label().bind_text_from(state, 'stories_approved', lambda v: f"Stories Approved: {v}")
             ui.label().bind_text_from(state, 'code_file', lambda v: f"Program File: {v or 'None'}")
             ui.label().bind_text_from(state, 'code_approved', lambda v: f"Code Approved: {v}")
-            ui.label(f"Chat Manager: {'Active' if state['chat_manager'] else 'None'}")
+            ui.label().bind_text_from(state, 'run_id', lambda v: f"Workflow Run: {v or 'None'}")
 
 def process_requirements():
     if state["workflow_status"] == "uploaded" and state["uploaded_file_path"]:
@@ -3,49 +3,33 @@ import os
 import sys
 import json
 import logging
-import io
 from pathlib import Path
 from datetime import datetime
-import docx
-import PyPDF2
 
 # Add project root to Python path
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
 from autogen import GroupChat
+from src.document_processor import save_extracted_text
 from src.orchestrator import start_agent_workflow, custom_speaker_selection
-from src.agents.user_agent import user_agent
+from src.logs import configure_logging
+from src.jobs import job_runner, SUCCEEDED, CANCELLED
 
 # Global state (simulate session state)
 state = {
     "workflow_status": "initial",
-    "chat_manager": None,
+    "run_id": None,
     "uploaded_file_path": None,
     "stories_approved": False,
     "stories_file": None,
     "code_approved": False,
-    "code_file": None
+    "code_file": None,
+    "job_id": None
 }
 
 logger = logging.getLogger(__name__)
-
-def extract_text_from_file(file_content: bytes, filename: str) -> str:
-    ext = filename.split('.')[-1].lower()
-
-    if ext == "txt":
-        return file_content.decode('utf-8', errors='ignore')
-
-    elif ext == "pdf":
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        return "\n".join([p.extract_text() for p in pdf_reader.pages if p.extract_text()])
-
-    elif ext == "docx":
-        doc = docx.Document(io.BytesIO(file_content))
-        return "\n".join([para.text for para in doc.paragraphs])
-
-    else:
-        raise ValueError(f"Unsupported file type: {ext}")
+configure_logging()
 
 steps = [
     "1. Upload Requirement",
@@ -73,6 +57,7 @@ with ui.row().classes("w-full"):
             ui.label("Upload Requirements File").classes("text-lg text-blue-600 mb-2")
             upload = ui.upload(on_upload=lambda e: handle_upload(e), auto_upload=True).props('accept=".pdf,.txt,.docx"')
             ui.button("PROCESS REQUIREMENTS", on_click=lambda: process_requirements()).props('color="primary"').classes("mt-4")
+            ui.button("CANCEL", on_click=lambda: cancel_requirements()).props('color="negative" flat').classes("mt-2")
 
         with ui.card().classes("bg-white shadow-md p-6"):
             ui.label("Agent Execution Log").classes("text-lg text-blue-600 mb-2")
@@ -81,7 +66,7 @@ with ui.row().classes("w-full"):
             ui.label().bind_text_from(state, 'stories_approved', lambda v: f"Stories Approved: {v}")
             ui.label().bind_text_from(state, 'code_file', lambda v: f"Program File: {v or 'None'}")
             ui.label().bind_text_from(state, 'code_approved', lambda v: f"Code Approved: {v}")
-            ui.label(f"Chat Manager: {'Active' if state['chat_manager'] else 'None'}")
+            ui.label().bind_text_from(state, 'run_id', lambda v: f"Workflow Run: {v or 'None'}")
 
 def handle_upload(e):
     file = e.name
@@ -94,9 +79,7 @@ def handle_upload(e):
     file_path = os.path.join(input_dir, new_filename)
 
     try:
-        extracted_text = extract_text_from_file(file_content, file)
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(extracted_text)
+        save_extracted_text(file_content, file, file_path)
 
         state["uploaded_file_path"] = file_path
         ui.notify(f"✅ File uploaded and saved as: {new_filename}")
@@ -104,14 +87,25 @@ def handle_upload(e):
     except Exception as ex:
         ui.notify(f"❌ Failed to parse file: {str(ex)}", color="negative")
 
-def process_requirements():
+async def process_requirements():
     if state["workflow_status"] == "initial" and state["uploaded_file_path"]:
         try:
             ui.notify("Processing requirements...")
             logger.info(f"Processing file: {state['uploaded_file_path']}")
-            start_agent_workflow(state["uploaded_file_path"])
-            app.reload()  # force refresh
+            job_id = job_runner.submit(start_agent_workflow, state["uploaded_file_path"], state=state)
+            state["job_id"] = job_id
+            job = await job_runner.wait(job_id)
+            if job.status == SUCCEEDED:
+                app.reload()  # force refresh
+            elif job.status == CANCELLED:
+                ui.notify("Processing cancelled", type="warning")
+            else:
+                ui.notify(f"Error: {job.error}", type="negative")
         except Exception as e:
             ui.notify(f"Error: {str(e)}", type="negative")
 
+def cancel_requirements():
+    if state["job_id"] and job_runner.cancel(state["job_id"]):
+        ui.notify("Cancelling processing...")
+
 ui.run(title="SDLC Automation Dashboard", reload=True)
@@ -0,0 +1,87 @@
+"""Pool of pre-built agent teams so each workflow run gets its own agents."""
+from collections import namedtuple
+from contextlib import contextmanager
+import logging
+import queue
+import threading
+
+from src.agents.ba_agent import build_ba_agent
+from src.agents.jira_agent import build_jira_agent
+from src.agents.user_agent import build_user_agent
+from src.agents.coder_agent import build_coder_agent
+from src.context_policy import apply_context_policy
+from src.llm_cache import llm_cache, attach_llm_cache
+from src.tracing import trace_agents
+
+logger = logging.getLogger(__name__)
+
+
+class AgentTeam(namedtuple("AgentTeam", ["ba", "user", "jira", "coder", "context"])):
+    """One isolated set of workflow agents and the context stats they report into."""
+
+    @property
+    def agents(self) -> list:
+        return [self.ba, self.user, self.jira, self.coder]
+
+    def reset(self) -> None:
+        for agent in self.agents:
+            agent.reset()
+        self.context.reset()
+
+
+def build_team() -> AgentTeam:
+    agents = [build_ba_agent(), build_user_agent(), build_jira_agent(), build_coder_agent()]
+    context = apply_context_policy(agents)
+    if llm_cache is not None:
+        attach_llm_cache(agents, llm_cache)
+    trace_agents(agents)
+    return AgentTeam(*agents, context=context)
+
+
+class AgentPool:
+    """Keeps up to `size` idle teams ready; builds extra teams on demand when empty."""
+
+    def __init__(self, size: int = 2, factory=build_team):
+        self.size = size
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.built = 0
+
+    def _build(self) -> AgentTeam:
+        team = self._factory()
+        with self._lock:
+            self.built += 1
+        return team
+
+    def warm(self, count: int = None) -> None:
+        """Build teams until `count` (default: pool size) are idle."""
+        target = self.size if count is None else count
+        while self._idle.qsize() < target:
+            self._idle.put(self._build())
+        logger.info("Agent pool warmed with %d teams", self._idle.qsize())
+
+    def acquire(self) -> AgentTeam:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            logger.info("Agent pool empty, building a new team")
+            return self._build()
+
+    def release(self, team: AgentTeam) -> None:
+        """Clear the team's chat history and return it to the pool."""
+        try:
+            team.reset()
+        except Exception as e:
+            logger.error("Discarding agent team that failed to reset: %s", e)
+            return
+        if self._idle.qsize() < self.size:
+            self._idle.put(team)
+
+    @contextmanager
+    def lease(self):
+        team = self.acquire()
+        try:
+            yield team
+        finally:
+            self.release(team)
@@ -1,51 +1,53 @@
 from nicegui import ui, app
-import os, sys, json, logging, io
+import os, sys, json, logging
 from pathlib import Path
 from datetime import datetime
-import docx, PyPDF2
 
 # Add backend project root to path
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
-from src.orchestrator import start_agent_workflow
-from src.agents.user_agent import user_agent
+from src.document_processor import save_extracted_text
+from src.stories import DISPLAY_LIMIT, load_stories
+from src.orchestrator import start_agent_workflow, continue_workflow
+from src.logs import configure_logging
+from src.jobs import job_runner, SUCCEEDED, FAILED, CANCELLED
 
 state = app.storage.user
 
 state.setdefault("workflow_status", "initial")
-state.setdefault("chat_manager", None)
+state.setdefault("run_id", None)
 state.setdefault("uploaded_file_path", None)
 state.setdefault("stories_approved", False)
 state.setdefault("stories_file", None)
 state.setdefault("code_approved", False)
 state.setdefault("code_file", None)
+state.setdefault("job_id", None)
 
 logger = logging.getLogger(__name__)
+configure_logging()
 
-def extract_text_from_file(file_content: bytes, filename: str) -> str:
-    ext = filename.split('.')[-1].lower()
-    if ext == "txt":
-        return file_content.decode('utf-8', errors='ignore')
-    elif ext == "pdf":
-        reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        return "\n".join([p.extract_text() for p in reader.pages if p.extract_text()])
-    elif ext == "docx":
-        doc = docx.Document(io.BytesIO(file_content))
-        return "\n".join([para.text for para in doc.paragraphs])
-    else:
-        raise ValueError(f"Unsupported file type: {ext}")
-
-def process_requirements():
+async def process_requirements():
     if state["workflow_status"] == "uploaded" and state["uploaded_file_path"]:
         try:
             ui.notify("🚀 Running Autogen Agent Pipeline...")
             logger.info(f"Starting pipeline with file: {state['uploaded_file_path']}")
-            start_agent_workflow(state["uploaded_file_path"])
-            app.reload()
+            job_id = job_runner.submit(start_agent_workflow, state["uploaded_file_path"], state=state)
+            state["job_id"] = job_id
+            job = await job_runner.wait(job_id)
+            if job.status == SUCCEEDED:
+                app.reload()
+            elif job.status == CANCELLED:
+                ui.notify("Pipeline cancelled", type="warning")
+            else:
+                ui.notify(f"❌ Error: {job.error}", type="negative")
         except Exception as e:
             ui.notify(f"❌ Error: {str(e)}", type="negative")
 
+def cancel_requirements():
+    if state["job_id"] and job_runner.cancel(state["job_id"]):
+        ui.notify("Cancelling pipeline...")
+
 @ui.page("/")
 def main_page():
     steps = [
@@ -84,9 +86,7 @@ def main_page():
                     file_path = os.path.join(input_dir, filename)
 
                     try:
-                        parsed_text = extract_text_from_file(content, file)
-                        with open(file_path, "w", encoding="utf-8") as f:
-                            f.write(parsed_text)
+                        save_extracted_text(content, file, file_path)
 
                         state["uploaded_file_path"] = file_path
                         state["workflow_status"] = "uploaded"
@@ -96,28 +96,34 @@ def main_page():
                         ui.notify(f"❌ Failed to parse: {str(ex)}", type="negative")
 
                 ui.upload(on_upload=handle_upload, label="Upload File", auto_upload=True).props('accept=".txt,.pdf,.docx"')
-                ui.button("PROCESS REQUIREMENTS", on_click=lambda: process_requirements()).props('color="primary"').classes("mt-4")
+                ui.button("PROCESS REQUIREMENTS", on_click=process_requirements).props('color="primary"').classes("mt-4")
+                ui.button("CANCEL", on_click=cancel_requirements).props('color="negative" flat').classes("mt-2")
 
             # Display JSON stories if generated
             if state["workflow_status"] == "stories_generated" and state["stories_file"]:
                 stories_path = os.path.join(project_root, "stories", state["stories_file"])
                 if os.path.exists(stories_path):
-                    with open(stories_path, 'r') as f:
-                        stories = json.load(f)
+                    stories = load_stories(stories_path, limit=DISPLAY_LIMIT)
                     ui.label("Generated Stories").classes("text-xl font-semibold mt-4")
                     ui.json(stories)
 
                     if not state["stories_approved"]:
-                        def approve_stories():
+                        async def approve_stories():
                             state["stories_approved"] = True
                             state["workflow_status"] = "stories_approved"
                             ui.notify("✅ Stories approved. Proceeding to JIRA creation...")
-                            if state["chat_manager"]:
+                            if state["run_id"]:
                                 try:
-                                    user_agent.initiate_chat(
-                                        state["chat_manager"],
+                                    job_id = job_runner.submit(
+                                        continue_workflow,
+                                        state["run_id"],
+                                        state=state,
                                         message="Stories approved. Please proceed with creating Jira tickets."
                                     )
+                                    state["job_id"] = job_id
+                                    job = await job_runner.wait(job_id)
+                                    if job.status == FAILED:
+                                        raise RuntimeError(job.error)
                                     app.reload()
                                 except Exception as e:
                                     ui.notify(f"Error updating chat: {str(e)}", type="negative")
@@ -131,16 +137,22 @@ def main_page():
                     ui.code(code, language="python")
 
                     if not state["code_approved"]:
-                        def approve_code():
+                        async def approve_code():
                             state["code_approved"] = True
                             state["workflow_status"] = "code_approved"
                             ui.notify("✅ Code approved. Workflow complete!")
-                            if state["chat_manager"]:
+                            if state["run_id"]:
                                 try:
-                                    user_agent.initiate_chat(
-                                        state["chat_manager"],
+                                    job_id = job_runner.submit(
+                                        continue_workflow,
+                                        state["run_id"],
+                                        state=state,
                                         message="Code approved. Workflow completed."
                                     )
+                                    state["job_id"] = job_id
+                                    job = await job_runner.wait(job_id)
+                                    if job.status == FAILED:
+                                        raise RuntimeError(job.error)
                                     app.reload()
                                 except Exception as e:
                                     ui.notify(f"Error updating chat: {str(e)}", type="negative")
@@ -154,6 +166,6 @@ def main_page():
                 ui.label().bind_text_from(state, 'stories_approved', lambda v: f"Stories Approved: {v}")
                 ui.label().bind_text_from(state, 'code_file', lambda v: f"Program File: {v or 'None'}")
                 ui.label().bind_text_from(state, 'code_approved', lambda v: f"Code Approved: {v}")
-                ui.label(f"Chat Manager: {'Active' if state['chat_manager'] else 'None'}")
+                ui.label().bind_text_from(state, 'run_id', lambda v: f"Workflow Run: {v or 'None'}")
 
 ui.run(title="SDLC Automation Dashboard", reload=True)
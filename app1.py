@@ -8,8 +8,11 @@ import docx, PyPDF2
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
-from src.orchestrator import start_agent_workflow
-from src.agents.user_agent import user_agent
+from src.stories import DISPLAY_LIMIT, load_stories
+from src.orchestrator import start_agent_workflow, continue_workflow
+from src.logs import configure_logging
+
+configure_logging()
 
 
 def extract_text_from_file(file_content: bytes, filename: str) -> str:
@@ -33,7 +36,7 @@ def main():
 
     # Set defaults if not already set
     state.setdefault("workflow_status", "initial")
-    state.setdefault("chat_manager", None)
+    state.setdefault("run_id", None)
     state.setdefault("uploaded_file_path", None)
     state.setdefault("stories_approved", False)
     state.setdefault("stories_file", None)
@@ -94,8 +97,7 @@ def main():
             if state["workflow_status"] == "stories_generated" and state["stories_file"]:
                 stories_path = os.path.join(project_root, "stories", state["stories_file"])
                 if os.path.exists(stories_path):
-                    with open(stories_path, 'r') as f:
-                        stories = json.load(f)
+                    stories = load_stories(stories_path, limit=DISPLAY_LIMIT)
                     ui.label("Generated Stories").classes("text-xl font-semibold mt-4")
                     ui.json(stories)
 
@@ -104,10 +106,11 @@ def main():
                             state["stories_approved"] = True
                             state["workflow_status"] = "stories_approved"
                             ui.notify("✅ Stories approved. Proceeding to JIRA creation...")
-                            if state["chat_manager"]:
+                            if state["run_id"]:
                                 try:
-                                    user_agent.initiate_chat(
-                                        state["chat_manager"],
+                                    continue_workflow(
+                                        state["run_id"],
+                                        state=state,
                                         message="Stories approved. Please proceed with creating Jira tickets."
                                     )
                                     app.reload()
@@ -127,10 +130,11 @@ def main():
                             state["code_approved"] = True
                             state["workflow_status"] = "code_approved"
                             ui.notify("✅ Code approved. Workflow complete!")
-                            if state["chat_manager"]:
+                            if state["run_id"]:
                                 try:
-                                    user_agent.initiate_chat(
-                                        state["chat_manager"],
+                                    continue_workflow(
+                                        state["run_id"],
+                                        state=state,
                                         message="Code approved. Workflow completed."
                                     )
                                     app.reload()
@@ -146,7 +150,7 @@ def main():
                 ui.label().bind_text_from(state, 'stories_approved', lambda v: f"Stories Approved: {v}")
                 ui.label().bind_text_from(state, 'code_file', lambda v: f"Program File: {v or 'None'}")
                 ui.label().bind_text_from(state, 'code_approved', lambda v: f"Code Approved: {v}")
-                ui.label(f"Chat Manager: {'Active' if state['chat_manager'] else 'None'}")
+                ui.label().bind_text_from(state, 'run_id', lambda v: f"Workflow Run: {v or 'None'}")
 
 
 def process_requirements(state):
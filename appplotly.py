@@ -8,12 +8,13 @@ import logging
 
 # External functions and modules
 from autogen import GroupChat
-from src.orchestrator import start_agent_workflow
-from src.agents.user_agent import user_agent
+from src.stories import DISPLAY_LIMIT, load_stories
+from src.logs import configure_logging
+from src.orchestrator import start_agent_workflow, update_group_chat
 
 # Logging setup
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 
 # App and session state setup
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
@@ -99,8 +100,7 @@ def render_step_content(step, file_path, stories_file, stories_approved, code_fi
     elif step == 1 and stories_file:
         path = os.path.join(stories_dir, stories_file)
         if os.path.exists(path):
-            with open(path, 'r') as f:
-                stories = json.load(f)
+            stories = load_stories(path, limit=DISPLAY_LIMIT)
             return html.Div([
                 html.H3("Generated Stories"),
                 html.Pre(json.dumps(stories, indent=2)),
@@ -164,10 +164,7 @@ def navigate_steps(next_clicks, prev_clicks, current_step):
     prevent_initial_call=True
 )
 def approve_stories(n):
-    user_agent.initiate_chat(
-        None,  # replace with actual chat manager
-        message="Stories approved. Proceeding to Jira ticket creation."
-    )
+    update_group_chat("Stories approved. Proceeding to Jira ticket creation.")
     return True
 
 # Approve code
@@ -177,10 +174,7 @@ def approve_stories(n):
     prevent_initial_call=True
 )
 def approve_code(n):
-    user_agent.initiate_chat(
-        None,  # replace with actual chat manager
-        message="Code approved. Workflow completed."
-    )
+    update_group_chat("Code approved. Workflow completed.")
     return True
 
 if __name__ == '__main__':
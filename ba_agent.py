@@ -1,95 +1,105 @@
 from autogen import ConversableAgent
 from src.config.settings import LLM_CONFIG
-from src.tools.file_read_tool import read_file
+from src.stories import iter_requirements, stories_filename, story_from_requirement, write_stories
+from src.story_store import story_store
+from src.refinement import REFINEMENT_ENABLED, refine_document
+from src.section_index import load_section_index, section_texts
+from src.estimator import estimator, LLM_FALLBACK, LLMEstimator
+from src.workflow import emit_signal, STORIES_GENERATED
+from src.tracing import traced
+from src.logs import Sampler
+from collections import Counter
 import logging
-import json
 import os
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@traced("tool.process_requirements_wrapper")
 def process_requirements_wrapper(file_path: str, state: dict) -> str:
     try:
         logger.info("\n=== BA Agent Starting ===")
-        logger.info(f"Processing requirements file: {file_path}")
+        logger.info("Processing requirements file: %s", file_path)
 
         # Get stories directory
         project_root = str(Path(__file__).parent.parent.parent)
         stories_dir = os.path.join(project_root, "stories")
-        logger.info(f"Stories directory: {stories_dir}")
+        logger.info("Stories directory: %s", stories_dir)
 
         os.makedirs(stories_dir, exist_ok=True)
 
-        file_content = read_file(file_path)
-        logger.info(f"File content length: {len(file_content)} characters")
-
-        stories = []
-        for line in file_content.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-            if line[0].isdigit() and '.' in line or line.startswith('-'):
-                if line.startswith('-'):
-                    line = line[1:].strip()
-                story = {
-                    "summary": f"As a user, I want to {line.lower()}",
-                    "description": f"""User Story:
-As a user,
-I want to {line.lower()}
-So that I can achieve my goal efficiently
-
-Acceptance Criteria:
-1. The system should implement {line}
-2. The feature should be user-friendly
-3. The implementation should follow best practices
-
-Technical Notes:
-- Priority: Medium
-- Story Points: 3
-- Dependencies: None""",
-                    "priority": "Medium",
-                    "story_points": 3,
-                    "type": "User Story"
-                }
-                stories.append(story)
-                logger.info(f"Generated user story: {story['summary']}")
-
-        logger.info(f"Total user stories generated: {len(stories)}")
-        uploaded_filename = os.path.basename(file_path)
-        stories_file = f"stories_{uploaded_filename}"
-        stories_path = os.path.join(stories_dir, stories_file)
+        # One line per story would dominate large specs; log a sample and a total
+        sample = Sampler(logger)
+
+        def logged(stories):
+            for story in stories:
+                if sample():
+                    logger.info("Generated user story %d: %s", sample.seen, story["summary"])
+                yield story
 
-        with open(stories_path, 'w') as f:
-            json.dump(stories, f, indent=2)
+        # Priority and points come from the local estimator when one has been trained
+        estimates = Counter()
+        fallback = LLMEstimator() if estimator is not None and LLM_FALLBACK else None
 
-        logger.info(f"Successfully saved {len(stories)} user stories")
+        def build(requirement):
+            story = story_from_requirement(requirement)
+            if estimator is not None:
+                estimates[estimator.apply(story, fallback)] += 1
+            return story
+
+        # Requirements are read, turned into stories and appended one at a time
+        stories_file = stories_filename(os.path.basename(file_path))
+        stories_path = os.path.join(stories_dir, stories_file)
+        changes = None
+        if REFINEMENT_ENABLED:
+            # Large specs are chunked along their indexed sections and refined by the LLM in parallel
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+            sections = section_texts(text, load_section_index(file_path))
+
+            def generate(revision):
+                return refine_document(text, sections=sections, revision=revision)
+        else:
+            def generate(revision):
+                requirements = iter_requirements(file_path)
+                if revision is None:
+                    return (build(r) for r in requirements)
+                return (revision.story_for(r, build) for r in requirements)
+
+        if story_store is None:
+            count = write_stories(stories_path, logged(generate(None)))
+        else:
+            # Only requirements (or, when refining, sections) the store has not seen before get new stories
+            with story_store.revision(os.path.basename(file_path)) as revision:
+                count = write_stories(stories_path, logged(generate(revision)))
+                changes = revision.finish()
+            logger.info("Requirement changes: %d added, %d removed, %d unchanged (%d stories reused)",
+                        changes["added"], changes["removed"], changes["unchanged"], changes["reused"],
+                        extra=changes)
+
+        logger.info("Successfully saved %d user stories (%d logged)", count, sample.logged, extra={"count": count})
+        if estimates:
+            logger.info("Estimated %d stories: %d by the local model, %d by the LLM, %d left at defaults",
+                        sum(estimates.values()), estimates["model"], estimates["llm"], estimates["default"])
 
         state["stories_file"] = stories_file
+        state["story_changes"] = changes
         state["workflow_status"] = "stories_generated"
-
-        logger.info("\n=== Generated User Stories ===")
-        for i, story in enumerate(stories, 1):
-            logger.info(f"\nStory {i}:")
-            logger.info(f"Summary: {story['summary']}")
-            logger.info(f"Description: {story['description']}")
-            logger.info(f"Priority: {story['priority']}")
-            logger.info(f"Story Points: {story['story_points']}")
-            logger.info(f"Type: {story['type']}")
+        emit_signal(STORIES_GENERATED, stories_file=stories_file)
 
         logger.info("\n=== BA Agent Completed ===")
-        return f"Generated and saved {len(stories)} user stories to {stories_path}"
+        if changes:
+            return (f"Generated and saved {count} user stories to {stories_path} "
+                    f"({changes['added']} added, {changes['removed']} removed, {changes['unchanged']} unchanged)")
+        return f"Generated and saved {count} user stories to {stories_path}"
 
     except Exception as e:
-        logger.error(f"Error processing requirements: {str(e)}")
+        logger.error("Error processing requirements: %s", e)
         return f"Error processing requirements: {str(e)}"
 
 
-ba_agent = ConversableAgent(
-    name="BA_Agent",
-    system_message="""You are a Business Analyst Agent (BA_Agent). Your role is to:
+BA_SYSTEM_MESSAGE = """You are a Business Analyst Agent (BA_Agent). Your role is to:
     1. Read requirements from a file using process_requirements_wrapper
     2. Convert requirements into proper user stories with:
        - Clear \"As a user, I want to...\" format
@@ -106,19 +116,28 @@ ba_agent = ConversableAgent(
         \"priority\": \"Medium\",
         \"story_points\": 3,
         \"type\": \"User Story\"
-    }""",
-    llm_config=LLM_CONFIG,
-    human_input_mode="NEVER",
-    max_consecutive_auto_reply=3,
-    code_execution_config={
-        "last_n_messages": 3,
-        "work_dir": "workspace",
-        "use_docker": False,
-        "timeout": 60
-    }
-)
-
-@ba_agent.register_for_execution()
-@ba_agent.register_for_llm(name="process_requirements_wrapper", description="Process requirements file and generate Jira stories.")
-def process_requirements_wrapper_func(file_path: str, state: dict) -> str:
-    return process_requirements_wrapper(file_path, state)
+    }"""
+
+
+def build_ba_agent() -> ConversableAgent:
+    """Create a BA_Agent with its tools registered."""
+    agent = ConversableAgent(
+        name="BA_Agent",
+        system_message=BA_SYSTEM_MESSAGE,
+        llm_config=LLM_CONFIG,
+        human_input_mode="NEVER",
+        max_consecutive_auto_reply=3,
+        code_execution_config={
+            "last_n_messages": 3,
+            "work_dir": "workspace",
+            "use_docker": False,
+            "timeout": 60
+        }
+    )
+
+    @agent.register_for_execution()
+    @agent.register_for_llm(name="process_requirements_wrapper", description="Process requirements file and generate Jira stories.")
+    def process_requirements_wrapper_func(file_path: str, state: dict) -> str:
+        return process_requirements_wrapper(file_path, state)
+
+    return agent
@@ -0,0 +1,150 @@
+"""Headless batch runner: push a directory of requirement files through the workflow.
+
+Each file runs in its own worker process with HITL approvals granted
+automatically. Tool-only steps use direct dispatch unless ``--llm`` is given::
+
+    python -m src.batch requirements/ --workers 4
+    python -m src.batch "requirements/*.docx" --workers 2 --llm
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+logger = logging.getLogger(__name__)
+
+INPUT_DIR = os.path.join(project_root, "input")
+
+
+def find_requirement_files(target: str) -> list:
+    """Files under a directory, or matching a glob, with a supported extension."""
+    from src.document_processor import SUPPORTED_EXTENSIONS
+    if os.path.isdir(target):
+        paths = [os.path.join(target, name) for name in os.listdir(target)]
+    else:
+        paths = glob.glob(target)
+    return sorted(p for p in paths if os.path.isfile(p) and p.rsplit(".", 1)[-1].lower() in SUPPORTED_EXTENSIONS)
+
+
+def input_path_for(path: str) -> str:
+    """Where the extracted text of `path` is saved.
+
+    Keyed by the full file name, so spec.pdf and spec.docx get separate texts
+    (and stories files) instead of overwriting each other.
+    """
+    return os.path.join(INPUT_DIR, os.path.basename(path) + ".txt")
+
+
+def _init_worker() -> None:
+    # One workflow at a time per process, so one warm agent team is enough
+    os.environ.setdefault("SDLC_AGENT_POOL_SIZE", "1")
+    from src.logs import configure_logging
+    configure_logging(level="WARNING")
+
+
+def process_file(path: str, direct: bool = True) -> dict:
+    """Run one requirements file end to end and report per-stage timings."""
+    from src.document_processor import save_extracted_text
+    from src.orchestrator import start_agent_workflow, continue_workflow
+
+    result = {"file": os.path.basename(path), "stories": 0, "timings": {}, "error": None, "run_id": None}
+    timings = result["timings"]
+    started = time.perf_counter()
+    try:
+        stage = time.perf_counter()
+        os.makedirs(INPUT_DIR, exist_ok=True)
+        input_path = input_path_for(path)
+        with open(path, "rb") as f:
+            save_extracted_text(f.read(), path, input_path)
+        timings["extract"] = time.perf_counter() - stage
+
+        state = {"workflow_status": "uploaded", "uploaded_file_path": input_path,
+                 "stories_approved": False, "code_approved": False}
+
+        stage = time.perf_counter()
+        run_id = start_agent_workflow(input_path, state=state, direct=direct)
+        result["run_id"] = run_id
+        timings["stories"] = time.perf_counter() - stage
+        if not run_id:
+            raise RuntimeError("workflow did not start")
+
+        stage = time.perf_counter()
+        state["stories_approved"] = True
+        state["workflow_status"] = "stories_approved"
+        continue_workflow(run_id, "Stories approved. Please proceed with creating Jira tickets.", state=state)
+        timings["jira_code"] = time.perf_counter() - stage
+
+        state["code_approved"] = True
+        state["workflow_status"] = "code_approved"
+        continue_workflow(run_id, "Code approved. Workflow completed.", state=state)
+
+        result["stories"] = len(state.get("jira_issues") or [])
+    except Exception as e:
+        logger.error("Batch run failed for %s: %s", path, e)
+        result["error"] = str(e)
+    timings["total"] = time.perf_counter() - started
+    return result
+
+
+def run_batch(paths: list, workers: int = 2, direct: bool = True) -> list:
+    """Process `paths` across `workers` processes; results come back in input order."""
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = {executor.submit(process_file, path, direct): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                # The worker process itself died
+                results[path] = {"file": os.path.basename(path), "stories": 0, "timings": {},
+                                 "error": str(e), "run_id": None}
+            status = "FAILED" if results[path]["error"] else "ok"
+            print(f"[{len(results)}/{len(paths)}] {results[path]['file']}: {status}", flush=True)
+    return [results[path] for path in paths]
+
+
+def print_summary(results: list, elapsed: float) -> None:
+    print(f"\n{'file':<40} {'stories':>7} {'extract':>8} {'stories':>8} {'jira+code':>10} {'total':>8}  error")
+    for r in results:
+        t = r["timings"]
+        cols = " ".join(f"{t.get(k, 0.0):>{w}.2f}" for k, w in (("extract", 8), ("stories", 8), ("jira_code", 10), ("total", 8)))
+        print(f"{r['file'][:40]:<40} {r['stories']:>7} {cols}  {r['error'] or ''}")
+
+    failures = sum(1 for r in results if r["error"])
+    stories = sum(r["stories"] for r in results)
+    minutes = elapsed / 60 if elapsed else 0.0
+    print(f"\n{len(results)} files, {stories} stories, {failures} failed in {elapsed:.1f}s")
+    if minutes:
+        print(f"Throughput: {len(results) / minutes:.1f} files/min, {stories / minutes:.1f} stories/min")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run requirement files through the SDLC workflow without the UI")
+    parser.add_argument("target", help="directory or glob of .txt/.pdf/.docx requirement files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--llm", action="store_true", help="let the LLM drive tool-only steps instead of direct dispatch")
+    args = parser.parse_args(argv)
+
+    from src.logs import configure_logging
+    configure_logging(level="WARNING")
+    paths = find_requirement_files(args.target)
+    if not paths:
+        print(f"No requirement files found for {args.target}")
+        return 1
+
+    started = time.perf_counter()
+    results = run_batch(paths, workers=args.workers, direct=not args.llm)
+    print_summary(results, time.perf_counter() - started)
+    return 1 if any(r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
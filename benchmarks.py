@@ -0,0 +1,562 @@
+"""Microbenchmarks for the SDLC pipeline.
+
+Run from the project root, e.g. ``python -m src.benchmarks routing``.
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+
+class _Agent:
+    """Hashable stand-in for an autogen agent."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+def _best_of(fn, repeat: int = 5, number: int = 1000) -> float:
+    """Best average seconds per call over `repeat` batches of `number` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def bench_routing(args) -> None:
+    """Per-turn speaker selection cost against message size and history length."""
+    from src.workflow import WorkflowMachine
+
+    agents = [_Agent(n) for n in ("BA_Agent", "User_Agent", "Jira_Agent", "Coder_Agent")]
+    ba, user, jira, coder = agents
+
+    print(f"{'msg bytes':>10} {'history':>8} {'ns/turn':>10}")
+    for size in (100, 10_000, 1_000_000):
+        for history in (10, 1_000, 100_000):
+            messages = [{"content": "x" * size, "role": "user"}] * history
+            groupchat = SimpleNamespace(messages=messages, agents=agents)
+            machine = WorkflowMachine(agents, {"workflow_status": "initial"})
+
+            def turn():
+                machine.select(ba, groupchat)
+                machine.select(user, groupchat)
+                machine.select(jira, groupchat)
+                machine.select(coder, groupchat)
+
+            per_turn = _best_of(turn, number=args.number) / 4
+            print(f"{size:>10} {history:>8} {per_turn * 1e9:>10.0f}")
+
+
+# Stores that outlive a run; each dispatch mode starts from empty ones
+_DISPATCH_STATE = {
+    "SDLC_STORY_STORE_PATH": "stories.sqlite3",
+    "SDLC_LLM_CACHE_PATH": "llm_cache.sqlite3",
+    "SDLC_JIRA_LEDGER_PATH": "jira_ledger.sqlite3",
+    "SDLC_DEDUPE_INDEX_PATH": "dedupe.sqlite3",
+    "SDLC_JIRA_META_PATH": "jira_createmeta.json",
+}
+
+
+def _dispatch_run(input_path: str, direct: bool) -> None:
+    """Run one workflow end to end and print its seconds and final status."""
+    from src.orchestrator import start_agent_workflow, continue_workflow
+
+    state = {"workflow_status": "initial"}
+    start = time.perf_counter()
+    run_id = start_agent_workflow(input_path, state=state, direct=direct)
+    state.update(stories_approved=True, workflow_status="stories_approved")
+    continue_workflow(run_id, "Stories approved. Please proceed with creating Jira tickets.", state=state)
+    state.update(code_approved=True, workflow_status="code_approved")
+    continue_workflow(run_id, "Code approved. Workflow completed.", state=state)
+    print(time.perf_counter() - start, state["workflow_status"])
+
+
+def bench_dispatch(args) -> None:
+    """End-to-end latency for one requirements file with and without direct tool dispatch."""
+    import os
+    import subprocess
+    import sys
+    import tempfile
+
+    if not args.input:
+        raise SystemExit("dispatch benchmark needs --input <requirements file>")
+
+    print(f"{'mode':>10} {'seconds':>9} {'status':>16}")
+    for direct in (False, True):
+        # A process per mode, so neither run finds stories, LLM replies or
+        # Jira issues the other one left in the persistent stores
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, **{name: os.path.join(tmp, file) for name, file in _DISPATCH_STATE.items()})
+            code = f"from src.benchmarks import _dispatch_run; _dispatch_run({args.input!r}, {direct})"
+            output = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                                    stdout=subprocess.PIPE, text=True).stdout
+        elapsed, status = output.split()[-2:]
+        print(f"{'direct' if direct else 'llm':>10} {float(elapsed):>9.2f} {status:>16}")
+
+
+def bench_stories(args) -> None:
+    """Peak memory and time of streaming story generation against specification size."""
+    import os
+    import tempfile
+    import tracemalloc
+    from src.stories import generate_stories, iter_requirements, iter_stories, write_stories
+
+    print(f"{'lines':>9} {'gen s':>7} {'gen peak KiB':>13} {'read s':>7} {'read peak KiB':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for lines in (1_000, 100_000, 1_000_000):
+            spec = os.path.join(tmp, "spec.txt")
+            stories_path = os.path.join(tmp, "stories.jsonl")
+            with open(spec, "w") as f:
+                for i in range(lines):
+                    f.write(f"{i + 1}. Users can manage record {i}\n")
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            write_stories(stories_path, generate_stories(iter_requirements(spec)))
+            gen_s = time.perf_counter() - start
+            gen_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            for _ in iter_stories(stories_path):
+                pass
+            read_s = time.perf_counter() - start
+            read_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{lines:>9} {gen_s:>7.2f} {gen_peak / 1024:>13.0f} {read_s:>7.2f} {read_peak / 1024:>14.0f}")
+
+
+def _legacy_is_requirement(line: str) -> bool:
+    line = line.strip()
+    return bool(line) and (line[0].isdigit() and '.' in line or line.startswith('-'))
+
+
+def bench_classifier(args) -> None:
+    """Requirement line classification throughput: legacy check vs RequirementClassifier."""
+    import random
+    from src.requirement_classifier import RequirementClassifier
+
+    random.seed(0)
+    items = [
+        "{n}. Users can export report {n}", "{n}) Admins can archive item {n}", "  {n}.2.1 Nested rule {n}",
+        "a. Alpha option {n}", "- Dash bullet {n}", "* Star bullet {n}", "\u2022 Dot bullet {n}",
+        "    - Deep bullet {n}", "{n}.Compact item {n}", "-Tight bullet {n}",
+    ]
+    prose = ["The system processed {n} records yesterday.", "Version 2.{n} notes follow",
+             "A. Smith reviewed section {n} last week.", ""]
+    classifier = RequirementClassifier()
+
+    print(f"{'document':>9} {'lines':>9} {'legacy s':>9} {'hits':>8} {'check s':>8} {'classify s':>11} "
+          f"{'stream s':>9} {'hits':>8}")
+    # Lists: mostly list items; specs: a list item every tenth line, the rest prose
+    for name, pick in (("lists", lambda: random.choice(items + prose)),
+                       ("specs", lambda: random.choice(items if random.random() < 0.1 else prose))):
+        for lines in (100_000, 1_000_000):
+            doc = [pick().format(n=i) for i in range(lines)]
+
+            start = time.perf_counter()
+            legacy_hits = sum(1 for line in doc if _legacy_is_requirement(line))
+            legacy_s = time.perf_counter() - start
+
+            # The same question the legacy check answers, without building Requirements
+            is_requirement = classifier.is_requirement
+            start = time.perf_counter()
+            sum(1 for line in doc if is_requirement(line))
+            check_s = time.perf_counter() - start
+
+            classify = classifier.classify
+            start = time.perf_counter()
+            sum(1 for line in doc if classify(line) is not None)
+            classify_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            hits = sum(1 for _ in classifier.iter_requirements(doc))
+            stream_s = time.perf_counter() - start
+            print(f"{name:>9} {lines:>9} {legacy_s:>9.3f} {legacy_hits:>8} {check_s:>8.3f} {classify_s:>11.3f} "
+                  f"{stream_s:>9.3f} {hits:>8}")
+
+            # Every line the legacy check took as a requirement is still one
+            missed = [line for line in doc if _legacy_is_requirement(line) and classify(line) is None]
+            assert not missed, f"legacy requirements no longer recognized: {missed[:5]}"
+
+
+def bench_dedupe(args) -> None:
+    """Near-duplicate index: insert rate, lookup latency and detection rate at 10k/100k stories."""
+    import os
+    import random
+    import tempfile
+    from src.dedupe_index import DedupeIndex
+
+    random.seed(0)
+    vocab = [f"{random.choice('bcdfghklmnprst')}{random.choice('aeiou')}{random.choice('bcdfghklmnprst')}"
+             f"{random.choice('aeiou')}{random.choice('nrstlm')}" for _ in range(3000)]
+
+    def sentence():
+        return " ".join(random.choice(vocab) for _ in range(random.randint(6, 10)))
+
+    def story(text):
+        return {"summary": f"As a user, I want to {text}"}
+
+    def reword(text):
+        words = text.split()
+        words[random.randrange(len(words))] = random.choice(vocab)
+        return " ".join(words)
+
+    print(f"{'stories':>8} {'insert/s':>9} {'p50 ms':>7} {'p99 ms':>7} {'dup found':>10} {'false pos':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (10_000, 100_000):
+            index = DedupeIndex(os.path.join(tmp, f"dedupe_{size}.sqlite3"))
+            texts = [sentence() for _ in range(size)]
+            start = time.perf_counter()
+            for i, text in enumerate(texts):
+                index.add(story(text), issue_key=f"SDLC-{i}")
+            insert_rate = size / (time.perf_counter() - start)
+
+            latencies, found, false_pos = [], 0, 0
+            for _ in range(500):
+                for query, expect in ((reword(random.choice(texts)), True), (sentence(), False)):
+                    start = time.perf_counter()
+                    match = index.find(story(query))
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if expect and match is not None:
+                        found += 1
+                    elif not expect and match is not None:
+                        false_pos += 1
+            latencies.sort()
+            p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+            print(f"{size:>8} {insert_rate:>9.0f} {p50:>7.2f} {p99:>7.2f} {found / 500:>10.1%} {false_pos / 500:>10.1%}")
+            index.close()
+
+
+def bench_story_model(args) -> None:
+    """Memory and stories-file size of rendered story dicts vs compact Story records."""
+    import json
+    import tracemalloc
+    from src.stories import Story
+
+    def measure(build, count):
+        tracemalloc.start()
+        stories = [build(i) for i in range(count)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return stories, size
+
+    print(f"{'stories':>8} {'dict MiB':>9} {'Story MiB':>10} {'dict B/line':>12} {'Story B/line':>13}")
+    for count in (10_000, 100_000):
+        dicts, dict_bytes = measure(lambda i: Story(f"Export report number {i}").to_dict(), count)
+        stories, story_bytes = measure(lambda i: Story(f"Export report number {i}"), count)
+        dict_line = len(json.dumps(dicts[-1])) + 1
+        story_line = len(json.dumps(stories[-1].to_record())) + 1
+        print(f"{count:>8} {dict_bytes / 2**20:>9.1f} {story_bytes / 2**20:>10.1f} {dict_line:>12} {story_line:>13}")
+        del dicts, stories
+
+
+def bench_story_index(args) -> None:
+    """Reading one story or a page: full json.load of a legacy array vs the offset index."""
+    import json
+    import os
+    import tempfile
+    from src.stories import Story, convert_stories, read_page, read_story
+
+    print(f"{'stories':>9} {'json.load ms':>13} {'read_story ms':>14} {'read_page(50) ms':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (1_000, 10_000, 100_000):
+            legacy = os.path.join(tmp, f"stories_{count}.json")
+            with open(legacy, "w") as f:
+                json.dump([Story(f"Users can manage record {i}").to_dict() for i in range(count)], f)
+            indexed = convert_stories(legacy)
+            middle = count // 2
+
+            start = time.perf_counter()
+            with open(legacy) as f:
+                json.load(f)[middle]
+            load_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            read_story(indexed, middle)
+            story_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            read_page(indexed, middle, 50)
+            page_ms = (time.perf_counter() - start) * 1000
+            print(f"{count:>9} {load_ms:>13.2f} {story_ms:>14.3f} {page_ms:>17.3f}")
+
+
+def bench_logging(args) -> None:
+    """Per-story logging cost at 10k stories: eager f-strings to a file handler vs queued, lazy, sampled."""
+    import logging
+    import os
+    import queue
+    import tempfile
+    from logging.handlers import QueueListener
+    from src.logs import Sampler, StructuredFormatter, _LazyQueueHandler
+    from src.stories import Story
+
+    stories = [Story(f"Users can manage record {i}") for i in range(10_000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        file_handler = logging.FileHandler(os.path.join(tmp, "bench.log"))
+        file_handler.setFormatter(StructuredFormatter())
+        logger = logging.getLogger("src.benchmarks.logging")
+        logger.propagate = False
+
+        def eager():
+            for story in stories:
+                logger.info(f"Generated user story: {story['summary']}")
+
+        def sampled(every):
+            def run():
+                sample = Sampler(logger, every=every)
+                for story in stories:
+                    if sample():
+                        logger.info("Generated user story %d: %s", sample.seen, story["summary"])
+                logger.info("Saved %d user stories (%d logged)", len(stories), sample.logged)
+            return run
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler)
+        queued = _LazyQueueHandler(log_queue)
+        cases = [
+            ("eager, file handler", file_handler, None, eager),
+            ("lazy, queued, all", queued, listener, sampled(1)),
+            ("lazy, queued, 1/100", queued, listener, sampled(100)),
+        ]
+        print(f"{'case':<22} {'INFO ms':>9} {'WARNING ms':>11}")
+        for name, handler, case_listener, run in cases:
+            logger.handlers = [handler]
+            timings = []
+            for level in (logging.INFO, logging.WARNING):
+                logger.setLevel(level)
+                if case_listener is not None:
+                    case_listener.start()
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+                if case_listener is not None:
+                    case_listener.stop()
+            print(f"{name:<22} {timings[0]:>9.1f} {timings[1]:>11.1f}")
+        logger.handlers = []
+        file_handler.close()
+
+
+def bench_estimator(args) -> None:
+    """Local estimator: training time, held-out accuracy and estimates per second."""
+    import random
+    from src.estimator import StoryEstimator
+    from src.stories import Story
+
+    rng = random.Random(0)
+    # Synthetic history: the subject decides the outcome, the rest is noise
+    subjects = {
+        "payment card checkout": ("High", 8), "login password reset": ("High", 5),
+        "audit log export": ("Medium", 5), "search filters results": ("Medium", 3),
+        "profile avatar upload": ("Low", 2), "footer link colour": ("Low", 1),
+    }
+    verbs = ["manage", "update", "review", "see", "configure", "validate"]
+
+    def make(count):
+        stories = []
+        for _ in range(count):
+            subject, (priority, points) = rng.choice(list(subjects.items()))
+            text = f"Users can {rng.choice(verbs)} the {subject} for record {rng.randrange(1000)}"
+            stories.append(Story(text, priority=priority, story_points=points))
+        return stories
+
+    train, test = make(3_000), make(5_000)
+    estimator = StoryEstimator()
+    start = time.perf_counter()
+    estimator.fit(train)
+    train_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    estimates = [estimator.estimate(story.requirement) for story in test]
+    predict_ms = (time.perf_counter() - start) * 1000
+    confident = [(e, s) for e, s in zip(estimates, test) if e.priority is not None and e.story_points is not None]
+    correct = sum(1 for e, s in confident if (e.priority, e.story_points) == (s.priority, s.story_points))
+    print(f"trained on {len(train)} stories in {train_s:.2f}s")
+    print(f"estimated {len(test)} stories in {predict_ms:.1f} ms ({predict_ms * 1000 / len(test):.1f} us/story)")
+    print(f"confident (>= {estimator.confidence}): {len(confident)}/{len(test)}, "
+          f"accuracy {correct / max(len(confident), 1):.1%}; the rest would go to the LLM")
+
+
+def bench_jira_bulk(args) -> None:
+    """Issues/sec against the local stub Jira: one request per story vs bulk create."""
+    from src.jira_stub_server import start_stub_server
+    from src.rate_limiter import FairScheduler
+    from src.tools import jira_create_tool
+
+    # Measure Jira's side alone, without the client's rate limit; keep stub metadata off disk
+    jira_create_tool.jira_scheduler = FairScheduler(0)
+    jira_create_tool.createmeta_cache = jira_create_tool.MetadataCache(path="")
+
+    count = 500
+    stories = [{"summary": f"As a user, I want to manage record {i}", "description": "..."} for i in range(count)]
+    print(f"{'latency ms':>10} {'per-story/s':>12} {'bulk/s':>9} {'requests':>9}")
+    for latency_ms in (0, 5, 20):
+        server, url = start_stub_server(latency=latency_ms / 1000)
+        jira_create_tool.JIRA_URL = url
+        try:
+            start = time.perf_counter()
+            for story in stories:
+                jira_create_tool.create_jira_story(story)
+            single_rate = count / (time.perf_counter() - start)
+            before = server.jira.requests
+            start = time.perf_counter()
+            results = jira_create_tool.create_jira_stories(stories)
+            bulk_rate = count / (time.perf_counter() - start)
+            assert all(r.issue_key for r in results)
+            print(f"{latency_ms:>10} {single_rate:>12.0f} {bulk_rate:>9.0f} {server.jira.requests - before:>9}")
+        finally:
+            server.shutdown()
+
+
+def bench_jira_pool(args) -> None:
+    """Issues/sec against the local stub Jira: fresh connection per request vs pooled keep-alive."""
+    import asyncio
+    import json
+    import urllib.request
+    from src.jira_stub_server import start_stub_server
+    from src.rate_limiter import FairScheduler
+    from src.tools import jira_create_tool
+
+    # Measure Jira's side alone, without the client's rate limit; keep stub metadata off disk
+    jira_create_tool.jira_scheduler = FairScheduler(0)
+    jira_create_tool.createmeta_cache = jira_create_tool.MetadataCache(path="")
+
+    count = 400
+    stories = [{"summary": f"As a user, I want to manage record {i}", "description": "..."} for i in range(count)]
+
+    def fresh_connection(story):
+        # What every create cost before the pool: a new TCP connection per request
+        data = json.dumps({"fields": jira_create_tool.issue_fields(story)}).encode("utf-8")
+        request = urllib.request.Request(jira_create_tool.JIRA_URL + "/rest/api/2/issue", data=data,
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)["key"]
+
+    async def pooled_async():
+        semaphore = asyncio.Semaphore(jira_create_tool.MAX_CONNECTIONS)
+        return await asyncio.gather(*(jira_create_tool.acreate_jira_story(s, semaphore) for s in stories))
+
+    runs = [
+        ("fresh", lambda: [fresh_connection(s) for s in stories]),
+        ("pooled", lambda: [jira_create_tool.create_jira_story(s) for s in stories]),
+        ("async", lambda: asyncio.run(pooled_async())),
+        ("bulk x1", lambda: jira_create_tool.create_jira_stories(stories, in_flight=1)),
+        (f"bulk x{jira_create_tool.IN_FLIGHT}", lambda: jira_create_tool.create_jira_stories(stories)),
+    ]
+    print(f"{'latency ms':>10} " + " ".join(f"{name + '/s':>10}" for name, _ in runs))
+    for latency_ms in (0, 5):
+        server, url = start_stub_server(latency=latency_ms / 1000)
+        jira_create_tool.JIRA_URL = url
+        try:
+            rates = []
+            for _, run in runs:
+                start = time.perf_counter()
+                keys = run()
+                rates.append(count / (time.perf_counter() - start))
+                assert len(keys) == count
+            print(f"{latency_ms:>10} " + " ".join(f"{rate:>10.0f}" for rate in rates))
+        finally:
+            jira_create_tool.connection_pool(url).close()
+            server.shutdown()
+
+
+def bench_jira_rate(args) -> None:
+    """Three workflows creating issues against a stub Jira that allows 50 requests/s."""
+    from concurrent.futures import ThreadPoolExecutor
+    import contextvars
+    import threading
+    from src.jira_stub_server import start_stub_server
+    from src.rate_limiter import FairScheduler
+    from src.tools import jira_create_tool
+    from src.tracing import trace_run
+
+    jira_create_tool.createmeta_cache = jira_create_tool.MetadataCache(path="")
+    workloads = {"big": 120, "small-1": 20, "small-2": 20}
+    print(f"{'client rate':>11} {'seconds':>8} {'429s':>5} " + " ".join(f"{name + ' done':>13}" for name in workloads))
+    for rate in (0, 45):
+        server, url = start_stub_server(rate_limit=50)
+        jira_create_tool.JIRA_URL = url
+        jira_create_tool.jira_scheduler = FairScheduler(rate, burst=10)
+        finished = {}
+
+        def workflow(name, count):
+            # Each workflow run queues its requests under its own run id, 8 at a time
+            with trace_run(name), ThreadPoolExecutor(max_workers=8) as executor:
+                stories = [{"summary": f"{name} story {i}", "description": "..."} for i in range(count)]
+                list(executor.map(lambda story: contextvars.copy_context().run(
+                    jira_create_tool.create_jira_story, story), stories))
+            finished[name] = time.perf_counter() - start
+
+        try:
+            start = time.perf_counter()
+            threads = [threading.Thread(target=workflow, args=item) for item in workloads.items()]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            assert len(server.jira.issues) == sum(workloads.values())
+            label = f"{rate:.0f}/s" if rate else "none"
+            print(f"{label:>11} {elapsed:>8.2f} {server.jira.throttled:>5} "
+                  + " ".join(f"{finished[name]:>12.2f}s" for name in workloads))
+        finally:
+            jira_create_tool.connection_pool(url).close()
+            server.shutdown()
+
+
+def bench_jira_meta(args) -> None:
+    """Requests per issue and issues/sec: create metadata resolved per create vs cached."""
+    from src.jira_stub_server import start_stub_server
+    from src.rate_limiter import FairScheduler
+    from src.tools import jira_create_tool
+
+    jira_create_tool.jira_scheduler = FairScheduler(0)
+    count = 300
+    stories = [{"summary": f"As a user, I want to manage record {i}", "description": "...",
+                "priority": "High", "story_points": 5} for i in range(count)]
+    print(f"{'metadata':>10} {'issues/s':>9} {'requests/issue':>15}")
+    # A TTL of 0 fetches the metadata again for every create
+    for label, ttl in (("per create", 0), ("cached", 3600)):
+        server, url = start_stub_server(latency=0.002)
+        jira_create_tool.JIRA_URL = url
+        jira_create_tool.createmeta_cache = jira_create_tool.MetadataCache(ttl=ttl, path="")
+        try:
+            start = time.perf_counter()
+            for story in stories:
+                jira_create_tool.create_jira_story(story)
+            rate = count / (time.perf_counter() - start)
+            assert all(fields.get("customfield_10016") == 5 for fields in server.jira.issues.values())
+            print(f"{label:>10} {rate:>9.0f} {server.jira.requests / count:>15.2f}")
+        finally:
+            jira_create_tool.connection_pool(url).close()
+            server.shutdown()
+
+
+BENCHMARKS = {
+    "routing": bench_routing,
+    "dispatch": bench_dispatch,
+    "stories": bench_stories,
+    "classifier": bench_classifier,
+    "dedupe": bench_dedupe,
+    "story_model": bench_story_model,
+    "story_index": bench_story_index,
+    "logging": bench_logging,
+    "estimator": bench_estimator,
+    "jira_bulk": bench_jira_bulk,
+    "jira_pool": bench_jira_pool,
+    "jira_rate": bench_jira_rate,
+    "jira_meta": bench_jira_meta,
+}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--number", type=int, default=2000, help="calls per timing batch")
+    parser.add_argument("--input", help="requirements file for end-to-end benchmarks")
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Local checkpoint store for paused group-chat workflows."""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Session keys that point at workflow artifacts and travel with a checkpoint
+ARTIFACT_KEYS = ("stories_file", "code_file", "jira_issues", "stories_approved", "code_approved", "context_stats", "code_files",
+                 "story_changes", "duplicate_stories", "jira_failures")
+
+
+class CheckpointStore:
+    def __init__(self, root: str = None):
+        if root is None:
+            project_root = str(Path(__file__).parent.parent)
+            root = os.path.join(project_root, "checkpoints")
+        self.root = root
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.root, f"{run_id}.json")
+
+    def save(self, run_id: str, file_path: str, messages: list, state: dict, direct: bool = False) -> str:
+        """Atomically write the run's messages, last speaker, status and artifact refs."""
+        checkpoint = {
+            "run_id": run_id,
+            "file_path": file_path,
+            "messages": messages,
+            "last_speaker": messages[-1].get("name") if messages else None,
+            "workflow_status": state.get("workflow_status"),
+            "direct": direct,
+            "artifacts": {key: state.get(key) for key in ARTIFACT_KEYS if state.get(key) is not None},
+            "saved_at": time.time(),
+        }
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(run_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, default=str)
+        os.replace(tmp_path, path)
+        logger.info("Checkpointed run %s at status %s", run_id, checkpoint["workflow_status"])
+        return path
+
+    def load(self, run_id: str) -> dict:
+        path = self._path(run_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def delete(self, run_id: str) -> None:
+        try:
+            os.remove(self._path(run_id))
+        except FileNotFoundError:
+            pass
+
+
+checkpoint_store = CheckpointStore()
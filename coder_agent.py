@@ -1,43 +1,19 @@
 import logging
-import json
 import os
 from pathlib import Path
 from autogen import AssistantAgent
 from src.config.settings import LLM_CONFIG
-from src.tools.file_read_tool import read_file
+from src.stories import read_story
 from src.tools.file_write_tool import write_file
+from src.workflow import emit_signal, CODE_GENERATED
+from src.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
-def process_story_to_code(state: dict) -> str:
-    """Generate code based on stories and update state dict."""
-    try:
-        # Define directories
-        project_root = str(Path(__file__).parent.parent.parent)
-        stories_dir = os.path.join(project_root, "stories")
-        programs_dir = os.path.join(project_root, "programs")
-        os.makedirs(programs_dir, exist_ok=True)
-
-        stories_file = state.get("stories_file")
-        if not stories_file:
-            raise ValueError("No stories file found in state. Ensure BA agent has generated stories.")
-
-        # Load story content
-        stories_path = os.path.join(stories_dir, stories_file)
-        logger.info(f"Reading stories from: {stories_path}")
-        stories_content = read_file(stories_path)
-        stories = json.loads(stories_content)
-
-        if not stories:
-            raise ValueError("No stories found in file")
-
-        # Use the first story
-        first_story = stories[0]
-        logger.info(f"Processing story: {first_story['summary']}")
-
-        # Generate appropriate code
-        if "user creation" in first_story['summary'].lower():
-            code = '''def create_user(email: str, password: str, name: str) -> dict:
+def generate_code_for_story(story: dict, programs_dir: str, prefix: str = "") -> str:
+    """Generate and save code for one story; returns the code file path."""
+    if "user creation" in story['summary'].lower():
+        code = '''def create_user(email: str, password: str, name: str) -> dict:
     """Create a new user."""
     return {
         "email": email,
@@ -49,9 +25,9 @@ if __name__ == "__main__":
     user = create_user("test@example.com", "password123", "Test User")
     print(f"Created user: {user}")
 '''
-            code_file = os.path.join(programs_dir, "user_creation.py")
-        else:
-            code = '''def factorial(n: int) -> int:
+        code_file = os.path.join(programs_dir, f"{prefix}user_creation.py")
+    else:
+        code = '''def factorial(n: int) -> int:
     """Calculate factorial of n."""
     if n < 0:
         raise ValueError("Factorial not defined for negative numbers")
@@ -60,34 +36,71 @@ if __name__ == "__main__":
 if __name__ == "__main__":
     print(f"Factorial of 5: {factorial(5)}")
 '''
-            code_file = os.path.join(programs_dir, "factorial.py")
+        code_file = os.path.join(programs_dir, f"{prefix}factorial.py")
 
-        # Save file and update state
+    with span("file.write", path=code_file):
         write_file(code_file, code)
+    return code_file
+
+
+@traced("tool.process_story_to_code")
+def process_story_to_code(state: dict) -> str:
+    """Generate code based on stories and update state dict."""
+    try:
+        # Define directories
+        project_root = str(Path(__file__).parent.parent.parent)
+        stories_dir = os.path.join(project_root, "stories")
+        programs_dir = os.path.join(project_root, "programs")
+        os.makedirs(programs_dir, exist_ok=True)
+
+        stories_file = state.get("stories_file")
+        if not stories_file:
+            raise ValueError("No stories file found in state. Ensure BA agent has generated stories.")
+
+        # Load story content
+        stories_path = os.path.join(stories_dir, stories_file)
+        logger.info("Reading stories from: %s", stories_path)
+        # Use the first story; the rest of the file is never parsed
+        try:
+            first_story = read_story(stories_path, 0)
+        except IndexError:
+            raise ValueError("No stories found in file")
+
+        logger.info("Processing story: %s", first_story["summary"])
+
+        code_file = generate_code_for_story(first_story, programs_dir)
         state["code_file"] = code_file
         state["workflow_status"] = "code_generated"
+        emit_signal(CODE_GENERATED, code_file=code_file)
 
-        logger.info(f"Code file saved: {code_file}")
+        logger.info("Code file saved: %s", code_file)
         return code_file
 
     except Exception as e:
-        logger.error(f"Coder Agent error: {e}")
+        logger.error("Coder Agent error: %s", e)
         raise
 
 # Create the Coder Agent
-coder_agent = AssistantAgent(
-    name="Coder_Agent",
-    system_message="""You are a Coder Agent responsible for generating Python code.
+CODER_SYSTEM_MESSAGE = """You are a Coder Agent responsible for generating Python code.
 Your tasks are:
 1. Use the stories file from the /stories folder
 2. Generate appropriate Python code based on the stories
 3. Include proper docstrings and type hints
-4. Save the code in /programs and return the file path""",
-    llm_config=LLM_CONFIG,
-)
-
-# Register callable
-@coder_agent.register_for_execution()
-@coder_agent.register_for_llm(name="process_story_to_code", description="Generate code from story file and return path")
-def process_story_to_code_wrapper(state: dict) -> str:
-    return process_story_to_code(state)
+4. Save the code in /programs and return the file path"""
+
+
+def build_coder_agent() -> AssistantAgent:
+    """Create a Coder_Agent with its tools registered."""
+    agent = AssistantAgent(
+        name="Coder_Agent",
+        system_message=CODER_SYSTEM_MESSAGE,
+        llm_config=LLM_CONFIG,
+    )
+
+    # Register callable
+    @agent.register_for_execution()
+    @agent.register_for_llm(name="process_story_to_code", description="Generate code from story file and return path")
+    def process_story_to_code_wrapper(state: dict) -> str:
+        return process_story_to_code(state)
+
+    return agent
@@ -0,0 +1,118 @@
+"""Context policy for group-chat agents: sliding windows and tool-result compaction.
+
+Every speaker turn otherwise sends the whole conversation to the LLM. The policy
+is attached to each agent as an autogen message transform, so it only shapes
+what is sent; the stored chat history (and checkpoints) stay complete.
+"""
+import logging
+import os
+import re
+
+from autogen.agentchat.contrib.capabilities.transform_messages import TransformMessages
+from autogen.token_count_utils import count_token
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = int(os.getenv("SDLC_CONTEXT_WINDOW", "6"))
+KEEP_TOOL_RESULTS = int(os.getenv("SDLC_KEEP_TOOL_RESULTS", "1"))
+TOOL_SUMMARY_CHARS = int(os.getenv("SDLC_TOOL_SUMMARY_CHARS", "160"))
+
+# Messages each agent sees per turn; agents not listed use DEFAULT_WINDOW
+AGENT_WINDOWS = {
+    "BA_Agent": 4,
+    "User_Agent": 4,
+}
+
+_ARTIFACT_PATH = re.compile(r"[\w.-]*[/\\][\w./\\-]+\.\w+")
+
+
+class ContextStats:
+    """Token totals before and after the policy, shared by one agent team."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def to_dict(self) -> dict:
+        return {"llm_calls": self.calls, "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after, "tokens_saved": self.tokens_saved}
+
+
+def compact_tool_result(content: str, summary_chars: int = TOOL_SUMMARY_CHARS) -> str:
+    """Replace a tool result with the artifact it produced, or a short prefix of it."""
+    if not isinstance(content, str) or len(content) <= summary_chars:
+        return content
+    paths = _ARTIFACT_PATH.findall(content)
+    if paths:
+        return f"[tool result compacted, see artifact {paths[-1]}]"
+    return f"{content[:summary_chars]}... [tool result compacted, {len(content) - summary_chars} chars omitted]"
+
+
+class ContextPolicy:
+    """autogen MessageTransform applying a sliding window and compacting old tool results.
+
+    The first message (the task handed to the group chat) is always kept.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, keep_tool_results: int = KEEP_TOOL_RESULTS,
+                 summary_chars: int = TOOL_SUMMARY_CHARS, stats: ContextStats = None):
+        self.window = window
+        self.keep_tool_results = keep_tool_results
+        self.summary_chars = summary_chars
+        self.stats = stats if stats is not None else ContextStats()
+
+    def apply_transform(self, messages: list) -> list:
+        before = count_token(messages)
+
+        kept = list(messages)
+        if self.window and len(messages) > self.window:
+            # Keep the task message, then the most recent turns. The tail must not
+            # open on tool output whose tool call was cut off.
+            tail = messages[len(messages) - self.window + 1:]
+            while tail and tail[0].get("role") == "tool":
+                tail = tail[1:]
+            kept = messages[:1] + tail
+
+        tool_seen = 0
+        compacted = []
+        for message in reversed(kept):
+            if message.get("role") == "tool":
+                tool_seen += 1
+                if tool_seen > self.keep_tool_results:
+                    message = dict(message, content=compact_tool_result(message.get("content"), self.summary_chars))
+                    if "tool_responses" in message:
+                        message["tool_responses"] = [
+                            dict(r, content=compact_tool_result(r.get("content"), self.summary_chars))
+                            for r in message["tool_responses"]
+                        ]
+            compacted.append(message)
+        compacted.reverse()
+
+        after = count_token(compacted)
+        self.stats.calls += 1
+        self.stats.tokens_before += before
+        self.stats.tokens_after += after
+        return compacted
+
+    def get_logs(self, pre_transform_messages: list, post_transform_messages: list):
+        dropped = len(pre_transform_messages) - len(post_transform_messages)
+        if dropped > 0:
+            return f"Context policy dropped {dropped} messages outside the window.", True
+        return "Context policy left messages unchanged.", pre_transform_messages != post_transform_messages
+
+
+def apply_context_policy(agents, stats: ContextStats = None) -> ContextStats:
+    """Attach a ContextPolicy to each agent; all of them report into one ContextStats."""
+    stats = stats if stats is not None else ContextStats()
+    for agent in agents:
+        policy = ContextPolicy(window=AGENT_WINDOWS.get(agent.name, DEFAULT_WINDOW), stats=stats)
+        TransformMessages(transforms=[policy], verbose=False).add_to_agent(agent)
+    return stats
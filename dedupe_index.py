@@ -0,0 +1,205 @@
+"""Near-duplicate detection for stories before they become Jira issues.
+
+Each story's requirement text is reduced to character shingles and a MinHash
+signature. Signatures are split into LSH bands stored in SQLite, so a lookup
+touches only the stories that share a band bucket: a handful of indexed
+queries, regardless of how many stories the index holds. Candidates are then
+confirmed against a Jaccard similarity threshold estimated from the
+signatures.
+"""
+from array import array
+from collections import namedtuple
+from pathlib import Path
+import hashlib
+import logging
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+project_root = str(Path(__file__).parent.parent)
+INDEX_PATH = os.getenv("SDLC_DEDUPE_INDEX_PATH", os.path.join(project_root, "cache", "dedupe.sqlite3"))
+# off: create every story; flag: create and report near-duplicates; merge: reuse the duplicate's issue
+DEDUPE_MODE = os.getenv("SDLC_DEDUPE_MODE", "flag")
+THRESHOLD = float(os.getenv("SDLC_DEDUPE_THRESHOLD", "0.7"))
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 4
+
+# One random 32-bit salt per signature slot, XORed into the shingle hashes; much
+# cheaper in Python than modular permutations. Fixed seed: signatures must be
+# comparable across processes and runs.
+_rng = random.Random(1)
+_SALTS = [_rng.getrandbits(32) for _ in range(NUM_PERM)]
+
+_STORY_PREFIX = re.compile(r"^as an? [\w ]+?, i want to ")
+_NON_WORD = re.compile(r"[^\w]+")
+
+# A stored story that looks like the one being checked
+Duplicate = namedtuple("Duplicate", ["story_id", "summary", "issue_key", "similarity"])
+
+
+def story_text(story: dict) -> str:
+    """Normalized requirement text of a story, without the user-story boilerplate."""
+    text = story.get("summary", "").lower()
+    text = _STORY_PREFIX.sub("", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def _hash(data: bytes, size: int = 4) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=size).digest(), "big")
+
+
+def minhash(text: str) -> list:
+    """MinHash signature of the text's character shingles."""
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = [_hash(s.encode("utf-8")) for s in shingles]
+    return [min(h ^ salt for h in hashes) for salt in _SALTS]
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Jaccard similarity estimated from two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def _band_buckets(signature) -> list:
+    rows = NUM_PERM // BANDS
+    buckets = []
+    for band in range(BANDS):
+        chunk = struct.pack(f"<{rows}I", *signature[band * rows:(band + 1) * rows])
+        # SQLite integers are signed 64-bit
+        buckets.append(_hash(chunk, 8) - (1 << 63))
+    return buckets
+
+
+class DedupeIndex:
+    """SQLite-backed MinHash LSH index over every story that reached Jira."""
+
+    def __init__(self, path: str = INDEX_PATH, threshold: float = THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # Stories reserved by this process whose issue is still being created
+        self._pending = set()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            "story_id INTEGER PRIMARY KEY, summary TEXT NOT NULL, issue_key TEXT, signature BLOB NOT NULL, "
+            "created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, bucket INTEGER NOT NULL, story_id INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS bands_lookup ON bands(band, bucket);"
+        )
+        self._conn.commit()
+
+    def _candidates(self, buckets) -> set:
+        ids = set()
+        for band, bucket in enumerate(buckets):
+            ids.update(row[0] for row in self._conn.execute(
+                "SELECT story_id FROM bands WHERE band = ? AND bucket = ?", (band, bucket)))
+        return ids
+
+    def find(self, story: dict) -> Duplicate:
+        """Most similar indexed story at or above the threshold, or None."""
+        signature = minhash(story_text(story))
+        with self._lock:
+            return self._find(signature, _band_buckets(signature))
+
+    def _find(self, signature, buckets) -> Duplicate:
+        best = None
+        for story_id in self._candidates(buckets):
+            row = self._conn.execute(
+                "SELECT summary, issue_key, signature FROM signatures WHERE story_id = ?", (story_id,)).fetchone()
+            # Reservations whose create failed or never finished (e.g. a crash) are not real stories
+            if row is None or (row[1] is None and story_id not in self._pending):
+                continue
+            score = similarity(signature, array("I", row[2]))
+            if score >= self.threshold and (best is None or score > best.similarity):
+                best = Duplicate(story_id, row[0], row[1], score)
+        return best
+
+    def add(self, story: dict, issue_key: str = None) -> int:
+        signature = minhash(story_text(story))
+        with self._lock:
+            return self._add(story, issue_key, signature, _band_buckets(signature))
+
+    def _add(self, story: dict, issue_key: str, signature, buckets) -> int:
+        cursor = self._conn.execute(
+            "INSERT INTO signatures (summary, issue_key, signature, created_at) VALUES (?, ?, ?, ?)",
+            (story.get("summary", ""), issue_key, array("I", signature).tobytes(), time.time()))
+        story_id = cursor.lastrowid
+        self._conn.executemany("INSERT INTO bands (band, bucket, story_id) VALUES (?, ?, ?)",
+                               [(band, bucket, story_id) for band, bucket in enumerate(buckets)])
+        self._conn.commit()
+        return story_id
+
+    def reserve(self, story: dict):
+        """Look up near-duplicates of `story` and index it before its issue exists.
+
+        Returns (duplicate, story_id); record the key later with set_issue_key,
+        or drop the reservation with release if the create fails.
+        """
+        signature = minhash(story_text(story))
+        buckets = _band_buckets(signature)
+        with self._lock:
+            duplicate = self._find(signature, buckets)
+            story_id = self._add(story, None, signature, buckets)
+            self._pending.add(story_id)
+            return duplicate, story_id
+
+    def set_issue_key(self, story_id: int, issue_key: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE signatures SET issue_key = ? WHERE story_id = ?", (issue_key, story_id))
+            self._conn.commit()
+            self._pending.discard(story_id)
+
+    def release(self, story_id: int) -> None:
+        """Remove a reservation whose issue was not created."""
+        with self._lock:
+            self._conn.execute("DELETE FROM bands WHERE story_id = ?", (story_id,))
+            self._conn.execute("DELETE FROM signatures WHERE story_id = ?", (story_id,))
+            self._conn.commit()
+            self._pending.discard(story_id)
+
+    def check_and_add(self, story: dict, create, merge: bool = False):
+        """Create `story` via `create(story) -> issue key` unless merged into a near-duplicate.
+
+        Returns (issue_key, duplicate). The story is reserved before `create`
+        runs, so concurrent near-duplicates see each other, and stays indexed
+        so later stories are checked against it too.
+        """
+        duplicate, story_id = self.reserve(story)
+        try:
+            if duplicate is not None and merge and duplicate.issue_key:
+                issue_key = duplicate.issue_key
+            else:
+                issue_key = create(story)
+        except BaseException:
+            self.release(story_id)
+            raise
+        if issue_key is None:
+            self.release(story_id)
+        else:
+            self.set_issue_key(story_id, issue_key)
+        return issue_key, duplicate
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+dedupe_index = DedupeIndex() if DEDUPE_MODE in ("flag", "merge") else None
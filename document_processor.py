@@ -0,0 +1,62 @@
+"""Text extraction for uploaded requirement documents (.txt, .pdf, .docx)."""
+import io
+import logging
+import re
+
+from src.section_index import write_section_index
+from src.tracing import span
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ("txt", "pdf", "docx")
+
+_HEADING_STYLE = re.compile(r"^Heading (\d)$")
+
+
+def _docx_heading_level(paragraph):
+    name = paragraph.style.name if paragraph.style is not None else ""
+    if name == "Title":
+        return 1
+    match = _HEADING_STYLE.match(name)
+    return int(match.group(1)) if match else None
+
+
+def extract_document(file_content: bytes, filename: str):
+    """(text, heading_levels); heading_levels maps line numbers to levels when
+    the format records them (.docx heading styles), else it is None."""
+    ext = filename.split('.')[-1].lower()
+    with span("file.parse", ext=ext):
+        if ext == "txt":
+            return file_content.decode('utf-8', errors='ignore'), None
+        elif ext == "pdf":
+            import PyPDF2
+            reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+            return "\n".join([p.extract_text() for p in reader.pages if p.extract_text()]), None
+        elif ext == "docx":
+            import docx
+            doc = docx.Document(io.BytesIO(file_content))
+            texts, heading_levels, line = [], {}, 0
+            for para in doc.paragraphs:
+                level = _docx_heading_level(para)
+                if level is not None and para.text.strip():
+                    heading_levels[line] = level
+                texts.append(para.text)
+                line += para.text.count("\n") + 1
+            # Without heading styles, headings are detected from the text instead
+            return "\n".join(texts), heading_levels or None
+        else:
+            raise ValueError(f"Unsupported file type: {ext}")
+
+
+def extract_text_from_file(file_content: bytes, filename: str) -> str:
+    return extract_document(file_content, filename)[0]
+
+
+def save_extracted_text(file_content: bytes, filename: str, text_path: str) -> str:
+    """Extract an upload to `text_path`, with its section index next to it; returns the text."""
+    text, heading_levels = extract_document(file_content, filename)
+    with open(text_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    sections = write_section_index(text_path, text, heading_levels)
+    logger.info("Indexed %d sections of %s", len(sections), filename)
+    return text
@@ -0,0 +1,274 @@
+"""Local priority and story-point estimates for generated stories.
+
+Requirement text is reduced to hashed word and word-pair features, and one
+softmax linear model per field predicts priority and story points. A
+prediction sums a few dozen weights per class, so thousands of stories are
+estimated in milliseconds without an LLM call. When a model's confidence is
+below ``SDLC_ESTIMATE_CONFIDENCE`` the story is sent to the LLM instead (if
+``SDLC_ESTIMATE_LLM=1``), or keeps the template defaults.
+
+Train from stories files or a JSONL export of created Jira issues (one object
+per line with summary or requirement, priority and story_points)::
+
+    python -m src.estimator train history.jsonl stories/stories_*.jsonl
+
+Records that still carry the template defaults (Medium, 3 points) are skipped:
+nobody estimated them, and a model trained on them is confidently Medium/3
+about every story, so the LLM fallback would never be asked.
+"""
+from collections import Counter, namedtuple
+from pathlib import Path
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import zlib
+
+from src.stories import DEFAULT_PRIORITY, DEFAULT_STORY_POINTS, Story, iter_stories
+
+logger = logging.getLogger(__name__)
+
+project_root = str(Path(__file__).parent.parent)
+MODEL_PATH = os.getenv("SDLC_ESTIMATOR_PATH", os.path.join(project_root, "cache", "estimator.json"))
+CONFIDENCE = float(os.getenv("SDLC_ESTIMATE_CONFIDENCE", "0.6"))
+LLM_FALLBACK = os.getenv("SDLC_ESTIMATE_LLM", "0") == "1"
+
+FEATURE_BITS = 14
+PRIORITIES = ("High", "Medium", "Low")
+STORY_POINTS = (1, 2, 3, 5, 8, 13)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STORY_PREFIX = re.compile(r"^as an? [\w ]+?, i want to ")
+
+# Hashed bucket of every token (repeats included), and the factor that L2-normalizes their counts
+Features = namedtuple("Features", ["indices", "scale"])
+# priority/story_points are None where the model was not confident enough
+Estimate = namedtuple("Estimate", ["priority", "story_points", "priority_confidence", "points_confidence"])
+
+
+def features(text: str, bits: int = FEATURE_BITS) -> Features:
+    """Hashed unigram and bigram features of `text`."""
+    words = _WORD.findall(_STORY_PREFIX.sub("", text.lower()))
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    mask = (1 << bits) - 1
+    # crc32 rather than hash(): str hashes change between processes
+    indices = [zlib.crc32(token.encode("utf-8")) & mask for token in tokens]
+    norm = math.sqrt(sum(c * c for c in Counter(indices).values()))
+    return Features(indices, 1.0 / norm if norm else 0.0)
+
+
+class SoftmaxModel:
+    """Multinomial logistic regression over sparse features, trained with SGD."""
+
+    def __init__(self, classes, bits: int = FEATURE_BITS):
+        self.classes = list(classes)
+        self.bits = bits
+        self.weights = [[0.0] * (1 << bits) for _ in self.classes]
+        self.bias = [0.0] * len(self.classes)
+
+    def predict_proba(self, feats: Features) -> list:
+        # A repeated index is summed once per occurrence, i.e. weighted by its count
+        indices, scale = feats
+        scores = [b + sum(map(w.__getitem__, indices)) * scale for w, b in zip(self.weights, self.bias)]
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict(self, feats: Features):
+        """(class, probability) of the most likely class."""
+        probs = self.predict_proba(feats)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.classes[best], probs[best]
+
+    def fit(self, examples: list, epochs: int = 15, rate: float = 0.5, l2: float = 1e-5, seed: int = 0) -> None:
+        """Train on (features, class) pairs; classes not in self.classes are skipped."""
+        targets = {c: n for n, c in enumerate(self.classes)}
+        data = [(feats, targets[label]) for feats, label in examples if label in targets]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            step = rate / (1 + epoch)
+            for feats, target in data:
+                probs = self.predict_proba(feats)
+                for k, (w, p) in enumerate(zip(self.weights, probs)):
+                    grad = (1.0 if k == target else 0.0) - p
+                    self.bias[k] += step * grad
+                    delta = step * grad * feats.scale
+                    for i in feats.indices:
+                        w[i] += delta - step * l2 * w[i]
+
+    def to_dict(self) -> dict:
+        # Only non-zero weights are saved; most hashed buckets never see a token
+        return {"classes": self.classes, "bits": self.bits, "bias": self.bias,
+                "weights": [{str(i): x for i, x in enumerate(w) if x} for w in self.weights]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SoftmaxModel":
+        model = cls(data["classes"], data["bits"])
+        model.bias = list(data["bias"])
+        for w, saved in zip(model.weights, data["weights"]):
+            for i, x in saved.items():
+                w[int(i)] = x
+        return model
+
+
+class StoryEstimator:
+    """Predicts priority and story points from a story's requirement text."""
+
+    def __init__(self, priority_model: SoftmaxModel = None, points_model: SoftmaxModel = None,
+                 confidence: float = CONFIDENCE):
+        self.priority_model = priority_model or SoftmaxModel(PRIORITIES)
+        self.points_model = points_model or SoftmaxModel(STORY_POINTS)
+        self.confidence = confidence
+
+    def fit(self, stories) -> int:
+        """Train on stories (or story records) with known priority and points; returns the example count.
+
+        Stories with the template's default priority and points are skipped.
+        """
+        priorities, points, skipped = [], [], 0
+        for story in stories:
+            if isinstance(story, dict):
+                story = Story.from_record(story)
+            if story.priority == DEFAULT_PRIORITY and _nearest_points(story.story_points) == DEFAULT_STORY_POINTS:
+                skipped += 1
+                continue
+            feats = features(story.requirement)
+            priorities.append((feats, story.priority))
+            points.append((feats, _nearest_points(story.story_points)))
+        if skipped:
+            logger.info("Skipped %d stories with the template's default priority and points", skipped)
+        self.priority_model.fit(priorities)
+        self.points_model.fit(points)
+        return len(priorities)
+
+    def estimate(self, text: str) -> Estimate:
+        feats = features(text)
+        priority, priority_conf = self.priority_model.predict(feats)
+        points, points_conf = self.points_model.predict(feats)
+        return Estimate(priority if priority_conf >= self.confidence else None,
+                        points if points_conf >= self.confidence else None,
+                        priority_conf, points_conf)
+
+    def apply(self, story: Story, fallback=None) -> str:
+        """Fill the story's priority and points; returns "model", "llm" or "default".
+
+        `fallback(story) -> (priority, story_points)` is asked when the model is
+        not confident about either field.
+        """
+        estimate = self.estimate(story.requirement)
+        if estimate.priority is not None and estimate.story_points is not None:
+            story.priority, story.story_points = estimate.priority, estimate.story_points
+            return "model"
+        if fallback is not None:
+            try:
+                story.priority, story.story_points = fallback(story)
+                return "llm"
+            except Exception as e:
+                # An estimate is never worth failing story generation over
+                logger.warning("LLM estimate failed for '%s': %s", story.requirement, e)
+        # Keep whichever field the model was sure of
+        if estimate.priority is not None:
+            story.priority = estimate.priority
+        if estimate.story_points is not None:
+            story.story_points = estimate.story_points
+        return "default"
+
+    def save(self, path: str = MODEL_PATH) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"priority": self.priority_model.to_dict(), "story_points": self.points_model.to_dict()}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH, confidence: float = CONFIDENCE) -> "StoryEstimator":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(SoftmaxModel.from_dict(data["priority"]), SoftmaxModel.from_dict(data["story_points"]),
+                   confidence=confidence)
+
+
+def _nearest_points(points) -> int:
+    try:
+        value = float(points)
+    except (TypeError, ValueError):
+        return 3
+    return min(STORY_POINTS, key=lambda p: abs(p - value))
+
+
+ESTIMATE_PROMPT = """You are a Business Analyst. Estimate the user story below.
+Reply with only a JSON object: {"priority": "High|Medium|Low", "story_points": 1|2|3|5|8|13}"""
+
+
+class LLMEstimator:
+    """One cached LLM completion per story, for stories the model is unsure about."""
+
+    def __init__(self, llm_config: dict = None):
+        from autogen import OpenAIWrapper
+        from src.config.settings import LLM_CONFIG
+        self.client = OpenAIWrapper(**(llm_config or LLM_CONFIG))
+
+    def __call__(self, story: Story):
+        from src.llm_cache import llm_cache
+        messages = [{"role": "system", "content": ESTIMATE_PROMPT}, {"role": "user", "content": story.summary}]
+        cache = llm_cache.view("BA_Estimator") if llm_cache is not None else None
+        response = self.client.create(messages=messages, cache=cache)
+        reply = self.client.extract_text_or_completion_object(response)[0]
+        start, end = reply.find("{"), reply.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("reply contains no JSON object")
+        data = json.loads(reply[start:end + 1])
+        priority = str(data["priority"]).capitalize()
+        if priority not in PRIORITIES:
+            raise ValueError(f"unknown priority {priority!r}")
+        return priority, _nearest_points(data["story_points"])
+
+
+def load_estimator(path: str = MODEL_PATH):
+    """The trained estimator at `path`, or None if none has been trained."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return StoryEstimator.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable estimator model %s: %s", path, e)
+        return None
+
+
+estimator = load_estimator()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Train or try the story point and priority estimator")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="train from stories files or a JSONL export of Jira issues")
+    train.add_argument("paths", nargs="+")
+    train.add_argument("--output", default=MODEL_PATH)
+    predict = sub.add_parser("predict", help="estimate requirement texts")
+    predict.add_argument("texts", nargs="+")
+    predict.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        model = StoryEstimator()
+        count = model.fit(story for path in args.paths for story in iter_stories(path))
+        if not count:
+            print("No estimated stories to train on: every story has the template defaults")
+            return
+        model.save(args.output)
+        print(f"Trained on {count} stories -> {args.output}")
+    else:
+        model = StoryEstimator.load(args.model)
+        for text in args.texts:
+            e = model.estimate(text)
+            print(f"{text}: priority={e.priority} ({e.priority_confidence:.2f}), "
+                  f"points={e.story_points} ({e.points_confidence:.2f})")
+
+
+if __name__ == "__main__":
+    main()
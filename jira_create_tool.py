@@ -0,0 +1,496 @@
+"""Create Jira issues for generated stories through the Jira REST API (v2).
+
+Connection settings come from the environment: JIRA_URL, JIRA_EMAIL and
+JIRA_API_TOKEN (basic auth), plus JIRA_PROJECT_KEY and JIRA_ISSUE_TYPE.
+
+``create_jira_story`` creates one issue per request. ``create_jira_stories``
+submits up to ``SDLC_JIRA_BULK_SIZE`` issues per request to the bulk-create
+endpoint, up to ``SDLC_JIRA_IN_FLIGHT`` requests at a time, and maps Jira's
+per-item results and errors back to the input order. ``acreate_jira_story``
+and ``acreate_jira_stories`` are the asyncio variants.
+
+Issues are created by project and issue type id, with priority and story
+points, from the project's create metadata. ``createmeta_cache`` fetches that
+once per process (and keeps it on disk for ``SDLC_JIRA_META_TTL`` seconds), so
+each create is a single request; it is refreshed when Jira rejects a create
+because the project's fields changed.
+
+All requests share a pool of keep-alive connections per Jira site, so only the
+first requests pay for TCP and TLS setup, and one process-wide scheduler
+(``jira_scheduler``) that keeps them under ``SDLC_JIRA_RATE`` requests per
+second, shares that rate fairly between workflow runs and retries requests
+Jira throttles (429/503) after its Retry-After.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import asyncio
+import base64
+import contextvars
+import http.client
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+import urllib.parse
+
+from src.rate_limiter import FairScheduler, backoff_delay, parse_retry_after
+from src.tracing import current_trace, span
+
+logger = logging.getLogger(__name__)
+
+project_root = str(Path(__file__).parent.parent.parent)
+JIRA_URL = os.getenv("JIRA_URL", "").rstrip("/")
+JIRA_EMAIL = os.getenv("JIRA_EMAIL", "")
+JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN", "")
+JIRA_PROJECT_KEY = os.getenv("JIRA_PROJECT_KEY", "SDLC")
+JIRA_ISSUE_TYPE = os.getenv("JIRA_ISSUE_TYPE", "Story")
+JIRA_TIMEOUT = float(os.getenv("JIRA_TIMEOUT", "30"))
+# Jira rejects bulk requests with more than 50 issues
+BULK_BATCH_SIZE = min(int(os.getenv("SDLC_JIRA_BULK_SIZE", "50")), 50)
+MAX_CONNECTIONS = int(os.getenv("SDLC_JIRA_MAX_CONNECTIONS", "8"))
+# Requests one create_jira_stories / acreate_* call keeps open at a time
+IN_FLIGHT = int(os.getenv("SDLC_JIRA_IN_FLIGHT", "4"))
+# Requests per second for the whole process (0: unlimited) and how many may go out at once
+RATE = float(os.getenv("SDLC_JIRA_RATE", "10"))
+BURST = int(os.getenv("SDLC_JIRA_BURST", "20"))
+MAX_RETRIES = int(os.getenv("SDLC_JIRA_RETRIES", "5"))
+RETRY_STATUSES = (429, 503)
+# Requests the pool may resend when a reused connection drops before the response
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+META_TTL = float(os.getenv("SDLC_JIRA_META_TTL", "3600"))
+# Empty to keep create metadata in memory only
+META_PATH = os.getenv("SDLC_JIRA_META_PATH", os.path.join(project_root, "cache", "jira_createmeta.json"))
+# Story points is a custom field; its id differs between sites but its name is one of these
+STORY_POINTS_FIELDS = ("story points", "story point estimate")
+
+# Outcome of one story in a bulk create; exactly one of issue_key/error is set
+BulkResult = namedtuple("BulkResult", ["index", "issue_key", "error"])
+# Ids for creating issues of JIRA_ISSUE_TYPE in JIRA_PROJECT_KEY; priorities maps
+# lower-case names to ids, story_points_field is None if the screen has no such field
+CreateMeta = namedtuple("CreateMeta", ["project_id", "issue_type_id", "priorities", "story_points_field"])
+
+
+class JiraError(Exception):
+    """A Jira request failed; `status` is the HTTP status (None if no response)."""
+
+    def __init__(self, message: str, status: int = None, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections to one site, shared by all threads.
+
+    At most `max_connections` requests are open at once; callers beyond that
+    wait for a connection to come back.
+    """
+
+    def __init__(self, base_url: str, max_connections: int = MAX_CONNECTIONS, timeout: float = JIRA_TIMEOUT):
+        parts = urllib.parse.urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _checkout(self):
+        """An idle connection the server has not closed, else a new one; returns (conn, reused)."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), False
+            # An idle keep-alive socket with something to read has been closed by the server
+            if conn.sock is not None and not select.select([conn.sock], [], [], 0)[0]:
+                return conn, True
+            conn.close()
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        """Send a request; returns (status, response headers, body bytes).
+
+        A request that could not be sent on a reused connection is retried on
+        another. Once sent, only idempotent requests are retried: the server may
+        already have acted on a POST whose response was lost.
+        """
+        with self._slots:
+            while True:
+                conn, reused = self._checkout()
+                try:
+                    conn.request(method, self.prefix + path, body=body, headers=headers or {})
+                except (ConnectionResetError, BrokenPipeError):
+                    conn.close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                try:
+                    response = conn.getresponse()
+                    data = response.read()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    conn.close()
+                    if reused and method in IDEMPOTENT_METHODS:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+                return response.status, response.headers, data
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connection_pool(base_url: str = None) -> ConnectionPool:
+    """The shared pool for `base_url` (default JIRA_URL)."""
+    base_url = base_url or JIRA_URL
+    with _pools_lock:
+        pool = _pools.get(base_url)
+        if pool is None:
+            pool = _pools[base_url] = ConnectionPool(base_url)
+        return pool
+
+
+jira_scheduler = FairScheduler(RATE, BURST)
+
+
+def _headers() -> dict:
+    headers = {"Content-Type": "application/json", "Accept": "application/json"}
+    if JIRA_EMAIL or JIRA_API_TOKEN:
+        credentials = base64.b64encode(f"{JIRA_EMAIL}:{JIRA_API_TOKEN}".encode("utf-8")).decode("ascii")
+        headers["Authorization"] = f"Basic {credentials}"
+    return headers
+
+
+def _request(method: str, path: str, payload: dict = None, accept_error: bool = False):
+    """Send a request to Jira; returns (status, body). Error statuses raise unless `accept_error`."""
+    if not JIRA_URL:
+        raise JiraError("JIRA_URL is not set")
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    trace = current_trace()
+    # Requests of one workflow run queue together, so runs share the rate evenly
+    run_id = trace.run_id if trace is not None else None
+    attempt = 0
+    while True:
+        jira_scheduler.acquire(run_id)
+        try:
+            status, headers, raw = connection_pool().request(method, path, data, _headers())
+        except (OSError, http.client.HTTPException) as e:
+            raise JiraError(f"Jira request to {path} failed: {e}") from None
+        if status not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+            break
+        delay = backoff_delay(attempt, parse_retry_after(headers.get("Retry-After")))
+        logger.warning("Jira throttled %s (%d); retrying in %.1fs", path, status, delay)
+        jira_scheduler.throttle(delay)
+        attempt += 1
+    body = _json(raw)
+    if status >= 400 and not (accept_error and status == 400):
+        raise JiraError(f"Jira returned {status} for {path}: {_error_text(body)}", status, body)
+    return status, body
+
+
+def _post(path: str, payload: dict, accept_error: bool = False):
+    return _request("POST", path, payload, accept_error)
+
+
+def _json(raw: bytes):
+    try:
+        return json.loads(raw) if raw else {}
+    except ValueError:
+        return {"errorMessages": [raw.decode("utf-8", errors="replace")[:500]]}
+
+
+def _error_text(body) -> str:
+    """Readable summary of a Jira error body (errorMessages plus field errors)."""
+    if not isinstance(body, dict):
+        return str(body)
+    parts = list(body.get("errorMessages") or [])
+    parts += [f"{field}: {message}" for field, message in (body.get("errors") or {}).items()]
+    return "; ".join(parts) or "unknown error"
+
+
+def _parse_createmeta(body: dict) -> CreateMeta:
+    for project in body.get("projects") or []:
+        if project.get("key") != JIRA_PROJECT_KEY:
+            continue
+        for issue_type in project.get("issuetypes") or []:
+            if (issue_type.get("name") or "").lower() != JIRA_ISSUE_TYPE.lower():
+                continue
+            priorities, story_points_field = {}, None
+            for field_id, field in (issue_type.get("fields") or {}).items():
+                if field_id == "priority":
+                    priorities = {value["name"].lower(): value["id"]
+                                  for value in field.get("allowedValues") or [] if "name" in value}
+                elif (field.get("name") or "").lower() in STORY_POINTS_FIELDS:
+                    story_points_field = field_id
+            return CreateMeta(project["id"], issue_type["id"], priorities, story_points_field)
+    raise JiraError(f"Project {JIRA_PROJECT_KEY} has no issue type {JIRA_ISSUE_TYPE} that can be created")
+
+
+class MetadataCache:
+    """Create metadata of the configured site, project and issue type.
+
+    Kept in memory for `ttl` seconds and, if `path` is set, on disk so new
+    processes start warm. Concurrent callers wait for a single fetch.
+    """
+
+    def __init__(self, ttl: float = META_TTL, path: str = META_PATH):
+        self.ttl = ttl
+        self.path = path
+        self.fetches = 0
+        # key -> (fetched_at, CreateMeta or None)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _key(self) -> str:
+        return f"{JIRA_URL}|{JIRA_PROJECT_KEY}|{JIRA_ISSUE_TYPE}"
+
+    def get(self) -> CreateMeta:
+        """The create metadata, or None if Jira would not provide it."""
+        key = self._key()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] >= self.ttl:
+                entry = self._load(key) or self._fetch(key)
+                self._entries[key] = entry
+            return entry[1]
+
+    def invalidate(self) -> None:
+        key = self._key()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._save(key, None)
+
+    def refresh(self) -> CreateMeta:
+        self.invalidate()
+        return self.get()
+
+    def _fetch(self, key: str):
+        query = urllib.parse.urlencode({"projectKeys": JIRA_PROJECT_KEY, "issuetypeNames": JIRA_ISSUE_TYPE,
+                                        "expand": "projects.issuetypes.fields"})
+        try:
+            with span("jira.createmeta"):
+                _, body = _request("GET", f"/rest/api/2/issue/createmeta?{query}")
+            meta = _parse_createmeta(body)
+        except JiraError as e:
+            # Issues can still be created by key and name, only without priority and story points;
+            # ask again in a minute rather than on every create
+            logger.warning("Jira create metadata unavailable: %s", e)
+            return time.time() - max(self.ttl - 60, 0), None
+        self.fetches += 1
+        entry = (time.time(), meta)
+        self._save(key, entry)
+        return entry
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self, key: str):
+        if not self.path:
+            return None
+        saved = self._read().get(key)
+        try:
+            if saved and time.time() - saved["fetched_at"] < self.ttl:
+                return saved["fetched_at"], CreateMeta(**saved["meta"])
+        except (KeyError, TypeError):
+            pass
+        return None
+
+    def _save(self, key: str, entry) -> None:
+        if not self.path:
+            return
+        data = self._read()
+        if entry is None:
+            data.pop(key, None)
+        else:
+            data[key] = {"fetched_at": entry[0], "meta": entry[1]._asdict()}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save Jira create metadata to %s: %s", self.path, e)
+
+
+createmeta_cache = MetadataCache()
+
+
+def issue_fields(story: dict, meta: CreateMeta = None) -> dict:
+    """Jira create fields for a story; with create metadata, also its priority and story points."""
+    if meta is None:
+        return {
+            "project": {"key": JIRA_PROJECT_KEY},
+            "issuetype": {"name": JIRA_ISSUE_TYPE},
+            "summary": story["summary"],
+            "description": story.get("description", ""),
+        }
+    fields = {
+        "project": {"id": meta.project_id},
+        "issuetype": {"id": meta.issue_type_id},
+        "summary": story["summary"],
+        "description": story.get("description", ""),
+    }
+    priority = meta.priorities.get(str(story.get("priority") or "").lower())
+    if priority:
+        fields["priority"] = {"id": priority}
+    if meta.story_points_field and story.get("story_points") is not None:
+        try:
+            fields[meta.story_points_field] = float(story.get("story_points"))
+        except (TypeError, ValueError):
+            pass
+    return fields
+
+
+def _schema_error(body, meta: CreateMeta) -> bool:
+    """Whether Jira rejected fields that came from the (possibly stale) create metadata."""
+    errors = body.get("errors") if isinstance(body, dict) else None
+    if meta is None or not isinstance(errors, dict):
+        return False
+    return bool(set(errors) & {"project", "issuetype", "priority", meta.story_points_field})
+
+
+def create_jira_story(story: dict) -> str:
+    """Create one issue and return its key."""
+    meta = createmeta_cache.get()
+    try:
+        _, body = _post("/rest/api/2/issue", {"fields": issue_fields(story, meta)})
+    except JiraError as e:
+        if e.status != 400 or not _schema_error(e.body, meta):
+            raise
+        logger.info("Jira rejected cached create metadata; refreshing it")
+        _, body = _post("/rest/api/2/issue", {"fields": issue_fields(story, createmeta_cache.refresh())})
+    return body["key"]
+
+
+def _create_batch(stories: list, offset: int, retry: bool = True) -> list:
+    meta = createmeta_cache.get()
+    with span("jira.bulk_create", size=len(stories)):
+        status, body = _post("/rest/api/2/issue/bulk",
+                             {"issueUpdates": [{"fields": issue_fields(s, meta)} for s in stories]},
+                             accept_error=True)
+    # Jira lists created issues in request order, skipping failed elements,
+    # and reports each failure with its position in the request. A request it
+    # rejects as a whole carries field errors as a dict instead of that list.
+    errors = body.get("errors")
+    failed, stale = {}, set()
+    if isinstance(errors, list):
+        for error in errors:
+            position = error.get("failedElementNumber") if isinstance(error, dict) else None
+            if position is not None:
+                element_errors = error.get("elementErrors") or {}
+                failed[position] = _error_text(element_errors)
+                if _schema_error(element_errors, meta):
+                    stale.add(position)
+    elif _schema_error(body, meta):
+        stale.update(range(len(stories)))
+    created = iter(body.get("issues") or [])
+    results = []
+    for position in range(len(stories)):
+        if position in failed:
+            results.append(BulkResult(offset + position, None, failed[position]))
+            continue
+        issue = next(created, None)
+        if issue is None:
+            # Status 400 without per-item errors: the whole request was rejected
+            error = _error_text(body) if status >= 400 else "missing from Jira's bulk response"
+            results.append(BulkResult(offset + position, None, error))
+        else:
+            results.append(BulkResult(offset + position, issue["key"], None))
+    if stale and retry:
+        # The project's fields changed since the metadata was cached: resend,
+        # once, only the items Jira rejected for those fields
+        logger.info("Jira rejected cached create metadata; refreshing it")
+        createmeta_cache.invalidate()
+        positions = sorted(stale)
+        retried = _create_batch([stories[p] for p in positions], 0, retry=False)
+        for position, result in zip(positions, retried):
+            results[position] = result._replace(index=offset + position)
+    return results
+
+
+def _send_batch(stories: list, offset: int, on_batch) -> list:
+    results = _create_batch(stories, offset)
+    if on_batch is not None:
+        on_batch(results)
+    return results
+
+
+def _report(results: list) -> list:
+    failures = sum(1 for r in results if r.error)
+    if failures:
+        logger.warning("%d of %d issues failed in bulk create", failures, len(results))
+    return results
+
+
+def create_jira_stories(stories, batch_size: int = BULK_BATCH_SIZE, in_flight: int = IN_FLIGHT,
+                        on_batch=None) -> list:
+    """Create issues for `stories` in bulk requests; returns a BulkResult per story, in order.
+
+    Up to `in_flight` bulk requests run at once. Item failures are returned,
+    not raised; a request that fails outright (network, auth, server error)
+    raises JiraError. `on_batch(results)` is called with each request's
+    results as soon as it returns, so callers can record created issues even
+    if a later request fails.
+    """
+    stories = list(stories)
+    offsets = range(0, len(stories), batch_size)
+    if len(offsets) <= 1 or in_flight <= 1:
+        batches = [_send_batch(stories[offset:offset + batch_size], offset, on_batch) for offset in offsets]
+        return _report([result for batch in batches for result in batch])
+    with ThreadPoolExecutor(max_workers=min(in_flight, len(offsets)), thread_name_prefix="jira") as executor:
+        # Each request runs in a copy of the caller's context, so its span joins the active trace
+        futures = [executor.submit(contextvars.copy_context().run, _send_batch,
+                                   stories[offset:offset + batch_size], offset, on_batch) for offset in offsets]
+        return _report([result for future in futures for result in future.result()])
+
+
+async def acreate_jira_story(story: dict, semaphore: asyncio.Semaphore = None) -> str:
+    """Async create_jira_story; pass a shared `semaphore` to bound concurrent requests."""
+    if semaphore is None:
+        return await asyncio.to_thread(create_jira_story, story)
+    async with semaphore:
+        return await asyncio.to_thread(create_jira_story, story)
+
+
+async def acreate_jira_stories(stories, batch_size: int = BULK_BATCH_SIZE, in_flight: int = IN_FLIGHT,
+                               on_batch=None) -> list:
+    """Async create_jira_stories: bulk requests, at most `in_flight` at a time, results in order."""
+    stories = list(stories)
+    semaphore = asyncio.Semaphore(in_flight)
+
+    async def send(offset: int) -> list:
+        async with semaphore:
+            return await asyncio.to_thread(_send_batch, stories[offset:offset + batch_size], offset, on_batch)
+
+    batches = await asyncio.gather(*(send(offset) for offset in range(0, len(stories), batch_size)))
+    return _report([result for batch in batches for result in batch])
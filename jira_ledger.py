@@ -0,0 +1,108 @@
+"""Durable record of the Jira issues created for each story.
+
+Every story that gets an issue is written to the ledger under a hash of where
+it came from (its stories file) and what was sent to Jira (site, project,
+summary and description) as soon as the create returns. Before creating, the
+Jira agent looks the story up here, so a run that failed partway, an agent
+that is asked to create the same stories again, or a re-upload of an edited
+document only submits the stories that have no issue yet. The same story in
+another document gets its own issue, and is reported by the dedupe index.
+"""
+from concurrent.futures import Future
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from src.tools import jira_create_tool
+
+logger = logging.getLogger(__name__)
+
+project_root = str(Path(__file__).parent.parent)
+LEDGER_PATH = os.getenv("SDLC_JIRA_LEDGER_PATH", os.path.join(project_root, "cache", "jira_ledger.sqlite3"))
+LEDGER_ENABLED = os.getenv("SDLC_JIRA_LEDGER", "1") == "1"
+
+
+def story_hash(story: dict, source: str = "") -> str:
+    """Hash of the issue a story from `source` would create on the configured Jira site and project."""
+    content = [jira_create_tool.JIRA_URL, jira_create_tool.JIRA_PROJECT_KEY, source,
+               story.get("summary", ""), story.get("description", "")]
+    return hashlib.sha256(json.dumps(content).encode("utf-8")).hexdigest()
+
+
+class JiraLedger:
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # Story hash -> Future of the issue key, while its issue is being created
+        self._in_flight = {}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS issues ("
+            "hash TEXT PRIMARY KEY, issue_key TEXT NOT NULL, summary TEXT NOT NULL, created_at REAL NOT NULL);"
+        )
+        self._conn.commit()
+
+    def issue_key(self, digest: str) -> str:
+        """Jira key recorded for a story hash, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT issue_key FROM issues WHERE hash = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, entries) -> None:
+        """Durably record (hash, issue_key, summary) entries in one transaction."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO issues (hash, issue_key, summary, created_at) VALUES (?, ?, ?, ?)",
+                [(digest, key, summary, now) for digest, key, summary in entries])
+            self._conn.commit()
+
+    def issue_for(self, story: dict, create, source: str = "") -> str:
+        """Jira key recorded for the story from `source`, else `create(story)` and record it.
+
+        A caller that finds the same story being created by another thread
+        waits for that create's key instead of creating it again.
+        """
+        digest = story_hash(story, source)
+        with self._lock:
+            row = self._conn.execute("SELECT issue_key FROM issues WHERE hash = ?", (digest,)).fetchone()
+            future = None if row else self._in_flight.get(digest)
+            owner = row is None and future is None
+            if owner:
+                future = self._in_flight[digest] = Future()
+        if row:
+            logger.debug("Skipping story '%s': already created as %s", story.get("summary"), row[0])
+            return row[0]
+        if not owner:
+            return future.result()
+        try:
+            issue_key = create(story)
+            if issue_key:
+                self.record([(digest, issue_key, story.get("summary", ""))])
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(issue_key)
+        finally:
+            with self._lock:
+                del self._in_flight[digest]
+        return issue_key
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM issues").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+jira_ledger = JiraLedger() if LEDGER_ENABLED else None
@@ -0,0 +1,218 @@
+"""Local stand-in for the Jira REST API, for trying the Jira tool without a Jira site.
+
+Implements the endpoints the tool uses (create metadata, create issue, bulk
+create) with Jira's response shapes, including per-item bulk errors for invalid
+issues (empty or over-long summaries, unknown project, issue type, priority or
+custom field). Reassign ``story_points_field`` to simulate a schema change. ``latency`` adds a delay per request to mimic the
+network round trip, and ``rate_limit`` answers requests beyond that many per
+second with 429 and a Retry-After header, as Jira does when throttling. Run it
+and point the tool at it::
+
+    python -m src.jira_stub_server --port 8089 --latency-ms 50 --rate-limit 20
+    JIRA_URL=http://127.0.0.1:8089 python -m src.batch input/
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import itertools
+import json
+import math
+import threading
+import time
+import urllib.parse
+
+MAX_SUMMARY = 255
+PROJECT_ID = "10000"
+ISSUE_TYPES = {"10001": "Story", "10002": "Task", "10003": "Bug"}
+PRIORITIES = {"1": "Highest", "2": "High", "3": "Medium", "4": "Low", "5": "Lowest"}
+
+
+class StubJira:
+    """In-memory issues and request counters shared by the handler threads."""
+
+    def __init__(self, project_key: str = "SDLC", latency: float = 0.0, rate_limit: int = 0):
+        self.project_key = project_key
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.story_points_field = "customfield_10016"
+        self.issues = {}
+        self.requests = 0
+        self.createmeta_requests = 0
+        self.throttled = 0
+        self._window = (0, 0)
+        self._ids = itertools.count(10000)
+        self._lock = threading.Lock()
+
+    def admit(self):
+        """Count a request; returns None if it is within the rate limit, else seconds to retry after."""
+        with self._lock:
+            self.requests += 1
+            if not self.rate_limit:
+                return None
+            # Fixed one-second windows
+            now = time.monotonic()
+            second, count = self._window
+            if int(now) != second:
+                second, count = int(now), 0
+            self._window = (second, count + 1)
+            if count < self.rate_limit:
+                return None
+            self.throttled += 1
+            return second + 1 - now
+
+    def createmeta(self, project_keys: list, issue_type_names: list) -> dict:
+        if project_keys and self.project_key not in project_keys:
+            return {"projects": []}
+        names = {name.lower() for name in issue_type_names}
+        issue_types = []
+        for type_id, name in ISSUE_TYPES.items():
+            if names and name.lower() not in names:
+                continue
+            fields = {
+                "summary": {"name": "Summary", "required": True},
+                "description": {"name": "Description", "required": False},
+                "priority": {"name": "Priority", "required": False,
+                             "allowedValues": [{"id": i, "name": n} for i, n in PRIORITIES.items()]},
+                self.story_points_field: {"name": "Story Points", "required": False,
+                                          "schema": {"type": "number", "custom": "float"}},
+            }
+            issue_types.append({"id": type_id, "name": name, "fields": fields})
+        return {"projects": [{"id": PROJECT_ID, "key": self.project_key, "issuetypes": issue_types}]}
+
+    def validate(self, fields: dict) -> dict:
+        """Field errors for an issue, as Jira reports them."""
+        fields = fields or {}
+        errors = {}
+        project = fields.get("project") or {}
+        if project.get("key", self.project_key) != self.project_key or project.get("id", PROJECT_ID) != PROJECT_ID:
+            errors["project"] = "project is required"
+        issue_type = fields.get("issuetype") or {}
+        if issue_type.get("id", "10001") not in ISSUE_TYPES or issue_type.get("name", "Story") not in ISSUE_TYPES.values():
+            errors["issuetype"] = "valid issue type is required"
+        if "priority" in fields and (fields["priority"] or {}).get("id") not in PRIORITIES:
+            errors["priority"] = "Priority id is not valid"
+        for name in fields:
+            if name.startswith("customfield_") and name != self.story_points_field:
+                errors[name] = (f"Field '{name}' cannot be set. It is not on the appropriate screen, "
+                                "or unknown.")
+        summary = fields.get("summary") or ""
+        if not summary.strip():
+            errors["summary"] = "You must specify a summary of the issue."
+        elif len(summary) > MAX_SUMMARY:
+            errors["summary"] = f"Summary must be less than {MAX_SUMMARY} characters."
+        return errors
+
+    def create(self, fields: dict) -> dict:
+        with self._lock:
+            issue_id = next(self._ids)
+            key = f"{self.project_key}-{issue_id - 9999}"
+            self.issues[key] = fields
+        return {"id": str(issue_id), "key": key, "self": f"/rest/api/2/issue/{issue_id}"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive
+    # clients would wait out the delayed ACK on every response
+    disable_nagle_algorithm = True
+
+    @property
+    def jira(self) -> StubJira:
+        return self.server.jira
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        retry_after = self.jira.admit()
+        if self.jira.latency:
+            time.sleep(self.jira.latency)
+        if retry_after is not None:
+            return self._send(429, {"errorMessages": ["Rate limit exceeded."], "errors": {}},
+                              {"Retry-After": str(math.ceil(retry_after))})
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/rest/api/2/issue/createmeta":
+            query = urllib.parse.parse_qs(url.query)
+            split = lambda name: [v for value in query.get(name, []) for v in value.split(",") if v]
+            with self.jira._lock:
+                self.jira.createmeta_requests += 1
+            return self._send(200, self.jira.createmeta(split("projectKeys"), split("issuetypeNames")))
+        self._send(404, {"errorMessages": [f"No endpoint {url.path}"], "errors": {}})
+
+    def do_POST(self):
+        retry_after = self.jira.admit()
+        if self.jira.latency:
+            time.sleep(self.jira.latency)
+        try:
+            payload = self._read_json()
+        except ValueError:
+            return self._send(400, {"errorMessages": ["Invalid JSON"], "errors": {}})
+        if retry_after is not None:
+            return self._send(429, {"errorMessages": ["Rate limit exceeded."], "errors": {}},
+                              {"Retry-After": str(math.ceil(retry_after))})
+
+        if self.path == "/rest/api/2/issue":
+            fields = payload.get("fields") or {}
+            errors = self.jira.validate(fields)
+            if errors:
+                return self._send(400, {"errorMessages": [], "errors": errors})
+            return self._send(201, self.jira.create(fields))
+
+        if self.path == "/rest/api/2/issue/bulk":
+            issues, errors = [], []
+            for position, update in enumerate(payload.get("issueUpdates") or []):
+                fields = update.get("fields") or {}
+                field_errors = self.jira.validate(fields)
+                if field_errors:
+                    errors.append({"status": 400, "failedElementNumber": position,
+                                   "elementErrors": {"errorMessages": [], "errors": field_errors}})
+                else:
+                    issues.append(self.jira.create(fields))
+            return self._send(201 if issues else 400, {"issues": issues, "errors": errors})
+
+        self._send(404, {"errorMessages": [f"No endpoint {self.path}"], "errors": {}})
+
+
+def start_stub_server(port: int = 0, **options):
+    """Serve a StubJira on 127.0.0.1 in a daemon thread; returns (server, base_url).
+
+    Call server.shutdown() to stop it; the StubJira is server.jira.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.jira = StubJira(**options)
+    threading.Thread(target=server.serve_forever, name="jira-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run a local stub Jira server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--project", default="SDLC")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every request")
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per second before answering 429")
+    args = parser.parse_args(argv)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), _Handler)
+    server.jira = StubJira(args.project, args.latency_ms / 1000, args.rate_limit)
+    print(f"Stub Jira listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Background job runner for long agent workflows.
+
+UI handlers submit work here instead of running it on the event loop. Each
+submission gets a job id straight away; the callable runs on a worker thread
+and receives its ``Job`` as the ``job`` keyword so it can report progress and
+check for cancellation. Finished jobs stay queryable for ``SDLC_JOB_TTL``
+seconds, then are dropped on a later submission.
+"""
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+JOB_TTL = float(os.getenv("SDLC_JOB_TTL", "3600"))
+
+
+class Job:
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.events = []
+        self.future = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, event: str, **data) -> None:
+        """Record a progress event and notify subscribers."""
+        entry = {"event": event, "time": time.time(), **data}
+        with self._lock:
+            self.events.append(entry)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(self, entry)
+            except Exception as e:
+                logger.error("Job listener failed for %s: %s", self.id, e)
+
+    def subscribe(self, listener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "status": self.status,
+                "error": self.error, "events": list(self.events)}
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = 4, ttl: float = JOB_TTL):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sdlc-job")
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, name: str = None, **kwargs) -> str:
+        """Queue fn(*args, job=<Job>, **kwargs) and return the job id immediately."""
+        job = Job(name or getattr(fn, "__name__", "job"))
+        self._evict()
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        job.report(QUEUED)
+        return job.id
+
+    def _run(self, job: Job, fn, args, kwargs):
+        if job.cancelled:
+            self._finish(job, CANCELLED)
+            return None
+        job.status = RUNNING
+        job.report(RUNNING)
+        try:
+            job.result = fn(*args, job=job, **kwargs)
+            status = CANCELLED if job.cancelled else SUCCEEDED
+        except Exception as e:
+            logger.error("Job %s (%s) failed: %s", job.id, job.name, e)
+            job.error = str(e)
+            status = FAILED
+        self._finish(job, status)
+        return job.result
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.monotonic()
+        job.report(status)
+
+    def _evict(self) -> None:
+        """Forget jobs that finished more than `ttl` seconds ago."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and now - job.finished_at >= self.ttl]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Job:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; queued jobs never start, running jobs stop at their next check."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in (SUCCEEDED, FAILED, CANCELLED):
+            return False
+        job._cancel.set()
+        if job.future.cancel():
+            self._finish(job, CANCELLED)
+        return True
+
+    async def wait(self, job_id: str) -> Job:
+        """Await job completion without blocking the event loop."""
+        job = self._jobs[job_id]
+        try:
+            await asyncio.wrap_future(job.future)
+        except (CancelledError, asyncio.CancelledError):
+            if not job.future.cancelled():
+                raise
+        return job
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job._cancel.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+job_runner = JobRunner()
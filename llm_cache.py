@@ -0,0 +1,207 @@
+"""Persistent SQLite cache for LLM completions made by the workflow agents.
+
+Implements autogen's cache protocol (get/set/close). autogen builds the cache
+key from the full create() request: messages (system message first), tool
+schemas and model parameters. The key is normalized before hashing so that
+whitespace differences and per-call tool-call ids do not defeat re-runs.
+"""
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+project_root = str(Path(__file__).parent.parent)
+CACHE_PATH = os.getenv("SDLC_LLM_CACHE_PATH", os.path.join(project_root, "cache", "llm_cache.sqlite3"))
+CACHE_MAX_BYTES = int(os.getenv("SDLC_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+CACHE_ENABLED = os.getenv("SDLC_LLM_CACHE", "1") == "1"
+# Comma-separated agent names that always go to the LLM
+CACHE_BYPASS = {name.strip() for name in os.getenv("SDLC_LLM_CACHE_BYPASS", "").split(",") if name.strip()}
+
+
+def _normalize_message(message):
+    if not isinstance(message, dict):
+        return message
+    message = {k: v for k, v in message.items() if k != "tool_call_id"}
+    if isinstance(message.get("content"), str):
+        message["content"] = message["content"].replace("\r\n", "\n").strip()
+    if message.get("tool_calls"):
+        message["tool_calls"] = [{k: v for k, v in call.items() if k != "id"} for call in message["tool_calls"]]
+    return message
+
+
+def normalize_key(key: str) -> str:
+    """Hash an autogen cache key after normalizing its message list."""
+    try:
+        request = json.loads(key)
+    except (TypeError, ValueError):
+        request = None
+    if isinstance(request, dict):
+        request["messages"] = [_normalize_message(m) for m in request.get("messages", [])]
+        key = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(str(key).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Size-bounded LRU cache of completions with per-agent hit/miss statistics."""
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, bypass=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.bypass = set(CACHE_BYPASS if bypass is None else bypass)
+        self._lock = threading.Lock()
+        self._stats = {}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_lru ON completions(last_used)")
+        # Total size of the completions, kept in the same transactions that change them: batch
+        # workers in other processes write to the same file
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO cache_size (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM completions")
+        self._conn.commit()
+
+    def _count(self, agent_name: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(agent_name or "unknown", {"hits": 0, "misses": 0, "bypassed": 0})
+            counts[outcome] += 1
+
+    def get(self, key: str, default=None, agent_name: str = None):
+        if agent_name in self.bypass:
+            self._count(agent_name, "bypassed")
+            return default
+        digest = normalize_key(key)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM completions WHERE key = ?", (digest,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), digest))
+                self._conn.commit()
+        if row is None:
+            self._count(agent_name, "misses")
+            return default
+        self._count(agent_name, "hits")
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value, agent_name: str = None) -> None:
+        if agent_name in self.bypass:
+            return
+        digest = normalize_key(key)
+        blob = pickle.dumps(value)
+        with self._lock:
+            # Writers in other processes wait, so the size read here is the size being changed
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._conn.execute("SELECT size FROM completions WHERE key = ?", (digest,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                    (digest, blob, len(blob), time.time()),
+                )
+                self._conn.execute("UPDATE cache_size SET bytes = bytes + ?", (len(blob) - (old[0] if old else 0),))
+                self._evict()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def _size(self) -> int:
+        return self._conn.execute("SELECT bytes FROM cache_size").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits max_bytes."""
+        size = self._size()
+        while size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM completions ORDER BY last_used LIMIT 64"
+            ).fetchall()
+            if not rows:
+                size = 0
+                break
+            for key, row_size in rows:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                size -= row_size
+                if size <= self.max_bytes:
+                    break
+        self._conn.execute("UPDATE cache_size SET bytes = ?", (size,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            agents = {name: dict(counts) for name, counts in self._stats.items()}
+            size = self._size()
+        totals = {"hits": 0, "misses": 0, "bypassed": 0}
+        for counts in agents.values():
+            for outcome, n in counts.items():
+                totals[outcome] += n
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            "agents": agents,
+            "totals": totals,
+            "hit_rate": totals["hits"] / lookups if lookups else 0.0,
+            "size_bytes": size,
+        }
+
+    def view(self, agent_name: str) -> "AgentCacheView":
+        return AgentCacheView(self, agent_name)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AgentCacheView:
+    """autogen cache handle that attributes lookups to one agent."""
+
+    def __init__(self, cache: LLMCache, agent_name: str):
+        self.cache = cache
+        self.agent_name = agent_name
+
+    def get(self, key: str, default=None):
+        return self.cache.get(key, default, agent_name=self.agent_name)
+
+    def set(self, key: str, value) -> None:
+        self.cache.set(key, value, agent_name=self.agent_name)
+
+    def close(self) -> None:
+        # The shared cache outlives any single chat
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def attach_llm_cache(agents, cache: LLMCache) -> None:
+    """Route each agent's LLM calls through its own view of `cache`.
+
+    initiate_chat() overwrites agent.client_cache for the duration of a chat, so
+    the view is injected at the client's create() call instead.
+    """
+    for agent in agents:
+        client = getattr(agent, "client", None)
+        if client is None:
+            continue
+        view = cache.view(agent.name)
+        create = client.create
+
+        def create_cached(*args, _create=create, _view=view, **config):
+            if config.get("cache") is None:
+                config["cache"] = _view
+            return _create(*args, **config)
+
+        client.create = create_cached
+
+
+llm_cache = LLMCache() if CACHE_ENABLED else None
@@ -0,0 +1,168 @@
+"""Project-wide logging: structured records written off the hot path.
+
+``configure_logging()`` is called once by each entry point (UIs, batch runner);
+library modules only call ``logging.getLogger(__name__)`` and log with
+%-style arguments, so messages below the configured level are never formatted.
+Records go through a queue to a listener thread, which does the formatting and
+the I/O. Each line carries the workflow run id when one is active, and any
+``extra=`` fields::
+
+    2025-01-01 12:00:00,000 INFO src.agents.ba_agent run=3f2a... Generated 1000 user stories count=1000
+
+Per-item detail (e.g. one line per story) goes through a ``Sampler``, which
+lets the first item and then every ``SDLC_LOG_SAMPLE_EVERY``-th through.
+"""
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+
+from src.tracing import current_trace
+
+LOG_LEVEL = os.getenv("SDLC_LOG_LEVEL", "INFO")
+# text: one human-readable line per record; json: one JSON object per record
+LOG_FORMAT = os.getenv("SDLC_LOG_FORMAT", "text")
+LOG_FILE = os.getenv("SDLC_LOG_FILE")
+LOG_SAMPLE_EVERY = int(os.getenv("SDLC_LOG_SAMPLE_EVERY", "100"))
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "run_id"}
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Text or JSON lines with the run id and extra= fields appended."""
+
+    def __init__(self, fmt: str = LOG_FORMAT):
+        super().__init__()
+        self.json = fmt == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        fields = _extra_fields(record)
+        run_id = getattr(record, "run_id", None)
+        if self.json:
+            entry = {"time": self.formatTime(record), "level": record.levelname,
+                     "logger": record.name, "message": message}
+            if run_id:
+                entry["run_id"] = run_id
+            entry.update(fields)
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+        line = f"{self.formatTime(record)} {record.levelname} {record.name}"
+        if run_id:
+            line += f" run={run_id}"
+        line += f" {message}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _LazyQueueHandler(QueueHandler):
+    """Queues records unformatted; the listener thread formats them."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, in the caller's thread. Only the run
+        # id has to be captured now, since it lives in the caller's context.
+        trace = current_trace()
+        record.run_id = trace.run_id if trace is not None else None
+        return record
+
+
+def configure_logging(level: str = None, fmt: str = None, stream=None, log_file: str = LOG_FILE) -> QueueListener:
+    """Route root logging through a queue to stderr (and `log_file`); safe to call more than once."""
+    global _listener
+    with _configure_lock:
+        root = logging.getLogger()
+        root.setLevel(level or LOG_LEVEL)
+        if _listener is not None:
+            return _listener
+
+        formatter = StructuredFormatter(fmt or LOG_FORMAT)
+        handlers = [logging.StreamHandler(stream or sys.stderr)]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        root.addHandler(_LazyQueueHandler(log_queue))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def _reset_after_fork() -> None:
+    # The listener thread does not survive a fork; drop its queue handler so
+    # the child can configure its own instead of filling a queue nobody drains
+    global _listener, _configure_lock
+    _configure_lock = threading.Lock()
+    if _listener is None:
+        return
+    _listener = None
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, _LazyQueueHandler)]:
+        root.removeHandler(handler)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        root = logging.getLogger()
+        for handler in [h for h in root.handlers if isinstance(h, _LazyQueueHandler)]:
+            root.removeHandler(handler)
+
+
+class Sampler:
+    """Decides which items of a stream get a detail log line.
+
+    Lets the first item and then every `every`-th through (every=1 logs all,
+    every=0 none), and only while `level` is enabled for `logger`. Safe to
+    share between threads.
+    """
+
+    def __init__(self, logger: logging.Logger, level: int = logging.INFO, every: int = LOG_SAMPLE_EVERY):
+        self.logger = logger
+        self.level = level
+        self.every = every
+        self.seen = 0
+        self.logged = 0
+        self._counter = itertools.count()
+
+    def __call__(self) -> bool:
+        # next() on a count is atomic, so concurrent callers never share a number
+        n = next(self._counter)
+        self.seen = max(self.seen, n + 1)
+        if self.every <= 0 or n % self.every:
+            return False
+        if not self.logger.isEnabledFor(self.level):
+            return False
+        self.logged += 1
+        return True
+
+    def log(self, msg: str, *args, **kwargs) -> None:
+        self.logger.log(self.level, msg, *args, **kwargs)
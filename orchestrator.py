@@ -1,168 +1,256 @@
 from autogen import GroupChat, GroupChatManager
-from src.agents.ba_agent import ba_agent
-from src.agents.jira_agent import jira_agent
-from src.agents.user_agent import user_agent
-from src.agents.coder_agent import coder_agent
+from src.agents.ba_agent import build_ba_agent, process_requirements_wrapper
+from src.agents.jira_agent import build_jira_agent, process_stories
+from src.agents.user_agent import build_user_agent
+from src.agents.coder_agent import build_coder_agent, process_story_to_code
+from src.agent_pool import AgentPool
+from src.checkpoint import checkpoint_store
+from src.llm_cache import llm_cache
+from src.tools.jira_create_tool import jira_scheduler
+from src.tracing import span, trace_run, traced
 from src.config.settings import LLM_CONFIG
-from nicegui import app
+from src.workflow import WorkflowMachine, session_state
 import os
-import json
-from pathlib import Path
+import time
+import uuid
 import logging
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
-# Global variable for file path
-abs_file_path = None
+# Idle agent teams, built once per process so runs skip construction and tool registration
+agent_pool = AgentPool(size=int(os.getenv("SDLC_AGENT_POOL_SIZE", "2")))
+agent_pool.warm()
+
+# Run deterministic tool steps straight from the workflow graph instead of
+# paying an LLM completion for the model to decide to call them
+DIRECT_DISPATCH = os.getenv("SDLC_DIRECT_DISPATCH", "0") == "1"
+
+# Registered tools that are plain Python, by the agent that owns them
+DIRECT_TOOLS = {
+    "BA_Agent": lambda run: process_requirements_wrapper(run.file_path, run.state),
+    "Jira_Agent": lambda run: process_stories(run.state),
+    "Coder_Agent": lambda run: process_story_to_code(run.state),
+}
+
+
+class WorkflowRun:
+    """Agents, group chat and routing state owned by a single workflow run."""
+
+    def __init__(self, file_path: str, state: dict, job=None, run_id: str = None, messages: list = None,
+                 direct: bool = None):
+        self.id = run_id or uuid.uuid4().hex
+        self.file_path = file_path
+        self.state = state
+        self.direct = DIRECT_DISPATCH if direct is None else direct
+        self.team = agent_pool.acquire()
+        self.machine = WorkflowMachine(self.team.agents, state, job=job)
+        self.groupchat = GroupChat(
+            agents=self.team.agents,
+            messages=[],
+            max_round=10,
+            speaker_selection_method=traced("speaker_selection")(self.machine.select)
+        )
+        # So custom_speaker_selection can find the run's machine from the group chat alone
+        self.groupchat.workflow_machine = self.machine
+        self.manager = GroupChatManager(
+            groupchat=self.groupchat,
+            llm_config=LLM_CONFIG
+        )
+        if messages:
+            # Reload the group chat and every agent's history without any LLM calls
+            self.manager.resume(messages=messages, silent=True)
+
+    @classmethod
+    def restore(cls, run_id: str, state: dict, job=None):
+        """Rebuild a paused run from its checkpoint."""
+        started = time.perf_counter()
+        checkpoint = checkpoint_store.load(run_id)
+        if checkpoint is None:
+            return None
+        for key, value in checkpoint["artifacts"].items():
+            state.setdefault(key, value)
+        state.setdefault("workflow_status", checkpoint["workflow_status"])
+        run = cls(checkpoint["file_path"], state, job=job, run_id=run_id, messages=checkpoint["messages"],
+                  direct=checkpoint.get("direct"))
+        logger.info("Restored run %s from checkpoint in %.1f ms", run_id, (time.perf_counter() - started) * 1000)
+        return run
+
+    def advance(self, sender, message: str, job=None) -> None:
+        """Run the workflow from `sender` until it pauses for approval or ends."""
+        if job is not None:
+            self.machine.job = job
+        token = self.machine.activate()
+        with trace_run(self.id), span("workflow.leg", sender=sender.name, direct=self.direct):
+            try:
+                if self.direct:
+                    self.dispatch(sender, message)
+                else:
+                    self.chat(sender, message)
+            finally:
+                self.machine.deactivate(token)
+                self.record_context_stats()
+                self.checkpoint()
+
+    def chat(self, sender, message: str) -> None:
+        # Continue on top of any restored history rather than starting over
+        sender.initiate_chat(self.manager, message=message, clear_history=not self.groupchat.messages)
+
+    def dispatch(self, sender, message: str) -> None:
+        """Walk the transition table, calling deterministic tools directly.
+
+        Speakers without a direct tool hand the conversation to the LLM group chat.
+        """
+        messages = self.groupchat.messages
+        messages.append({"content": message, "role": "user", "name": sender.name})
+        select = self.groupchat.speaker_selection_method
+        speaker = select(None if sender is self.team.ba else sender, self.groupchat)
+        for _ in range(self.groupchat.max_round):
+            if speaker is None:
+                return
+            tool = DIRECT_TOOLS.get(speaker.name)
+            if tool is None:
+                speaker.initiate_chat(self.manager, message=messages[-1]["content"], clear_history=False)
+                return
+            with span("turn", agent=speaker.name):
+                result = tool(self)
+            messages.append({"content": str(result), "role": "user", "name": speaker.name})
+            if self.machine.pending is None:
+                raise RuntimeError(f"{speaker.name} step did not complete: {result}")
+            speaker = select(speaker, self.groupchat)
+        raise RuntimeError(f"Workflow run {self.id} exceeded {self.groupchat.max_round} rounds")
+
+    def record_context_stats(self) -> None:
+        """Fold this leg's context-policy token counts into the run totals in state."""
+        leg = self.team.context.to_dict()
+        self.team.context.reset()
+        totals = dict(self.state.get("context_stats") or {})
+        for key, value in leg.items():
+            totals[key] = totals.get(key, 0) + value
+        self.state["context_stats"] = totals
+        logger.info("Run %s context policy saved %d tokens this leg, %d in total",
+                    self.id, leg["tokens_saved"], totals["tokens_saved"])
+
+    def checkpoint(self) -> None:
+        try:
+            with span("file.write", kind="checkpoint"):
+                checkpoint_store.save(self.id, self.file_path, self.groupchat.messages, self.state, direct=self.direct)
+        except Exception as e:
+            logger.error("Failed to checkpoint run %s: %s", self.id, e)
+
+    def close(self) -> None:
+        agent_pool.release(self.team)
+
+
+# Active runs by id; session state only keeps the (serializable) run id
+_runs: Dict[str, WorkflowRun] = {}
+
+
+def get_run(run_id: str) -> WorkflowRun:
+    return _runs.get(run_id)
+
+
+def suspend_run(run_id: str) -> None:
+    """Release a run paused for HITL approval; its checkpoint is kept for resume."""
+    run = _runs.pop(run_id, None)
+    if run:
+        run.close()
+        logger.info("Workflow run %s paused for approval", run_id)
+
+
+def finish_run(run_id: str) -> None:
+    run = _runs.pop(run_id, None)
+    checkpoint_store.delete(run_id)
+    if run:
+        run.close()
+        logger.info("Workflow run %s finished", run_id)
+        if llm_cache is not None:
+            logger.info("LLM cache: %s", llm_cache.stats()["totals"])
+        if jira_scheduler.granted:
+            logger.info("Jira scheduler: %s", jira_scheduler.stats())
+
 
 def create_ba_agent():
-    return ba_agent
+    return build_ba_agent()
 
 def create_user_agent():
-    return user_agent
+    return build_user_agent()
 
 def create_jira_agent():
-    return jira_agent
+    return build_jira_agent()
 
 def create_coder_agent():
-    return coder_agent
+    return build_coder_agent()
 
 def custom_speaker_selection(last_speaker, groupchat: GroupChat):
-    if not last_speaker:
-        return ba_agent
-
-    last_message = groupchat.messages[-1] if groupchat.messages else None
-    content = last_message.get('content', '') if last_message else ''
-
-    logger.info(f"Last speaker: {last_speaker.name}")
-    logger.info(f"Message content: {content[:200]}...")
-
-    workflow_status = app.storage.user.get("workflow_status", "initial")
-    stories_approved = app.storage.user.get("stories_approved", False)
-    code_approved = app.storage.user.get("code_approved", False)
-    stories_file = app.storage.user.get("stories_file")
-    code_file = app.storage.user.get("code_file")
-
-    project_root = Path(__file__).parent.parent.parent
-    workspace_root = "/Users/mystic/Documents/projects/autogen-sdlc"
-
-    logger.info(f"Current workflow status: {workflow_status}")
-    logger.info(f"Stories approved: {stories_approved}")
-    logger.info(f"Code approved: {code_approved}")
-    logger.info(f"Stories file: {stories_file}")
-    logger.info(f"Code file: {code_file}")
-    logger.info(f"Project root: {project_root}")
-    logger.info(f"Workspace root: {workspace_root}")
-
-    if last_speaker is ba_agent:
-        if "Generated and saved" in content:
-            app.storage.user["workflow_status"] = "stories_generated"
-            return user_agent
-        return ba_agent
-
-    elif last_speaker is user_agent:
-        if stories_approved and workflow_status == "stories_approved":
-            return jira_agent
-        elif code_approved and workflow_status == "code_approved":
-            return None
-        return user_agent
-
-    elif last_speaker is jira_agent:
-        if "Stories created in Jira" in content:
-            app.storage.user["workflow_status"] = "code_generation"
-            return coder_agent
-        return jira_agent
-
-    elif last_speaker is coder_agent:
-        if code_file and os.path.exists(code_file):
-            app.storage.user["workflow_status"] = "code_generated"
-            return user_agent
-        return coder_agent
-
-    return ba_agent
-
-def message_handler(recipient, messages, sender, config):
-    if not messages:
-        return None, None
-
-    current_message = messages[-1].get('content', '')
-    logger.info(f"\n=== Message from {sender.name} ===")
-    logger.info(f"Message: {current_message[:200]}...")
-
-    if sender.name == 'BA_Agent':
-        if "Generated and saved" in current_message or "successfully processed" in current_message:
-            input_filename = os.path.basename(abs_file_path)
-            stories_file = f"stories_{input_filename}"
-            app.storage.user["stories_file"] = stories_file
-            app.storage.user["workflow_status"] = "stories_generated"
-            logger.info(f"Set stories file in session state: {stories_file}")
-            return user_agent, current_message
-        logger.info("Continuing with BA Agent")
-        return ba_agent, current_message
-
-    elif sender.name == 'User_Agent':
-        if app.storage.user.get("workflow_status") == "validating_stories":
-            logger.info("User Agent validating stories")
-            return user_agent, "Please validate the stories and provide feedback."
-        elif "Stories approved" in current_message:
-            logger.info("User Agent approved stories, transitioning to Jira Agent")
-            app.storage.user["workflow_status"] = "stories_approved"
-            return jira_agent, "Create Jira tickets from the stories in the stories folder."
-        elif "Waiting for approval" in current_message:
-            logger.info("User Agent waiting for approval")
-            return user_agent, current_message
-        else:
-            logger.info("User Agent processing message")
-            return user_agent, current_message
-
-    elif sender.name == 'Jira_Agent':
-        if "Stories created in Jira" in current_message:
-            logger.info("Jira Agent completed, workflow finished")
-            app.storage.user["workflow_status"] = "completed"
-            return None, None
-        else:
-            logger.info("Jira Agent processing message")
-            return jira_agent, current_message
+    """Next speaker of a group chat built by a WorkflowRun."""
+    return groupchat.workflow_machine.select(last_speaker, groupchat)
 
-    return recipient, current_message
+def continue_workflow(run_id: str, message: str, state: dict = None, job=None) -> None:
+    """Send a HITL message (e.g. an approval) from the run's User_Agent.
 
-def update_group_chat(message: str):
+    Runs no longer in memory (e.g. after a reload) are resumed from their
+    checkpoint, so earlier LLM rounds are not replayed.
+    """
+    run = get_run(run_id)
+    if run is None:
+        if state is None:
+            state = session_state()
+        run = WorkflowRun.restore(run_id, state, job=job)
+        if run is None:
+            raise ValueError(f"No active workflow run: {run_id}")
+        _runs[run_id] = run
     try:
-        if "chat_manager" in app.storage.user and app.storage.user["chat_manager"]:
-            manager = app.storage.user["chat_manager"]
-            manager.run(message)
-            logger.info(f"Group chat updated with message: {message[:200]}...")
+        run.advance(run.team.user, message, job=job)
+    finally:
+        if run.machine.paused:
+            suspend_run(run_id)
         else:
-            logger.error("No chat manager found in session state")
-    except Exception as e:
-        logger.error(f"Error updating group chat: {str(e)}")
+            finish_run(run_id)
 
-def start_agent_workflow(file_path: str) -> None:
+def update_group_chat(message: str, state: dict = None):
     try:
-        logger.info("\n=== Starting Workflow ===")
-        logger.info(f"Processing file: {file_path}")
+        if state is None:
+            state = session_state()
+        if state.get("run_id"):
+            continue_workflow(state["run_id"], message, state=state)
+            logger.info("Group chat updated with message: %.200s...", message)
+        else:
+            logger.error("No active workflow run found in session state")
+    except Exception as e:
+        logger.error("Error updating group chat: %s", e)
 
-        groupchat = GroupChat(
-            agents=[ba_agent, user_agent, jira_agent, coder_agent],
-            messages=[],
-            max_round=10,
-            speaker_selection_method=custom_speaker_selection
-        )
+def start_agent_workflow(file_path: str, state: dict = None, job=None, direct: bool = None) -> str:
+    """Run the agent group chat for one requirements file and return its run id.
 
-        manager = GroupChatManager(
-            groupchat=groupchat,
-            llm_config=LLM_CONFIG
-        )
+    `state` defaults to the NiceGUI user storage; pass it explicitly when running
+    off the UI thread (e.g. from src.jobs), where that storage is not reachable.
+    `direct` overrides SDLC_DIRECT_DISPATCH for this run.
+    """
+    run = None
+    try:
+        logger.info("\n=== Starting Workflow ===")
+        logger.info("Processing file: %s", file_path)
 
-        app.storage.user["chat_manager"] = manager
+        if state is None:
+            state = session_state()
+        run = WorkflowRun(file_path, state, job=job, direct=direct)
+        _runs[run.id] = run
+        state["run_id"] = run.id
 
         logger.info("\n=== Starting BA Agent ===")
-        ba_agent.initiate_chat(
-            manager,
-            message=f"Read the requirements file at '{file_path}' and generate Jira stories. Save them to the stories folder and return a success message."
+        run.advance(
+            run.team.ba,
+            f"Read the requirements file at '{file_path}' and generate Jira stories. Save them to the stories folder and return a success message."
         )
+        if run.machine.paused:
+            suspend_run(run.id)
+        else:
+            finish_run(run.id)
+        return run.id
 
     except Exception as e:
-        logger.error(f"Error in workflow: {str(e)}")
+        logger.error("Error in workflow: %s", e)
+        if run is not None:
+            finish_run(run.id)
         raise
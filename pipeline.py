@@ -0,0 +1,142 @@
+"""Streaming stage scheduler for per-story work.
+
+Each stage has its own worker pool, and an item moves to the next stage as
+soon as its current stage finishes. With Jira creation and code generation as
+stages, code for story N is generated while issues for later stories are
+still being created, so wall-clock time tracks the slowest stage rather than
+the sum of all of them.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import contextvars
+import logging
+import os
+import threading
+
+from src.tools.jira_create_tool import create_jira_story
+from src.agents.coder_agent import generate_code_for_story
+from src.tracing import span
+from src.logs import Sampler
+
+logger = logging.getLogger(__name__)
+
+JIRA_CONCURRENCY = int(os.getenv("SDLC_JIRA_CONCURRENCY", "4"))
+CODE_CONCURRENCY = int(os.getenv("SDLC_CODE_CONCURRENCY", "2"))
+
+# fn(index, value) -> value handed to the next stage
+Stage = namedtuple("Stage", ["name", "fn", "concurrency"])
+# Outcome per input item, in input order; failed_stage/error are set on failure
+ItemResult = namedtuple("ItemResult", ["index", "value", "failed_stage", "error"])
+
+
+class StageScheduler:
+    def __init__(self, stages, max_in_flight: int = None):
+        self.stages = list(stages)
+        # Bound how far input is read ahead of the slowest stage
+        self.max_in_flight = max_in_flight or 2 * sum(stage.concurrency for stage in self.stages)
+
+    def run(self, items) -> list:
+        """Push every item through all stages; `items` may be a lazy iterator."""
+        executors = [
+            ThreadPoolExecutor(max_workers=stage.concurrency, thread_name_prefix=f"stage-{stage.name}")
+            for stage in self.stages
+        ]
+        results = {}
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        idle = threading.Condition()
+        pending = [0]
+
+        def finish(result: ItemResult) -> None:
+            results[result.index] = result
+            in_flight.release()
+            with idle:
+                pending[0] -= 1
+                idle.notify_all()
+
+        def call(stage: Stage, index: int, value):
+            with span(f"stage.{stage.name}", index=index):
+                return stage.fn(index, value)
+
+        def submit(stage_no: int, index: int, value) -> None:
+            if stage_no == len(self.stages):
+                finish(ItemResult(index, value, None, None))
+                return
+            stage = self.stages[stage_no]
+            # Carry the caller's context (active trace, workflow) into the worker
+            context = contextvars.copy_context()
+            try:
+                future = executors[stage_no].submit(context.run, call, stage, index, value)
+            except RuntimeError as e:
+                # The stage's pool is shut down. This usually runs in a done
+                # callback, which would swallow the error and leave the item pending
+                logger.error("Stage %s could not take item %d: %s", stage.name, index, e)
+                finish(ItemResult(index, None, stage.name, e))
+                return
+            future.add_done_callback(lambda f: done(stage_no, index, f))
+
+        def done(stage_no: int, index: int, future) -> None:
+            error = future.exception()
+            if error is not None:
+                stage = self.stages[stage_no]
+                logger.error("Stage %s failed for item %d: %s", stage.name, index, error)
+                finish(ItemResult(index, None, stage.name, error))
+            else:
+                submit(stage_no + 1, index, future.result())
+
+        try:
+            for index, item in enumerate(items):
+                in_flight.acquire()
+                with idle:
+                    pending[0] += 1
+                submit(0, index, item)
+            with idle:
+                idle.wait_for(lambda: pending[0] == 0)
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+
+        return [results[i] for i in sorted(results)]
+
+
+def create_jira_issue(story: dict) -> str:
+    """Create the story's Jira issue from its summary, description, priority and story points."""
+    with span("jira.create"):
+        return create_jira_story({
+            "summary": story["summary"],
+            "description": story["description"],
+            "priority": story.get("priority"),
+            "story_points": story.get("story_points"),
+        })
+
+
+def run_story_pipeline(stories, programs_dir: str = None,
+                       jira_concurrency: int = JIRA_CONCURRENCY, code_concurrency: int = CODE_CONCURRENCY,
+                       create_issue=create_jira_issue) -> list:
+    """Create a Jira issue and then generate code for each story, pipelined across stories.
+
+    `create_issue(story) -> issue key` defaults to a plain create_jira_story call.
+    """
+    if programs_dir is None:
+        project_root = str(Path(__file__).parent.parent)
+        programs_dir = os.path.join(project_root, "programs")
+    os.makedirs(programs_dir, exist_ok=True)
+
+    sample = Sampler(logger)
+
+    def jira_stage(index: int, story: dict):
+        issue_key = create_issue(story)
+        if sample():
+            logger.info("Created Jira issue for story %d: %s", index, issue_key)
+        return story, issue_key
+
+    def generate_code(index: int, created):
+        story, issue_key = created
+        code_file = generate_code_for_story(story, programs_dir, prefix=f"{issue_key}_")
+        return {"issue_key": issue_key, "code_file": code_file}
+
+    scheduler = StageScheduler([
+        Stage("jira", jira_stage, jira_concurrency),
+        Stage("code", generate_code, code_concurrency),
+    ])
+    return scheduler.run(stories)
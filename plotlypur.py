@@ -4,7 +4,11 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+from src.stories import DISPLAY_LIMIT, load_stories
 from src.orchestrator import start_agent_workflow, update_group_chat
+from src.logs import configure_logging
+
+configure_logging()
 
 app = dash.Dash(__name__)
 server = app.server
@@ -154,8 +158,7 @@ def display_stories(status, stories_file):
         path = Path(__file__).resolve().parent.parent / "stories" / stories_file
         if path.exists():
             import json
-            with open(path) as f:
-                data = json.load(f)
+            data = load_stories(str(path), limit=DISPLAY_LIMIT)
             return html.Pre(json.dumps(data, indent=2))
     return "No stories available yet."
 
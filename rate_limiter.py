@@ -0,0 +1,125 @@
+"""Process-wide request scheduling for rate-limited APIs.
+
+A ``FairScheduler`` is a token bucket shared by every thread of the process:
+callers take a token before each request, and wait in a queue per workflow
+run while none is free. Queues are served round-robin, so one run creating
+thousands of issues cannot starve the others. When the server answers 429 the
+caller reports it with ``throttle()``, which pauses the whole bucket for the
+server's ``Retry-After`` (or a jittered exponential backoff).
+"""
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+
+
+def parse_retry_after(value) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(attempt: int, retry_after: float = None, base: float = 0.5, cap: float = 30.0) -> float:
+    """Delay before retry number `attempt` (0-based).
+
+    Honours the server's `retry_after` with up to 10% jitter added, so throttled
+    callers do not all come back at once; without it, full-jitter exponential.
+    """
+    if retry_after is not None:
+        return retry_after * (1 + random.uniform(0, 0.1))
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class FairScheduler:
+    """Token bucket with round-robin queues per key (e.g. workflow run id).
+
+    `rate` tokens per second up to `burst`; a rate of 0 disables the bucket but
+    still honours throttle() pauses.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # key -> deque of waiting tickets; the first key is served next
+        self._queues = OrderedDict()
+        self._cond = threading.Condition()
+        self.granted = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _delay(self, now: float) -> float:
+        """Seconds until the next request may start."""
+        delay = self._paused_until - now
+        if self.rate > 0 and self._tokens < 1:
+            delay = max(delay, (1 - self._tokens) / self.rate)
+        return delay
+
+    def acquire(self, key=None) -> None:
+        """Block until the caller may send one request, in its turn among `key`s."""
+        ticket = object()
+        started = time.monotonic()
+        with self._cond:
+            self._queues.setdefault(key, deque()).append(ticket)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                head_key = next(iter(self._queues))
+                timeout = None
+                if self._queues[head_key][0] is ticket:
+                    timeout = self._delay(now)
+                    if timeout <= 0:
+                        break
+                self._cond.wait(timeout)
+            if self.rate > 0:
+                self._tokens -= 1
+            waiting = self._queues.pop(head_key)
+            waiting.popleft()
+            if waiting:
+                # Back of the line, behind every other key with waiters
+                self._queues[head_key] = waiting
+            self.granted += 1
+            self.wait_seconds += time.monotonic() - started
+            self._cond.notify_all()
+
+    def throttle(self, delay: float) -> None:
+        """The server rejected a request as over its limit: hold everyone for `delay` seconds."""
+        with self._cond:
+            self.throttled += 1
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + delay)
+            # Start again from an empty bucket instead of bursting when the pause ends
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": sum(len(q) for q in self._queues.values()),
+                "queued_by_key": {key: len(q) for key, q in self._queues.items()},
+                "granted": self.granted,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
@@ -0,0 +1,294 @@
+"""LLM refinement of large requirement documents.
+
+A document that does not fit one context window is split into token-budgeted
+chunks along section boundaries. Each chunk carries the tail of the previous
+one as read-only context, so requirements that span a boundary keep their
+meaning without being converted twice. Chunks are refined concurrently under
+an asyncio semaphore and the resulting stories are merged back in document
+order. Each story's ID is the hash of its requirement text, so it stays
+stable across runs and edits elsewhere in the document.
+
+With a story store revision, sections the store has refined before reuse their
+stories and only new or edited sections are sent to the LLM. Each part of an
+excerpt is tagged with its section so the LLM's stories can be stored per
+section.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import logging
+import os
+import re
+
+from autogen import OpenAIWrapper
+from autogen.token_count_utils import count_token
+
+from src.config.settings import LLM_CONFIG
+from src.llm_cache import llm_cache
+from src.requirement_classifier import default_classifier
+from src.stories import Story, render_description
+from src.story_store import requirement_key
+from src.tracing import span
+
+logger = logging.getLogger(__name__)
+
+REFINEMENT_ENABLED = os.getenv("SDLC_LLM_REFINEMENT", "0") == "1"
+CHUNK_TOKENS = int(os.getenv("SDLC_CHUNK_TOKENS", "3000"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("SDLC_CHUNK_OVERLAP_TOKENS", "200"))
+REFINE_CONCURRENCY = int(os.getenv("SDLC_REFINE_CONCURRENCY", "4"))
+
+# context: tail of the previous chunk, shown to the LLM but not converted;
+# parts: (section number, text) of the sections (or pieces of them) in text
+Chunk = namedtuple("Chunk", ["index", "text", "context", "tokens", "parts"])
+
+_HEADING = re.compile(r"^(#{1,6}\s|[A-Z][A-Z0-9 &/-]{3,}$|.{1,80}:$)")
+
+REFINE_PROMPT = """You are a Business Analyst. Convert every requirement in the EXCERPT into a user story.
+The CONTEXT is the end of the previous excerpt; use it only to understand the excerpt and do not convert it.
+Each part of the EXCERPT starts with a [S<n>] tag; set "section" to the n of the part the requirement is in.
+Reply with only a JSON list, one object per requirement, in document order:
+[{"section": 1, "requirement": "...", "acceptance_criteria": ["...", "..."], "priority": "High|Medium|Low", "story_points": 1}]"""
+
+
+def split_sections(text: str) -> list:
+    """Split text into sections at blank lines and heading-like lines."""
+    sections, current = [], []
+    for line in text.splitlines():
+        if not line.strip():
+            if current:
+                sections.append("\n".join(current))
+                current = []
+            continue
+        if current and _HEADING.match(line.strip()):
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def _split_oversized(section: str, max_tokens: int) -> list:
+    """Break a section larger than the budget into line-aligned pieces."""
+    pieces, current, tokens = [], [], 0
+    for line in section.splitlines():
+        line_tokens = count_token(line)
+        if current and tokens + line_tokens > max_tokens:
+            pieces.append("\n".join(current))
+            current, tokens = [], 0
+        current.append(line)
+        tokens += line_tokens
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def _tail_lines(section: str, max_tokens: int) -> str:
+    """Trailing lines of a section that fit in `max_tokens`."""
+    lines, tokens = [], 0
+    for line in reversed(section.splitlines()):
+        tokens += count_token(line)
+        if tokens > max_tokens:
+            break
+        lines.insert(0, line)
+    return "\n".join(lines)
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+               sections: list = None) -> list:
+    """Pack sections into chunks of at most `max_tokens`, each with up to
+    `overlap_tokens` of trailing sections from the previous chunk as context.
+
+    `sections` (section texts, e.g. from the document's section index) replaces
+    the blank-line split of `text`.
+    """
+    units = []
+    for number, section in enumerate(sections if sections is not None else split_sections(text)):
+        if not section.strip():
+            continue
+        tokens = count_token(section)
+        if tokens > max_tokens:
+            units.extend((number, piece, count_token(piece)) for piece in _split_oversized(section, max_tokens))
+        else:
+            units.append((number, section, tokens))
+
+    chunks, current, current_tokens = [], [], 0
+
+    def close():
+        context, context_tokens = [], 0
+        if chunks:
+            # Trailing sections of the previous chunk, newest last
+            for _, section, tokens in reversed(chunks[-1][1]):
+                if context_tokens + tokens > overlap_tokens:
+                    tail = _tail_lines(section, overlap_tokens - context_tokens)
+                    if tail:
+                        context.insert(0, tail)
+                    break
+                context.insert(0, section)
+                context_tokens += tokens
+        chunks.append((context, list(current), current_tokens))
+
+    for number, section, tokens in units:
+        if current and current_tokens + tokens > max_tokens:
+            close()
+            current, current_tokens = [], 0
+        current.append((number, section, tokens))
+        current_tokens += tokens
+    if current:
+        close()
+
+    return [
+        Chunk(index, "\n\n".join(section for _, section, _ in owned), "\n\n".join(context), tokens,
+              tuple((number, section) for number, section, _ in owned))
+        for index, (context, owned, tokens) in enumerate(chunks)
+    ]
+
+
+def _parse_stories(reply: str) -> list:
+    start, end = reply.find("["), reply.rfind("]")
+    if start < 0 or end < start:
+        raise ValueError("reply contains no JSON list")
+    items = json.loads(reply[start:end + 1])
+    return [item for item in items if isinstance(item, dict) and item.get("requirement")]
+
+
+def _story_from_item(item: dict) -> Story:
+    requirement = str(item["requirement"]).strip()
+    priority = item.get("priority") or "Medium"
+    story_points = item.get("story_points") or 3
+    criteria = item.get("acceptance_criteria")
+    # Only stories with LLM-written criteria need their description stored
+    description = None
+    if criteria:
+        criteria = [str(c).replace("{", "{{").replace("}", "}}") for c in criteria]
+        description = render_description(requirement, priority, story_points, criteria)
+    return Story(requirement, priority=priority, story_points=story_points,
+                 requirement_hash=requirement_key(requirement), description=description)
+
+
+def _fallback_stories(chunk: Chunk) -> list:
+    """(section, story) pairs of template stories for a chunk whose LLM reply could not be used."""
+    return [(number, Story(r.text, requirement_hash=requirement_key(r.text)))
+            for number, text in chunk.parts
+            for r in default_classifier.iter_requirements(text.splitlines())]
+
+
+def _section_of(item: dict, chunk: Chunk):
+    """Section number the LLM gave a story, or None if it is not one of the chunk's."""
+    try:
+        number = int(item.get("section"))
+    except (TypeError, ValueError):
+        return None
+    return number if any(number == part for part, _ in chunk.parts) else None
+
+
+def _merge(groups) -> list:
+    """Stories of all groups in order, each requirement once."""
+    stories, seen = [], set()
+    for group in groups:
+        for story in group:
+            # A requirement repeated at a chunk boundary is kept once
+            if story.requirement_hash in seen:
+                continue
+            seen.add(story.requirement_hash)
+            stories.append(story)
+    return stories
+
+
+class ChunkRefiner:
+    """Refines chunks with the LLM, at most `concurrency` requests at a time."""
+
+    def __init__(self, llm_config: dict = None, concurrency: int = REFINE_CONCURRENCY, client=None):
+        self.client = client or OpenAIWrapper(**(llm_config or LLM_CONFIG))
+        self.concurrency = concurrency
+
+    def _refine(self, chunk: Chunk) -> list:
+        """(section, story) pairs for a chunk; section is None where the LLM did not give a valid one."""
+        excerpt = "\n\n".join(f"[S{number}]\n{text}" for number, text in chunk.parts)
+        content = f"CONTEXT:\n{chunk.context or '(start of document)'}\n\nEXCERPT:\n{excerpt}"
+        messages = [{"role": "system", "content": REFINE_PROMPT}, {"role": "user", "content": content}]
+        with span("llm.refine", chunk=chunk.index, tokens=chunk.tokens):
+            cache = llm_cache.view("BA_Refiner") if llm_cache is not None else None
+            response = self.client.create(messages=messages, cache=cache)
+        reply = self.client.extract_text_or_completion_object(response)[0]
+        try:
+            return [(_section_of(item, chunk), _story_from_item(item)) for item in _parse_stories(reply)]
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning("Chunk %d: unusable LLM reply (%s), using template stories", chunk.index, e)
+            return _fallback_stories(chunk)
+
+    async def refine_chunks(self, chunks: list) -> list:
+        """(section, story) pairs of each chunk, in chunk order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refine_one(chunk: Chunk) -> list:
+            async with semaphore:
+                # The autogen client is synchronous; keep the event loop free while it waits
+                return await asyncio.to_thread(self._refine, chunk)
+
+        return await asyncio.gather(*(refine_one(chunk) for chunk in chunks))
+
+    async def refine(self, chunks: list) -> list:
+        """Stories for all chunks, merged in document order."""
+        results = await self.refine_chunks(chunks)
+        return _merge([story for _, story in pairs] for pairs in results)
+
+
+def _run(coroutine):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Called from inside an event loop (e.g. the UI thread): run on a fresh loop elsewhere
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def refine_document(text: str, refiner: ChunkRefiner = None, sections: list = None, revision=None) -> list:
+    """Chunk `text` and refine it into stories with the LLM; returns stories in document order.
+
+    With a story store `revision`, only sections it has no stories for are
+    refined, and their stories are recorded in it.
+    """
+    if revision is None:
+        chunks = chunk_text(text, sections=sections)
+        logger.info("Refining %d chunks (%d tokens) with up to %d concurrent LLM calls",
+                    len(chunks), sum(c.tokens for c in chunks), REFINE_CONCURRENCY)
+        return _run((refiner or ChunkRefiner()).refine(chunks))
+
+    if sections is None:
+        sections = split_sections(text)
+    known = {}
+    for number, section in enumerate(sections):
+        if section.strip():
+            stories = revision.section_stories(section)
+            if stories is not None:
+                known[number] = stories
+    pending = [number for number, section in enumerate(sections) if section.strip() and number not in known]
+    # Numbered as in `sections`, with the known ones left empty
+    chunks = chunk_text(text, sections=["" if number in known else section for number, section in enumerate(sections)])
+    logger.info("Refining %d of %d sections in %d chunks (%d tokens) with up to %d concurrent LLM calls",
+                len(pending), len(pending) + len(known), len(chunks), sum(c.tokens for c in chunks),
+                REFINE_CONCURRENCY)
+    results = _run((refiner or ChunkRefiner()).refine_chunks(chunks)) if chunks else []
+
+    refined, unplaced, untagged = {number: [] for number in pending}, {}, set()
+    for chunk, pairs in zip(chunks, results):
+        if any(number is None for number, _ in pairs):
+            # Without a section per story the chunk's sections cannot be reused next time
+            untagged.update(number for number, _ in chunk.parts)
+            unplaced.setdefault(chunk.parts[-1][0], []).extend(story for _, story in pairs)
+            continue
+        for number, story in pairs:
+            refined[number].append(story)
+    for number, stories in refined.items():
+        revision.add_stories(stories, section=None if number in untagged else sections[number])
+    for stories in unplaced.values():
+        revision.add_stories(stories)
+
+    groups = []
+    for number in range(len(sections)):
+        groups.append(known.get(number) or refined.get(number) or [])
+        groups.append(unplaced.get(number, []))
+    return _merge(groups)
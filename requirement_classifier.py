@@ -0,0 +1,276 @@
+"""Recognize requirement list items in specification text.
+
+Built-in styles:
+
+    decimal   1.  1)  1.2  1.2.3.
+    alpha     a.  a)  B)  B.
+    bullet    -  *  •
+
+A marker is followed by whitespace, or directly by a letter when it ends in
+".", ")" or "-" ("1.Login", "-Login"). A capital letter with a period needs two
+spaces after it, so initials in prose ("A. Smith wrote") are not items.
+
+Lines are routed on their first four characters, remembered per
+classifier: prose is rejected and bullet and alpha items are recognized from
+the prefix alone, and other lines go to the parsers of the styles that can
+start that way. The built-in styles are parsed with string methods rather
+than a regex. ``iter_requirements`` looks up the prefixes of a whole block in
+C (``map`` over the lines), so prose lines never reach Python code. Parsers
+return plain field tuples; a Requirement is only built when one is returned,
+and ``is_requirement`` builds none. More styles can be added with
+``RequirementClassifier.register``; each style pattern must capture the
+marker in a group named after the style.
+"""
+from collections import namedtuple
+from operator import itemgetter
+import re
+
+INDENT_WIDTH = 2
+
+# text: the requirement without its marker; depth: 0 for top-level items
+Requirement = namedtuple("Requirement", ["text", "marker", "style", "depth"])
+
+DEFAULT_STYLES = {
+    # "1.2.3" may omit the trailing dot; a plain "12" needs "." or ")" so numbers in prose don't match
+    "decimal": r"(?P<decimal>\d+(?:\.\d+)+\.?|\d+[.)])",
+    "alpha": r"(?P<alpha>(?:[a-z][.)]|[A-Z]\))(?=[ \t])|[A-Z]\.(?=[ \t]{2}))",
+    "bullet": r"(?P<bullet>[-*•])",
+}
+
+# (first characters, second characters) a marker of each style can have;
+# None means any. Alpha markers are recognized by their second character.
+DEFAULT_PREFIXES = {
+    "decimal": ("0123456789", None),
+    "alpha": (None, ".)"),
+    "bullet": ("-*•", None),
+}
+
+# Whitespace then text, or text straight after a marker ending in ".", ")" or "-"
+_FOLLOW = r"(?=[ \t]+\S|(?<=[.)-])[^\W\d_])"
+
+_BLANK = frozenset(" \t")
+_ASCII_LETTERS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+# Line prefixes routed on, and how many are remembered per classifier
+_ROUTE_CHARS = 4
+_DISPATCH_LIMIT = 1 << 16
+
+_head = itemgetter(slice(0, _ROUTE_CHARS))
+# Builds a Requirement from a parser's (text, marker, style, depth) tuple,
+# skipping the namedtuple's Python-level __new__
+_new = tuple.__new__
+
+
+def _decimal_depth(marker: str) -> int:
+    return marker.rstrip(".)").count(".")
+
+
+def _parse_decimal(line: str, start: int, depth: int) -> tuple:
+    rest = line[start:].lstrip("0123456789.")
+    marker = line[start:len(line) - len(rest)]
+    if ".." in marker:
+        return None
+    if "." in marker:
+        # "1.2" may be followed by text directly only when it ends in a dot
+        tight = marker[-1] == "."
+    elif rest[:1] == ")":
+        marker += ")"
+        rest = rest[1:]
+        tight = True
+    else:
+        return None
+    follow = rest[:1]
+    if follow in _BLANK or tight and follow.isalpha():
+        text = rest.strip()
+        if text:
+            return text, marker, "decimal", max(depth, marker.rstrip(".)").count("."))
+    return None
+
+
+def _parse_alpha(line: str, start: int, depth: int) -> tuple:
+    follow = line[start + 2:start + 4]
+    if follow[:1] not in _BLANK:
+        return None
+    letter = line[start]
+    if letter not in _ASCII_LETTERS:
+        return None
+    # An upper-case letter with a period is an initial unless two blanks follow
+    if follow[1:] not in _BLANK and line[start + 1] == "." and letter.isupper():
+        return None
+    text = line[start + 2:].strip()
+    if text:
+        return text, line[start:start + 2], "alpha", depth
+    return None
+
+
+def _parse_bullet(line: str, start: int, depth: int) -> tuple:
+    marker = line[start]
+    follow = line[start + 1:start + 2]
+    if follow in _BLANK or marker == "-" and follow.isalpha():
+        text = line[start + 1:].strip()
+        if text:
+            return text, marker, "bullet", depth
+    return None
+
+
+_PARSERS = {"decimal": _parse_decimal, "alpha": _parse_alpha, "bullet": _parse_bullet}
+
+
+def _regex_parser(name: str, pattern: str, marker_depth=None):
+    """Parser for a style given as a pattern with a group called `name`."""
+    match = re.compile(rf"(?:{pattern}){_FOLLOW}").match
+
+    def parse(line: str, start: int, depth: int) -> tuple:
+        found = match(line, start)
+        if found is None:
+            return None
+        marker = found.group(name)
+        if marker_depth is not None:
+            depth = max(depth, marker_depth(marker))
+        return line[found.end():].strip(), marker, name, depth
+
+    return parse
+
+
+# Route of lines whose prefix is a whole marker and a blank: the text is the rest of the line
+_Marker = namedtuple("_Marker", ["marker", "style"])
+
+
+class _Dispatch(dict):
+    """Line prefix -> route, filled in the first time a prefix is seen."""
+
+    def __init__(self, route):
+        super().__init__()
+        self.route = route
+
+    def __missing__(self, prefix: str):
+        route = self.route(prefix)
+        if len(self) < _DISPATCH_LIMIT:
+            self[prefix] = route
+        return route
+
+
+class RequirementClassifier:
+    """Callable that returns a Requirement for list-item lines and None otherwise."""
+
+    def __init__(self, styles: dict = None, indent_width: int = INDENT_WIDTH):
+        self.styles = dict(DEFAULT_STYLES if styles is None else styles)
+        self.prefixes = {name: DEFAULT_PREFIXES[name] for name in self.styles if name in DEFAULT_PREFIXES}
+        self.indent_width = indent_width
+        # Depth implied by the marker itself, on top of indentation
+        self.marker_depth = {"decimal": _decimal_depth}
+        self._compile()
+
+    def register(self, name: str, pattern: str, marker_depth=None, first_chars: str = None,
+                 second_chars: str = None) -> None:
+        """Add (or replace) a list style; `pattern` must define the group `name`.
+
+        `first_chars`/`second_chars` are the characters its markers can start
+        with or have second; without either, every line is tried against it.
+        """
+        self.styles[name] = pattern
+        self.prefixes.pop(name, None)
+        if first_chars is not None or second_chars is not None:
+            self.prefixes[name] = (first_chars, second_chars)
+        if marker_depth is not None:
+            self.marker_depth[name] = marker_depth
+        self._compile()
+
+    def _compile(self) -> None:
+        # (first chars, second chars, parser) per style, in registration order
+        self._styles = []
+        for name, pattern in self.styles.items():
+            if pattern == DEFAULT_STYLES.get(name) and self.marker_depth.get(name) is (
+                    _decimal_depth if name == "decimal" else None):
+                parser = _PARSERS[name]
+            else:
+                parser = _regex_parser(name, pattern, self.marker_depth.get(name))
+            first, second = self.prefixes.get(name, (None, None))
+            self._styles.append((first, second, parser))
+        self._dispatch = _Dispatch(self._route)
+
+    def _route(self, prefix: str):
+        """Parsers to try for lines starting with `prefix`, or its _Marker.
+
+        Built-in bullet and alpha markers are at most two characters, so when
+        one of them is the only style a prefix can start, four characters
+        settle the line: a blank then text after the marker is an item
+        (routed to its _Marker) and anything else is not (no parsers).
+        """
+        if prefix[:1] in _BLANK:
+            return (self._parse_indented,)
+        parsers = tuple(parser for first, second, parser in self._styles
+                        if prefix and (first is None and second is None
+                                       or first is not None and prefix[0] in first
+                                       or second is not None and prefix[1:2] in second))
+        if len(prefix) == _ROUTE_CHARS and prefix[3] not in _BLANK and parsers in (
+                (_parse_bullet,), (_parse_alpha,)):
+            found = parsers[0](prefix, 0, 0)
+            if found is None:
+                return ()
+            if prefix[len(found[1])] in _BLANK:
+                return _Marker(found[1], found[2])
+        return parsers
+
+    def _parse_indented(self, line: str, start: int, depth: int) -> tuple:
+        stripped = line.lstrip(" \t")
+        start = len(line) - len(stripped)
+        depth = len(line[:start].expandtabs(4)) // self.indent_width
+        route = self._dispatch[stripped[:_ROUTE_CHARS]]
+        if route.__class__ is _Marker:
+            return stripped[len(route.marker):].strip(), route.marker, route.style, depth
+        for parse in route:
+            found = parse(line, start, depth)
+            if found is not None:
+                return found
+        return None
+
+    def _parse(self, line: str) -> tuple:
+        route = self._dispatch[line[:_ROUTE_CHARS]]
+        if route.__class__ is _Marker:
+            return line[len(route.marker):].strip(), route.marker, route.style, 0
+        for parse in route:
+            found = parse(line, 0, 0)
+            if found is not None:
+                return found
+        return None
+
+    def __call__(self, line: str) -> Requirement:
+        return self.classify(line)
+
+    def classify(self, line: str) -> Requirement:
+        found = self._parse(line)
+        return None if found is None else _new(Requirement, found)
+
+    def is_requirement(self, line: str) -> bool:
+        """Whether `line` is a list item, without building its Requirement."""
+        route = self._dispatch[line[:_ROUTE_CHARS]]
+        if route.__class__ is _Marker:
+            return True
+        for parse in route:
+            if parse(line, 0, 0) is not None:
+                return True
+        return False
+
+    def iter_requirements(self, lines):
+        """Yield a Requirement for every list-item line in the sequence `lines`."""
+        if not isinstance(lines, (list, tuple)):
+            lines = list(lines)
+        for line, route in zip(lines, map(self._dispatch.__getitem__, map(_head, lines))):
+            if not route:
+                continue
+            if route.__class__ is _Marker:
+                yield _new(Requirement, (line[len(route.marker):].strip(), route.marker, route.style, 0))
+                continue
+            for parse in route:
+                found = parse(line, 0, 0)
+                if found is not None:
+                    yield _new(Requirement, found)
+                    break
+
+
+default_classifier = RequirementClassifier()
+
+
+def classify_line(line: str) -> Requirement:
+    """Classify `line` with the default list styles."""
+    return default_classifier.classify(line)
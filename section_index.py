@@ -0,0 +1,143 @@
+"""Section index of an extracted requirements document.
+
+Written next to the extracted text in ``input/`` (``<file>.sections.json``)
+when a document is uploaded. Each section has its heading hierarchy, the line
+range of its own content (up to the next heading of any level) and a hash of
+that content, so later stages can split the document into sections without
+rescanning it. Which sections changed between uploads is left to the story
+store, which reuses the stories of every section it has seen before.
+
+Headings come from the document's styles where it has them (.docx), else from
+the text: Markdown ``#`` headings, ALL CAPS lines and short ``Label:`` lines.
+"""
+from collections import namedtuple
+import hashlib
+import json
+import logging
+import os
+import re
+
+from src.requirement_classifier import default_classifier
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".sections.json"
+
+# id: outline number ("2.1"; "0" for text before the first heading);
+# start/end: 0-based line range of the section's own lines, end exclusive
+Section = namedtuple("Section", ["id", "title", "level", "parent", "start", "end", "hash"])
+
+_MARKDOWN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+_CAPS = re.compile(r"^[A-Z][A-Z0-9 &/-]{3,}$")
+_LABEL = re.compile(r"^(.{1,80}):$")
+
+
+def heading_level(line: str):
+    """(level, title) if `line` looks like a heading, else None."""
+    line = line.strip()
+    if not line or default_classifier.is_requirement(line):
+        return None
+    match = _MARKDOWN.match(line)
+    if match:
+        return len(match.group(1)), match.group(2)
+    if _CAPS.match(line):
+        return 1, line
+    match = _LABEL.match(line)
+    if match:
+        return 2, match.group(1)
+    return None
+
+
+def _content_hash(lines) -> str:
+    # Insensitive to whitespace, like requirement hashes
+    return hashlib.sha256(" ".join(" ".join(lines).split()).encode("utf-8")).hexdigest()
+
+
+def build_sections(lines: list, heading_levels: dict = None) -> list:
+    """Sections of a document given as lines.
+
+    `heading_levels` maps line numbers to heading levels known from the
+    document itself; without it headings are detected from the text.
+    """
+    headings = []
+    for number, line in enumerate(lines):
+        if heading_levels is not None:
+            if number in heading_levels:
+                headings.append((number, heading_levels[number], line.strip()))
+            continue
+        found = heading_level(line)
+        if found:
+            headings.append((number, found[0], found[1]))
+
+    sections = []
+    if not headings or headings[0][0] > 0:
+        end = headings[0][0] if headings else len(lines)
+        if any(line.strip() for line in lines[:end]):
+            sections.append(Section("0", "", 0, None, 0, end, _content_hash(lines[:end])))
+
+    # Open headings by level, for parents and outline numbers
+    stack, counters = [], []
+    for n, (start, level, title) in enumerate(headings):
+        end = headings[n + 1][0] if n + 1 < len(headings) else len(lines)
+        while stack and stack[-1].level >= level:
+            stack.pop()
+        depth = len(stack)
+        del counters[depth + 1:]
+        if len(counters) == depth:
+            counters.append(0)
+        counters[depth] += 1
+        section = Section(".".join(map(str, counters[:depth + 1])), title, level,
+                          stack[-1].id if stack else None, start, end, _content_hash(lines[start:end]))
+        sections.append(section)
+        stack.append(section)
+    return sections
+
+
+def _text_hash(text: str) -> str:
+    # Exact apart from newline style, so any edit that moves lines makes the index stale
+    return hashlib.sha256(text.replace("\r\n", "\n").replace("\r", "\n").encode("utf-8")).hexdigest()
+
+
+def split_lines(text: str) -> list:
+    """Lines as reading the saved text file yields them (str.splitlines also breaks at form feeds)."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def index_path(text_path: str) -> str:
+    return text_path + INDEX_SUFFIX
+
+
+def write_section_index(text_path: str, text: str, heading_levels: dict = None) -> list:
+    """Index the extracted `text` saved at `text_path`; returns the sections."""
+    sections = build_sections(split_lines(text), heading_levels)
+    data = {"text_hash": _text_hash(text), "sections": [s._asdict() for s in sections]}
+    tmp_path = index_path(text_path) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, index_path(text_path))
+    return sections
+
+
+def load_section_index(text_path: str) -> list:
+    """Sections of the text file at `text_path`, re-indexed if the saved index is missing or stale."""
+    with open(text_path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    try:
+        with open(index_path(text_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data["text_hash"] == _text_hash(text):
+            return [Section(**s) for s in data["sections"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    # Heading styles of the original document are lost here; fall back to detecting them
+    logger.info("Re-indexing sections of %s", text_path)
+    return write_section_index(text_path, text)
+
+
+def section_texts(text: str, sections: list) -> list:
+    """The text of each section, from the already loaded document."""
+    lines = split_lines(text)
+    return ["\n".join(lines[section.start:section.end]) for section in sections]
@@ -0,0 +1,380 @@
+"""Streaming story generation and JSONL story files.
+
+Requirements are read in bounded blocks and stories are produced one at a
+time, appended to a JSONL file (one story per line), so memory stays flat
+however long the specification is. Readers iterate the file lazily; legacy
+files holding a single JSON array are still accepted.
+
+Each stories file has an offset index (``<file>.idx``), so one story or a page
+of stories is read with two seeks instead of a scan. Convert or re-index old
+files with::
+
+    python -m src.stories convert stories/stories_<file>
+"""
+from itertools import islice
+import argparse
+import json
+import logging
+import os
+import shutil
+import struct
+import tempfile
+
+from src.requirement_classifier import Requirement, RequirementClassifier, default_classifier
+from src.tracing import span
+
+logger = logging.getLogger(__name__)
+
+STORIES_EXTENSION = ".jsonl"
+# Requirements are read and classified in blocks of about this many characters
+READ_BLOCK_CHARS = 1 << 20
+# Stories shown at once by the UIs
+DISPLAY_LIMIT = int(os.getenv("SDLC_STORY_DISPLAY_LIMIT", "500"))
+
+# Offset index next to each stories file: header (magic, indexed data size), then one uint64 offset per story
+INDEX_SUFFIX = ".idx"
+_INDEX_MAGIC = b"SIDX0001"
+_INDEX_HEADER = struct.Struct("<8sQ")
+_OFFSET = struct.Struct("<Q")
+
+
+def stories_filename(uploaded_filename: str) -> str:
+    """Name of the stories file generated for an uploaded requirements file."""
+    return f"stories_{os.path.splitext(uploaded_filename)[0]}{STORIES_EXTENSION}"
+
+
+def iter_requirements(file_path: str, classifier: RequirementClassifier = default_classifier):
+    """Yield the requirement list items of a file, reading it a block of lines at a time."""
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        while True:
+            block = f.readlines(READ_BLOCK_CHARS)
+            if not block:
+                return
+            yield from classifier.iter_requirements(block)
+
+
+# Priority and points of a story nobody has estimated
+DEFAULT_PRIORITY = "Medium"
+DEFAULT_STORY_POINTS = 3
+
+SUMMARY_TEMPLATE = "As a user, I want to {want}"
+DESCRIPTION_TEMPLATE = """User Story:
+As a user,
+I want to {want}
+So that I can achieve my goal efficiently
+
+Acceptance Criteria:
+{criteria}
+
+Technical Notes:
+- Priority: {priority}
+- Story Points: {story_points}
+- Dependencies: None"""
+DEFAULT_CRITERIA = (
+    "The system should implement {requirement}",
+    "The feature should be user-friendly",
+    "The implementation should follow best practices",
+)
+
+
+def render_description(requirement: str, priority: str = DEFAULT_PRIORITY, story_points: int = DEFAULT_STORY_POINTS,
+                       criteria=DEFAULT_CRITERIA) -> str:
+    lines = "\n".join(f"{n}. {c.format(requirement=requirement)}" for n, c in enumerate(criteria, 1))
+    return DESCRIPTION_TEMPLATE.format(want=requirement.lower(), criteria=lines,
+                                       priority=priority, story_points=story_points)
+
+
+class Story:
+    """A user story holding only its variable fields.
+
+    summary and description are rendered from the templates when read, so the
+    template text is not copied into every story in memory or on disk. Stories
+    support read-only dict access (story["summary"], .get, in) for code written
+    against plain story dicts.
+    """
+
+    __slots__ = ("requirement", "priority", "story_points", "type", "requirement_hash",
+                 "_summary", "_description")
+
+    FIELDS = ("summary", "description", "priority", "story_points", "type", "requirement_hash")
+
+    def __init__(self, requirement: str, priority: str = DEFAULT_PRIORITY, story_points: int = DEFAULT_STORY_POINTS,
+                 type: str = "User Story", requirement_hash: str = None,
+                 summary: str = None, description: str = None):
+        self.requirement = requirement
+        self.priority = priority
+        self.story_points = story_points
+        self.type = type
+        self.requirement_hash = requirement_hash
+        # Set only for stories whose text did not come from the templates
+        self._summary = summary
+        self._description = description
+
+    @property
+    def summary(self) -> str:
+        if self._summary is not None:
+            return self._summary
+        return SUMMARY_TEMPLATE.format(want=self.requirement.lower())
+
+    @property
+    def description(self) -> str:
+        if self._description is not None:
+            return self._description
+        return render_description(self.requirement, self.priority, self.story_points)
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        if key in ("summary", "description"):
+            return True
+        return key in self.FIELDS and getattr(self, key) is not None
+
+    def to_dict(self) -> dict:
+        """Fully rendered story, e.g. for display."""
+        return {key: self[key] for key in self.FIELDS if key in self}
+
+    def to_record(self) -> dict:
+        """Compact form written to stories files."""
+        record = {"requirement": self.requirement, "priority": self.priority,
+                  "story_points": self.story_points, "type": self.type}
+        if self.requirement_hash:
+            record["requirement_hash"] = self.requirement_hash
+        if self._summary is not None:
+            record["summary"] = self._summary
+        if self._description is not None:
+            record["description"] = self._description
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Story":
+        """Build a Story from a compact record or a fully rendered story dict."""
+        if "requirement" in record:
+            return cls(**record)
+        # Rendered dicts (older stories files, LLM output) keep their text as-is
+        return cls(requirement=record.get("summary", ""), priority=record.get("priority", DEFAULT_PRIORITY),
+                   story_points=record.get("story_points", DEFAULT_STORY_POINTS), type=record.get("type", "User Story"),
+                   requirement_hash=record.get("requirement_hash"),
+                   summary=record.get("summary"), description=record.get("description"))
+
+    def __repr__(self) -> str:
+        return f"Story({self.requirement!r}, priority={self.priority!r}, story_points={self.story_points!r})"
+
+
+def story_from_requirement(requirement: Requirement) -> Story:
+    """Build a user story from a classified requirement."""
+    return Story(requirement.text)
+
+
+def generate_stories(requirements):
+    """Lazily turn requirements into stories."""
+    for requirement in requirements:
+        yield story_from_requirement(requirement)
+
+
+def index_path(stories_path: str) -> str:
+    return stories_path + INDEX_SUFFIX
+
+
+class _IndexWriter:
+    """Streams offsets into a temporary index, renamed over the real one on close.
+
+    Offsets go to disk as they are added, so writing an index takes constant
+    memory however many stories the file holds. Each writer has its own
+    temporary file, so concurrent rebuilds of one index don't write into
+    each other's.
+    """
+
+    def __init__(self, stories_path: str, append: bool = False):
+        self.path = index_path(stories_path)
+        fd, self.tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".",
+                                             suffix=".tmp", dir=os.path.dirname(self.path) or ".")
+        self._file = os.fdopen(fd, "wb")
+        if append:
+            # Existing offsets are copied, not loaded
+            with open(self.path, "rb") as old:
+                old.seek(_INDEX_HEADER.size)
+                self._file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, 0))
+                shutil.copyfileobj(old, self._file)
+        else:
+            self._file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, 0))
+        self._pack = _OFFSET.pack
+
+    def add(self, offset: int) -> None:
+        self._file.write(self._pack(offset))
+
+    def close(self, data_size: int) -> None:
+        # The header records the data size last, so an interrupted write never looks current
+        self._file.seek(0)
+        self._file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, data_size))
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        os.remove(self.tmp_path)
+
+
+def write_stories(stories_path: str, stories, append: bool = False) -> int:
+    """Write stories to a JSONL file as they are produced; returns the count written.
+
+    Story objects are written in their compact form. An offset index is written
+    next to the file so single stories and pages can be read without a scan.
+    """
+    if append and os.path.exists(stories_path):
+        _ensure_index(stories_path)
+    else:
+        append = False
+    count = 0
+    index = _IndexWriter(stories_path, append)
+    try:
+        with span("stories.write", path=stories_path), open(stories_path, "ab" if append else "wb") as f:
+            for story in stories:
+                if isinstance(story, Story):
+                    story = story.to_record()
+                index.add(f.tell())
+                f.write(json.dumps(story).encode("utf-8") + b"\n")
+                count += 1
+            data_size = f.tell()
+    except BaseException:
+        index.abort()
+        raise
+    index.close(data_size)
+    return count
+
+
+def _is_json_array(stories_path: str) -> bool:
+    with open(stories_path, "rb") as f:
+        head = f.read(64).lstrip()
+    return head[:1] == b"["
+
+
+def build_index(stories_path: str) -> int:
+    """(Re)build the offset index of a JSONL stories file; returns the story count."""
+    index, count, offset = _IndexWriter(stories_path), 0, 0
+    try:
+        with open(stories_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    index.add(offset)
+                    count += 1
+                offset += len(line)
+    except BaseException:
+        index.abort()
+        raise
+    index.close(offset)
+    return count
+
+
+def _index_is_current(stories_path: str) -> bool:
+    try:
+        with open(index_path(stories_path), "rb") as f:
+            magic, data_size = _INDEX_HEADER.unpack(f.read(_INDEX_HEADER.size))
+    except (OSError, struct.error):
+        return False
+    return magic == _INDEX_MAGIC and data_size == os.path.getsize(stories_path)
+
+
+def _ensure_index(stories_path: str) -> None:
+    if not _index_is_current(stories_path):
+        if _is_json_array(stories_path):
+            raise ValueError(f"{stories_path} is a JSON array; convert it with python -m src.stories convert")
+        build_index(stories_path)
+
+
+def story_count(stories_path: str) -> int:
+    _ensure_index(stories_path)
+    return (os.path.getsize(index_path(stories_path)) - _INDEX_HEADER.size) // _OFFSET.size
+
+
+def read_page(stories_path: str, start: int = 0, count: int = None) -> list:
+    """Stories start..start+count-1 (to the end if count is None), read via the index."""
+    if not _index_is_current(stories_path) and _is_json_array(stories_path):
+        # Legacy JSON arrays have no index; convert them for random access
+        return list(islice(iter_stories(stories_path), start, None if count is None else start + count))
+    _ensure_index(stories_path)
+    with open(index_path(stories_path), "rb") as index:
+        index.seek(_INDEX_HEADER.size + start * _OFFSET.size)
+        raw = index.read(_OFFSET.size) if count is None else index.read((count + 1) * _OFFSET.size)
+    if len(raw) < _OFFSET.size:
+        return []
+    first = _OFFSET.unpack_from(raw)[0]
+    # The offset after the page bounds the read; past the last story, read to the end
+    end = _OFFSET.unpack_from(raw, count * _OFFSET.size)[0] if count and len(raw) > count * _OFFSET.size else None
+    with open(stories_path, "rb") as f:
+        f.seek(first)
+        data = f.read() if end is None else f.read(end - first)
+    lines = [line for line in data.splitlines() if line.strip()]
+    if count is not None:
+        lines = lines[:count]
+    return [Story.from_record(json.loads(line)) for line in lines]
+
+
+def read_story(stories_path: str, position: int) -> Story:
+    """Story at `position` (0-based) in the file; IndexError if there is none."""
+    page = read_page(stories_path, position, 1) if position >= 0 else []
+    if not page:
+        raise IndexError(f"No story {position} in {stories_path}")
+    return page[0]
+
+
+def convert_stories(source_path: str, target_path: str = None) -> str:
+    """Write a stories file (legacy JSON array or JSONL) as indexed JSONL; returns the new path."""
+    if target_path is None:
+        target_path = os.path.splitext(source_path)[0] + STORIES_EXTENSION
+    if os.path.abspath(target_path) == os.path.abspath(source_path):
+        build_index(source_path)
+        return source_path
+    write_stories(target_path, iter_stories(source_path))
+    return target_path
+
+
+def iter_stories(stories_path: str):
+    """Yield stories from a JSONL stories file (or a legacy JSON array) one at a time."""
+    # No span here: it would stay open across yields and adopt the consumer's spans
+    with open(stories_path, "r") as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        if head == "[":
+            f.seek(0)
+            for record in json.load(f):
+                yield Story.from_record(record)
+            return
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield Story.from_record(json.loads(line))
+
+
+def load_stories(stories_path: str, limit: int = None, start: int = 0) -> list:
+    """A page of stories (all by default) rendered as dicts, e.g. for display."""
+    return [story.to_dict() for story in read_page(stories_path, start, limit)]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Convert or index stories files")
+    parser.add_argument("command", choices=["convert", "index"])
+    parser.add_argument("paths", nargs="+", help="stories files")
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        if args.command == "convert":
+            target = convert_stories(path)
+            print(f"{path} -> {target} ({story_count(target)} stories)")
+        else:
+            print(f"{path}: indexed {build_index(path)} stories")
+
+
+if __name__ == "__main__":
+    main()
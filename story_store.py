@@ -0,0 +1,234 @@
+"""Content-addressed store of generated stories, keyed by requirement hash.
+
+Each requirement is normalized (case and whitespace, list marker dropped) and
+hashed. A story is only built for hashes the store has not seen before; the
+rest are reused. The store also remembers which hashes each uploaded file
+produced last time, so a re-upload reports what was added, removed and left
+unchanged. Stories refined by the LLM are also recorded per document section,
+so an edited re-upload only sends new or changed sections to the LLM. Which
+stories already have a Jira issue is the Jira ledger's job.
+"""
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from src.stories import Story
+
+logger = logging.getLogger(__name__)
+
+project_root = str(Path(__file__).parent.parent)
+STORE_PATH = os.getenv("SDLC_STORY_STORE_PATH", os.path.join(project_root, "cache", "stories.sqlite3"))
+STORE_ENABLED = os.getenv("SDLC_STORY_STORE", "1") == "1"
+# Rows buffered per revision and written in one short transaction
+COMMIT_EVERY = 10_000
+
+
+def requirement_key(text: str) -> str:
+    """Hash of a requirement's text, insensitive to case and whitespace."""
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+class StoryStore:
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._uri = None
+        else:
+            # Revisions open their own connections, which must see the same database
+            self._uri = f"file:story_store_{id(self)}?mode=memory&cache=shared"
+        self._conn = self._connect()
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS stories ("
+            "hash TEXT PRIMARY KEY, story TEXT NOT NULL, issue_key TEXT, created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS manifests ("
+            "source TEXT NOT NULL, revision INTEGER NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (source, revision, hash));"
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "source TEXT PRIMARY KEY, revision INTEGER NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS revisions ("
+            "source TEXT NOT NULL, revision INTEGER NOT NULL, PRIMARY KEY (source, revision));"
+            "CREATE TABLE IF NOT EXISTS sections ("
+            "hash TEXT PRIMARY KEY, stories TEXT NOT NULL, created_at REAL NOT NULL);"
+        )
+        self._conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._uri is not None:
+            return sqlite3.connect(self._uri, uri=True, check_same_thread=False, timeout=30)
+        return sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+
+    def revision(self, source: str) -> "StoryRevision":
+        """Start recording a new upload of `source` (e.g. the requirements filename)."""
+        return StoryRevision(self, source)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class StoryRevision:
+    """One upload of a source file; use as a context manager and call finish().
+
+    Each revision writes through its own connection, in short transactions that
+    are never left open between calls, so uploads recorded at the same time
+    neither block nor commit or roll back each other.
+    """
+
+    def __init__(self, store: StoryStore, source: str):
+        self.store = store
+        self.source = source
+        self.previous = None
+        self.reused = 0
+        self.generated = 0
+        self._manifest = []
+        # hash -> story record built since the last flush
+        self._stories = {}
+        # section hash -> JSON list of its story hashes, since the last flush
+        self._sections = {}
+        self._lock = threading.Lock()
+        self._conn = conn = store._connect()
+        # Allocated and reserved in one write transaction, so concurrent uploads get distinct numbers
+        conn.execute("BEGIN IMMEDIATE")
+        self.number = conn.execute(
+            "SELECT MAX(COALESCE((SELECT MAX(revision) FROM revisions WHERE source = ?), 0), "
+            "COALESCE((SELECT MAX(revision) FROM manifests WHERE source = ?), 0), "
+            "COALESCE((SELECT revision FROM sources WHERE source = ?), 0)) + 1",
+            (source, source, source),
+        ).fetchone()[0]
+        conn.execute("INSERT INTO revisions (source, revision) VALUES (?, ?)", (source, self.number))
+        conn.commit()
+
+    def story_for(self, requirement, build) -> Story:
+        """Cached story for `requirement`, or `build(requirement)` stored under its hash."""
+        digest = requirement_key(requirement.text)
+        with self._lock:
+            self._manifest.append((self.source, self.number, digest))
+            record = self._record(digest)
+            if record is not None:
+                self.reused += 1
+                self._maybe_flush()
+                return Story.from_record(record)
+        story = build(requirement)
+        story.requirement_hash = digest
+        with self._lock:
+            self._stories[digest] = story.to_record()
+            self._maybe_flush()
+        self.generated += 1
+        return story
+
+    def _record(self, digest: str):
+        """Stored (or not yet flushed) story record for a hash, or None."""
+        record = self._stories.get(digest)
+        if record is None:
+            row = self._conn.execute("SELECT story FROM stories WHERE hash = ?", (digest,)).fetchone()
+            record = row and json.loads(row[0])
+        return record
+
+    def section_stories(self, section: str) -> list:
+        """Stories recorded for a document section with this text, or None if it has not been seen."""
+        key = requirement_key(section)
+        with self._lock:
+            hashes = self._sections.get(key)
+            if hashes is None:
+                row = self._conn.execute("SELECT stories FROM sections WHERE hash = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                hashes = row[0]
+            records = [self._record(digest) for digest in json.loads(hashes)]
+            if any(record is None for record in records):
+                return None
+            self._manifest.extend((self.source, self.number, digest) for digest in json.loads(hashes))
+            self.reused += len(records)
+            self._maybe_flush()
+        return [Story.from_record(record) for record in records]
+
+    def add_stories(self, stories: list, section: str = None) -> None:
+        """Record stories built for this upload, as the stories of `section` if it is given."""
+        with self._lock:
+            for story in stories:
+                self._stories[story.requirement_hash] = story.to_record()
+                self._manifest.append((self.source, self.number, story.requirement_hash))
+            if section is not None:
+                self._sections[requirement_key(section)] = json.dumps([story.requirement_hash for story in stories])
+            self.generated += len(stories)
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if len(self._manifest) >= COMMIT_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        # Manifest rows of an unfinished revision are ignored until finish(), so partial writes are safe
+        now = time.time()
+        self._conn.executemany("INSERT OR IGNORE INTO stories (hash, story, created_at) VALUES (?, ?, ?)",
+                               [(digest, json.dumps(record), now) for digest, record in self._stories.items()])
+        self._conn.executemany("INSERT OR REPLACE INTO sections (hash, stories, created_at) VALUES (?, ?, ?)",
+                               [(key, hashes, now) for key, hashes in self._sections.items()])
+        self._conn.executemany("INSERT OR IGNORE INTO manifests (source, revision, hash) VALUES (?, ?, ?)",
+                               self._manifest)
+        self._conn.commit()
+        self._manifest.clear()
+        self._stories.clear()
+        self._sections.clear()
+
+    def finish(self) -> dict:
+        """Make this upload the source's current revision; returns the change counts."""
+        conn = self._conn
+        with self._lock:
+            self._flush()
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT revision FROM sources WHERE source = ?", (self.source,)).fetchone()
+            self.previous = row[0] if row else None
+            total = conn.execute("SELECT COUNT(*) FROM manifests WHERE source = ? AND revision = ?",
+                                 (self.source, self.number)).fetchone()[0]
+            unchanged = previous_total = 0
+            if self.previous is not None:
+                previous_total = conn.execute("SELECT COUNT(*) FROM manifests WHERE source = ? AND revision = ?",
+                                              (self.source, self.previous)).fetchone()[0]
+                unchanged = conn.execute(
+                    "SELECT COUNT(*) FROM manifests cur JOIN manifests prev "
+                    "ON prev.source = cur.source AND prev.hash = cur.hash AND prev.revision = ? "
+                    "WHERE cur.source = ? AND cur.revision = ?",
+                    (self.previous, self.source, self.number),
+                ).fetchone()[0]
+                conn.execute("DELETE FROM manifests WHERE source = ? AND revision = ?", (self.source, self.previous))
+            conn.execute("INSERT OR REPLACE INTO sources (source, revision, updated_at) VALUES (?, ?, ?)",
+                         (self.source, self.number, time.time()))
+            conn.execute("DELETE FROM revisions WHERE source = ? AND revision = ?", (self.source, self.number))
+            conn.commit()
+            conn.close()
+        return {
+            "added": total - unchanged,
+            "removed": previous_total - unchanged,
+            "unchanged": unchanged,
+            "generated": self.generated,
+            "reused": self.reused,
+        }
+
+    def abort(self) -> None:
+        conn = self._conn
+        with self._lock:
+            conn.rollback()
+            self._manifest.clear()
+            self._stories.clear()
+            self._sections.clear()
+            conn.execute("DELETE FROM manifests WHERE source = ? AND revision = ?", (self.source, self.number))
+            conn.execute("DELETE FROM revisions WHERE source = ? AND revision = ?", (self.source, self.number))
+            conn.commit()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+
+
+story_store = StoryStore() if STORE_ENABLED else None
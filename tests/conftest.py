@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The package is imported as src.*, from the directory that contains it
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
@@ -0,0 +1,26 @@
+import sys
+import types
+
+from src import batch
+from src import document_processor
+
+
+def test_files_sharing_a_stem_get_separate_inputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "INPUT_DIR", str(tmp_path / "input"))
+
+    def save_extracted_text(content, filename, output_path):
+        with open(output_path, "wb") as f:
+            f.write(content)
+
+    started = []
+    orchestrator = types.SimpleNamespace(start_agent_workflow=lambda path, **kw: started.append(path),
+                                         continue_workflow=None)
+    monkeypatch.setattr(document_processor, "save_extracted_text", save_extracted_text)
+    monkeypatch.setitem(sys.modules, "src.orchestrator", orchestrator)
+
+    for name in ("spec.pdf", "spec.docx"):
+        (tmp_path / name).write_bytes(name.encode())
+        batch.process_file(str(tmp_path / name))
+
+    assert len(set(started)) == 2
+    assert sorted(open(path, "rb").read() for path in started) == [b"spec.docx", b"spec.pdf"]
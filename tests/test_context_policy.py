@@ -0,0 +1,43 @@
+from src.context_policy import ContextPolicy, ContextStats, compact_tool_result
+
+
+def chat(*roles):
+    return [{"role": role, "content": f"{role} message {n}"} for n, role in enumerate(roles)]
+
+
+def test_window_keeps_task_and_latest_turns():
+    messages = chat("user", "assistant", "user", "assistant", "user", "assistant")
+
+    kept = ContextPolicy(window=3, keep_tool_results=10).apply_transform(messages)
+
+    assert kept == [messages[0], messages[4], messages[5]]
+
+
+def test_window_does_not_open_on_orphaned_tool_output():
+    messages = chat("user", "assistant", "assistant", "tool", "assistant")
+
+    kept = ContextPolicy(window=3, keep_tool_results=10).apply_transform(messages)
+
+    assert kept == [messages[0], messages[4]]
+
+
+def test_only_latest_tool_results_are_kept_whole():
+    long_result = "Stories written to stories/stories_spec.jsonl " + "x" * 400
+    messages = [{"role": "user", "content": "task"},
+                {"role": "tool", "content": long_result, "tool_responses": [{"content": long_result}]},
+                {"role": "tool", "content": long_result}]
+    stats = ContextStats()
+
+    kept = ContextPolicy(window=0, keep_tool_results=1, summary_chars=100, stats=stats).apply_transform(messages)
+
+    compacted = "[tool result compacted, see artifact stories/stories_spec.jsonl]"
+    assert kept[1]["content"] == compacted and kept[1]["tool_responses"][0]["content"] == compacted
+    assert kept[2]["content"] == long_result
+    # The stored history is left alone
+    assert messages[1]["content"] == long_result
+    assert stats.calls == 1 and stats.tokens_saved > 0
+
+
+def test_compaction_without_artifact_keeps_a_prefix():
+    assert compact_tool_result("short", 10) == "short"
+    assert compact_tool_result("a" * 30, 10) == "a" * 10 + "... [tool result compacted, 20 chars omitted]"
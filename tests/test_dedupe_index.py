@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from src.dedupe_index import DedupeIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupeIndex(str(tmp_path / "dedupe.sqlite3"))
+    yield index
+    index.close()
+
+
+def story(text):
+    return {"summary": f"As a user, I want to {text}"}
+
+
+def test_concurrent_near_duplicates_see_each_other(index):
+    both_creating = threading.Barrier(2, timeout=5)
+    results = []
+
+    def create(s):
+        # Neither create finishes before the other story has been checked
+        both_creating.wait()
+        return s["summary"][-1]
+
+    def check(text):
+        results.append(index.check_and_add(story(text), create))
+
+    threads = [threading.Thread(target=check, args=(text,))
+               for text in ("export monthly sales reports as a csv file A", "export monthly sales reports as a csv file B")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(key for key, _ in results) == ["A", "B"]
+    assert [duplicate is not None for _, duplicate in results].count(True) == 1
+    assert len(index) == 2
+
+
+def test_failed_create_releases_reservation(index):
+    def fail(s):
+        raise RuntimeError("Jira is down")
+
+    with pytest.raises(RuntimeError):
+        index.check_and_add(story("archive old projects"), fail)
+
+    assert len(index) == 0
+    assert index.check_and_add(story("archive old projects"), lambda s: "PROJ-1") == ("PROJ-1", None)
+
+
+def test_merge_reuses_duplicate_issue(index):
+    index.check_and_add(story("reset my password with a link sent by email"), lambda s: "PROJ-1")
+
+    issue_key, duplicate = index.check_and_add(
+        story("reset my password with a link sent by e-mail"), lambda s: "PROJ-2", merge=True)
+
+    assert issue_key == "PROJ-1" and duplicate.issue_key == "PROJ-1"
@@ -0,0 +1,34 @@
+from src.estimator import StoryEstimator
+from src.stories import Story
+
+HIGH = ["fix the security hole in login", "patch the login security token leak", "block security attacks on login"]
+LOW = ["change the footer colour", "tweak the footer font", "align the footer links"]
+
+
+def training_set():
+    stories = [Story(text, "High", 8) for text in HIGH] + [Story(text, "Low", 1) for text in LOW]
+    # Template stories nobody estimated
+    stories += [Story(f"export report number {n}") for n in range(50)]
+    return stories * 5
+
+
+def test_fit_skips_template_defaults():
+    assert StoryEstimator().fit(training_set()) == 30
+
+
+def test_unfamiliar_held_out_story_goes_to_fallback():
+    model = StoryEstimator(confidence=0.6)
+    model.fit(training_set())
+    asked = []
+
+    def fallback(story):
+        asked.append(story.requirement)
+        return "Medium", 5
+
+    familiar, unfamiliar = Story("fix a login security bug"), Story("export report number 7 as a spreadsheet")
+
+    assert model.apply(familiar, fallback) == "model"
+    assert (familiar.priority, familiar.story_points) == ("High", 8)
+    assert model.apply(unfamiliar, fallback) == "llm"
+    assert asked == [unfamiliar.requirement]
+    assert (unfamiliar.priority, unfamiliar.story_points) == ("Medium", 5)
@@ -0,0 +1,177 @@
+import functools
+import threading
+import time
+
+import pytest
+
+from src import tracing
+from src.jira_stub_server import start_stub_server
+from src.rate_limiter import FairScheduler
+from src.tools import jira_create_tool
+from src.tools.jira_create_tool import BulkResult, JiraError, MetadataCache
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """A stub Jira the tool points at, with fresh metadata cache and scheduler."""
+    servers = []
+
+    def start(**options):
+        server, url = start_stub_server(**options)
+        servers.append((server, url))
+        monkeypatch.setattr(jira_create_tool, "JIRA_URL", url)
+        monkeypatch.setattr(jira_create_tool, "JIRA_PROJECT_KEY", "SDLC")
+        monkeypatch.setattr(jira_create_tool, "JIRA_ISSUE_TYPE", "Story")
+        monkeypatch.setattr(jira_create_tool, "createmeta_cache", MetadataCache(path=""))
+        monkeypatch.setattr(jira_create_tool, "jira_scheduler", FairScheduler(0))
+        return server.jira
+
+    yield start
+    for server, url in servers:
+        jira_create_tool.connection_pool(url).close()
+        server.shutdown()
+        server.server_close()
+
+
+def story(summary, **extra):
+    return {"summary": summary, "description": f"As a user, {summary}", **extra}
+
+
+def test_bulk_results_follow_request_order(stub):
+    jira = stub()
+    stories = [story("Login"), story(""), story("Logout"), story("x" * 300), story("Reset password")]
+
+    results = jira_create_tool.create_jira_stories(stories)
+
+    assert [r.index for r in results] == list(range(5))
+    assert [r.issue_key is None for r in results] == [False, True, False, True, False]
+    assert "summary" in results[1].error and "summary" in results[3].error
+    for result in results:
+        if result.issue_key:
+            assert jira.issues[result.issue_key]["summary"] == stories[result.index]["summary"]
+    assert len(jira.issues) == 3
+
+
+def test_partial_failure_across_batches(stub):
+    jira = stub()
+    stories = [story(f"Story {i}") for i in range(7)]
+    stories[3] = story("")
+    batches = []
+
+    results = jira_create_tool.create_jira_stories(stories, batch_size=2, in_flight=3, on_batch=batches.append)
+
+    assert sorted(len(batch) for batch in batches) == [1, 2, 2, 2]
+    assert sorted(r.index for batch in batches for r in batch) == list(range(7))
+    assert [r.index for r in results if r.error] == [3]
+    assert {jira.issues[r.issue_key]["summary"] for r in results if r.issue_key} == \
+        {s["summary"] for i, s in enumerate(stories) if i != 3}
+
+
+def test_whole_batch_rejected_without_issues(stub):
+    jira = stub()
+
+    results = jira_create_tool.create_jira_stories([story(""), story(" ")])
+
+    assert all(r.issue_key is None and "summary" in r.error for r in results)
+    assert jira.issues == {}
+
+
+def test_stale_metadata_retries_only_schema_failures(stub, monkeypatch):
+    jira = stub()
+    sent, post = [], jira_create_tool._post
+
+    def spy(path, payload, accept_error=False):
+        sent.append([fields["fields"]["summary"] for fields in payload["issueUpdates"]])
+        return post(path, payload, accept_error)
+
+    monkeypatch.setattr(jira_create_tool, "_post", spy)
+    jira_create_tool.createmeta_cache.get()
+    # The project's story points field was replaced after the metadata was cached
+    jira.story_points_field = "customfield_20000"
+    stories = [story("Estimated", story_points=3), story(""), story("Unestimated")]
+
+    results = jira_create_tool.create_jira_stories(stories)
+
+    assert results[0].issue_key and results[2].issue_key
+    assert results[1].issue_key is None and "summary" in results[1].error
+    assert jira.issues[results[0].issue_key]["customfield_20000"] == 3.0
+    assert sorted(issue["summary"] for issue in jira.issues.values()) == ["Estimated", "Unestimated"]
+    assert sent == [["Estimated", "", "Unestimated"], ["Estimated"]]
+    assert jira_create_tool.createmeta_cache.fetches == 2
+
+
+def test_request_level_errors_fail_every_item(stub, monkeypatch):
+    stub()
+    calls = []
+
+    def post(path, payload, accept_error=False):
+        calls.append(len(payload["issueUpdates"]))
+        return 400, {"errorMessages": ["Bulk create is disabled"], "errors": {"project": "project is required"}}
+
+    monkeypatch.setattr(jira_create_tool, "_post", post)
+
+    results = jira_create_tool.create_jira_stories([story("Login"), story("Logout")])
+
+    assert results == [BulkResult(0, None, "Bulk create is disabled; project: project is required"),
+                       BulkResult(1, None, "Bulk create is disabled; project: project is required")]
+    # A project error may be stale metadata: refreshed and resent once, not again
+    assert calls == [2, 2]
+
+
+def test_single_create_reports_field_errors(stub):
+    stub()
+
+    assert jira_create_tool.create_jira_story(story("Login")).startswith("SDLC-")
+    with pytest.raises(JiraError) as error:
+        jira_create_tool.create_jira_story(story(""))
+    assert error.value.status == 400
+
+
+def test_throttled_requests_wait_for_retry_after(stub):
+    jira = stub(rate_limit=2)
+    stories = [story(f"Story {i}") for i in range(4)]
+
+    started = time.monotonic()
+    results = jira_create_tool.create_jira_stories(stories, batch_size=1, in_flight=1)
+
+    # Five requests (metadata and four creates) against two per second: at least one 429
+    assert jira.throttled >= 1
+    assert jira_create_tool.jira_scheduler.stats()["throttled"] == jira.throttled
+    assert time.monotonic() - started >= 1.0
+    assert [jira.issues[r.issue_key]["summary"] for r in results] == [s["summary"] for s in stories]
+
+
+def test_throttling_beyond_retries_raises(stub, monkeypatch):
+    jira = stub(rate_limit=1)
+    monkeypatch.setattr(jira_create_tool, "MAX_RETRIES", 0)
+
+    with pytest.raises(JiraError) as error:
+        for i in range(3):
+            jira_create_tool.create_jira_story(story(f"Story {i}"))
+    assert error.value.status == 429
+    assert len(jira.issues) < 3
+
+
+def test_workflows_share_the_rate_evenly(stub, monkeypatch, tmp_path):
+    jira = stub()
+    monkeypatch.setattr(tracing, "Trace", functools.partial(tracing.Trace, trace_dir=str(tmp_path)))
+    monkeypatch.setattr(jira_create_tool, "jira_scheduler", FairScheduler(rate=20, burst=1))
+    jira_create_tool.createmeta_cache.get()
+
+    def workflow(run_id, count):
+        with tracing.trace_run(run_id):
+            jira_create_tool.create_jira_stories([story(f"{run_id} {i}") for i in range(count)],
+                                                 batch_size=1, in_flight=count)
+
+    big = threading.Thread(target=workflow, args=("big", 8))
+    small = threading.Thread(target=workflow, args=("small", 2))
+    big.start()
+    time.sleep(0.05)
+    small.start()
+    big.join()
+    small.join()
+
+    order = [issue["summary"].split()[0] for issue in jira.issues.values()]
+    assert sorted(order) == ["big"] * 8 + ["small"] * 2
+    # Served in turns with the run already queued, not after all of its requests
+    assert [i for i, run_id in enumerate(order) if run_id == "small"][-1] <= 5
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from src.jira_ledger import JiraLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = JiraLedger(str(tmp_path / "ledger.sqlite3"))
+    yield ledger
+    ledger.close()
+
+
+STORIES = [{"summary": f"As a user, I want to do thing {n}", "description": f"Thing {n}"} for n in range(3)]
+
+
+def test_rerun_after_partial_failure_only_creates_missing_issues(ledger):
+    created, failing = [], {STORIES[1]["summary"]}
+
+    def create(story):
+        if story["summary"] in failing:
+            raise RuntimeError("Jira is down")
+        created.append(story["summary"])
+        return f"PROJ-{len(created)}"
+
+    with pytest.raises(RuntimeError):
+        for story in STORIES:
+            ledger.issue_for(story, create, "stories.jsonl")
+    assert len(ledger) == 1
+
+    failing.clear()
+    keys = [ledger.issue_for(story, create, "stories.jsonl") for story in STORIES]
+
+    assert keys == ["PROJ-1", "PROJ-2", "PROJ-3"]
+    assert created == [story["summary"] for story in STORIES]
+
+
+def test_concurrent_identical_stories_create_one_issue(ledger):
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    def create(story):
+        calls.append(story)
+        started.set()
+        release.wait(5)
+        return "PROJ-7"
+
+    keys = []
+    threads = [threading.Thread(target=lambda: keys.append(ledger.issue_for(STORIES[0], create, "s.jsonl")))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert keys == ["PROJ-7"] * 4
+
+
+def test_waiters_see_the_creators_failure(ledger):
+    started, release = threading.Event(), threading.Event()
+
+    def fail(story):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("Jira is down")
+
+    errors = []
+
+    def run():
+        try:
+            ledger.issue_for(STORIES[0], fail)
+        except RuntimeError as e:
+            errors.append(e)
+
+    first = threading.Thread(target=run)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=run)
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+
+    assert len(errors) == 2
+    assert ledger.issue_for(STORIES[0], lambda s: "PROJ-9") == "PROJ-9"
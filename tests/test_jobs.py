@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+from src.jobs import FAILED, SUCCEEDED, JobRunner
+
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(max_workers=2, ttl=0)
+    yield runner
+    runner.shutdown()
+
+
+def test_finished_jobs_are_evicted_after_ttl(runner):
+    done = runner.submit(lambda job: "result")
+    runner.get(done).future.result()
+    assert runner.get(done).status == SUCCEEDED
+
+    release = threading.Event()
+    running = runner.submit(lambda job: release.wait(5))
+    runner.submit(lambda job: None)
+
+    assert runner.get(done) is None
+    assert runner.get(running) is not None
+    release.set()
+
+
+def test_failed_jobs_are_kept_until_ttl():
+    runner = JobRunner(max_workers=1, ttl=3600)
+    try:
+        failed = runner.submit(lambda job: 1 / 0)
+        runner.get(failed).future.result()
+        runner.submit(lambda job: None)
+
+        job = runner.get(failed)
+        assert job.status == FAILED and "division" in job.error
+        assert job.finished_at is not None
+    finally:
+        runner.shutdown()
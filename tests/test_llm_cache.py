@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from src.llm_cache import LLMCache, normalize_key
+
+
+def key(content, **extra):
+    return json.dumps({"messages": [{"role": "user", "content": content, **extra}], "model": "m"})
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "llm_cache.sqlite3")
+
+
+@pytest.fixture
+def cache(path):
+    cache = LLMCache(path, bypass=())
+    yield cache
+    cache.close()
+
+
+def test_hits_and_misses_are_counted_per_agent(cache):
+    assert cache.get(key("Write stories"), agent_name="BA_Agent") is None
+    cache.set(key("Write stories"), {"content": "stories"}, agent_name="BA_Agent")
+
+    assert cache.get(key("Write stories"), agent_name="Coder_Agent") == {"content": "stories"}
+    stats = cache.stats()
+    assert stats["agents"] == {"BA_Agent": {"hits": 0, "misses": 1, "bypassed": 0},
+                               "Coder_Agent": {"hits": 1, "misses": 0, "bypassed": 0}}
+    assert stats["hit_rate"] == 0.5
+
+
+def test_key_ignores_whitespace_and_tool_call_ids():
+    assert normalize_key(key("Write stories\r\n")) == normalize_key(key("  Write stories"))
+    assert normalize_key(key("Done", tool_call_id="call_1")) == normalize_key(key("Done", tool_call_id="call_2"))
+    assert normalize_key(key("Write stories")) != normalize_key(key("Write code"))
+
+
+def test_least_recently_used_entries_are_evicted(path):
+    cache = LLMCache(path, max_bytes=300, bypass=())
+    for name in ("a", "b", "c"):
+        cache.set(key(name), "x" * 80)
+    cache.get(key("a"))
+    cache.set(key("d"), "x" * 80)
+
+    assert cache.get(key("a")) is not None and cache.get(key("b")) is None
+    assert cache.stats()["size_bytes"] <= 300
+
+
+def test_size_is_shared_by_caches_on_the_same_file(path):
+    # Like batch workers in separate processes, each with its own connection
+    first, second = LLMCache(path, max_bytes=300, bypass=()), LLMCache(path, max_bytes=300, bypass=())
+    first.set(key("a"), "x" * 80)
+    second.set(key("b"), "x" * 80)
+    first.set(key("c"), "x" * 80)
+    second.set(key("d"), "x" * 80)
+
+    assert first.stats()["size_bytes"] == second.stats()["size_bytes"] <= 300
+    assert first.get(key("a")) is None and second.get(key("d")) is not None
+
+
+def test_bypassed_agents_always_miss(path):
+    cache = LLMCache(path, bypass={"Coder_Agent"})
+    cache.set(key("Write code"), "code", agent_name="Coder_Agent")
+
+    assert cache.get(key("Write code"), agent_name="Coder_Agent") is None
+    assert cache.get(key("Write code"), agent_name="BA_Agent") is None
+    assert cache.stats()["totals"] == {"hits": 0, "misses": 1, "bypassed": 1}
@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from src import pipeline
+from src.pipeline import Stage, StageScheduler
+
+
+def run_with_timeout(scheduler, items, timeout=10):
+    """scheduler.run(items), failing the test instead of hanging if it never returns."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["results"] = scheduler.run(items)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "scheduler did not finish"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["results"]
+
+
+def stage_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("stage-")]
+
+
+def test_results_are_in_input_order():
+    def create(index, value):
+        # Later items finish the first stage sooner
+        time.sleep(0.01 * (5 - index))
+        return value * 10
+
+    scheduler = StageScheduler([Stage("jira", create, 2), Stage("code", lambda i, v: v + 1, 1)])
+    results = run_with_timeout(scheduler, iter(range(5)))
+
+    assert [r.index for r in results] == list(range(5))
+    assert [r.value for r in results] == [1, 11, 21, 31, 41]
+    assert all(r.failed_stage is None and r.error is None for r in results)
+
+
+def test_a_failed_stage_fails_only_that_item():
+    calls = []
+
+    def create(index, value):
+        if index == 1:
+            raise ValueError("no project")
+        return value
+
+    def code(index, value):
+        calls.append(index)
+        return value
+
+    results = run_with_timeout(StageScheduler([Stage("jira", create, 2), Stage("code", code, 2)]), range(3))
+
+    assert [r.failed_stage for r in results] == [None, "jira", None]
+    assert isinstance(results[1].error, ValueError) and results[1].value is None
+    assert sorted(calls) == [0, 2]
+
+
+def test_input_is_read_at_most_max_in_flight_ahead():
+    release = threading.Event()
+    read = []
+
+    def items():
+        for i in range(6):
+            read.append(i)
+            yield i
+
+    scheduler = StageScheduler([Stage("slow", lambda i, v: release.wait(5) and v, 1)], max_in_flight=2)
+    thread = threading.Thread(target=scheduler.run, args=(items(),))
+    thread.start()
+    time.sleep(0.1)
+    assert read == [0, 1, 2]  # the third item waits for a free slot
+    release.set()
+    thread.join(5)
+    assert read == list(range(6))
+
+
+def test_pools_are_shut_down_after_a_run():
+    run_with_timeout(StageScheduler([Stage("a", lambda i, v: v, 2), Stage("b", lambda i, v: v, 2)]), range(4))
+    assert not stage_threads()
+
+
+def test_a_failing_input_iterator_shuts_the_pools_down():
+    def items():
+        yield 1
+        raise OSError("input went away")
+
+    with pytest.raises(OSError):
+        run_with_timeout(StageScheduler([Stage("a", lambda i, v: v, 2)]), items())
+    assert not stage_threads()
+
+
+def test_a_shut_down_stage_fails_its_items_instead_of_hanging(monkeypatch):
+    def executor(max_workers, thread_name_prefix):
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        if thread_name_prefix == "stage-code":
+            pool.shutdown()
+        return pool
+
+    monkeypatch.setattr(pipeline, "ThreadPoolExecutor", executor)
+    scheduler = StageScheduler([Stage("jira", lambda i, v: v, 2), Stage("code", lambda i, v: v, 1)])
+    results = run_with_timeout(scheduler, range(3))
+
+    assert [r.failed_stage for r in results] == ["code"] * 3
+    assert all(isinstance(r.error, RuntimeError) for r in results)
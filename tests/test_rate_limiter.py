@@ -0,0 +1,39 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import time
+
+import pytest
+
+from src.rate_limiter import FairScheduler, backoff_delay, parse_retry_after
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3", 3.0),
+    (" 1.5 ", 1.5),
+    ("-2", 0.0),
+    (None, None),
+    ("soon", None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 <= parse_retry_after(format_datetime(when, usegmt=True)) <= 30
+
+
+def test_backoff_delay_honours_retry_after():
+    assert all(2.0 <= backoff_delay(attempt, retry_after=2.0) <= 2.2 for attempt in range(5))
+    assert all(0 <= backoff_delay(attempt, cap=4.0) <= 4.0 for attempt in range(10))
+
+
+def test_throttle_pauses_every_caller():
+    scheduler = FairScheduler(0)
+    scheduler.throttle(0.2)
+
+    started = time.monotonic()
+    scheduler.acquire("run-1")
+
+    assert time.monotonic() - started >= 0.2
+    assert scheduler.stats()["throttled"] == 1
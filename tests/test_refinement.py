@@ -0,0 +1,141 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from src import refinement
+from src.refinement import ChunkRefiner, chunk_text, refine_document
+from src.story_store import StoryStore
+
+
+class FakeLLM:
+    """Turns each "- " line of the excerpt into a story, tagged with its [S<n>] section."""
+
+    def __init__(self, tag_sections=True):
+        self.tag_sections = tag_sections
+        self.sent = []
+
+    def create(self, messages, cache=None):
+        items, section = [], None
+        for line in messages[-1]["content"].split("EXCERPT:\n", 1)[1].splitlines():
+            match = re.match(r"\[S(\d+)\]$", line)
+            if match:
+                section = int(match.group(1))
+            elif line.startswith("- "):
+                self.sent.append(line[2:])
+                items.append({"section": section if self.tag_sections else None, "requirement": line[2:],
+                              "acceptance_criteria": ["It works"], "priority": "High", "story_points": 5})
+        return json.dumps(items)
+
+    def extract_text_or_completion_object(self, response):
+        return [response]
+
+
+@pytest.fixture(autouse=True)
+def no_llm_cache(monkeypatch):
+    monkeypatch.setattr(refinement, "llm_cache", None)
+
+
+@pytest.fixture
+def words_are_tokens(monkeypatch):
+    monkeypatch.setattr(refinement, "count_token", lambda text: len(text.split()))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StoryStore(str(tmp_path / "stories.sqlite3"))
+    yield store
+    store.close()
+
+
+SECTIONS = [
+    "LOGIN\n- Users can log in\n- Users can reset their password",
+    "REPORTS\n- Admins can export reports",
+    "BILLING\n- Users can pay by card",
+]
+
+
+def upload(store, sections, llm):
+    with store.revision("spec.txt") as revision:
+        stories = refine_document("\n\n".join(sections), ChunkRefiner(client=llm), sections=sections,
+                                  revision=revision)
+        return [story.requirement for story in stories], revision.finish()
+
+
+def test_edited_reupload_only_refines_changed_sections(store):
+    first = FakeLLM()
+    upload(store, SECTIONS, first)
+    assert len(first.sent) == 4
+
+    edited = [SECTIONS[0], "REPORTS\n- Admins can export reports as CSV", SECTIONS[2]]
+    second = FakeLLM()
+    requirements, changes = upload(store, edited, second)
+
+    assert second.sent == ["Admins can export reports as CSV"]
+    assert requirements == ["Users can log in", "Users can reset their password",
+                            "Admins can export reports as CSV", "Users can pay by card"]
+    assert changes == {"added": 1, "removed": 1, "unchanged": 3, "generated": 1, "reused": 3}
+
+
+def test_unchanged_reupload_makes_no_llm_calls(store):
+    upload(store, SECTIONS, FakeLLM())
+    llm = FakeLLM()
+
+    requirements, changes = upload(store, SECTIONS, llm)
+
+    assert llm.sent == []
+    assert len(requirements) == 4 and changes["reused"] == 4
+
+
+def test_untagged_stories_are_refined_again(store):
+    upload(store, SECTIONS, FakeLLM(tag_sections=False))
+    llm = FakeLLM()
+
+    requirements, _ = upload(store, SECTIONS, llm)
+
+    assert len(llm.sent) == 4
+    assert len(requirements) == 4
+
+
+def test_chunks_stay_within_the_budget_and_keep_section_order(words_are_tokens):
+    sections = [f"- Requirement number {n}" for n in range(7)]  # 4 tokens each
+
+    chunks = chunk_text("", max_tokens=10, overlap_tokens=0, sections=sections)
+
+    assert [c.tokens for c in chunks] == [8, 8, 8, 4]
+    assert [number for c in chunks for number, _ in c.parts] == list(range(7))
+    assert all(c.context == "" for c in chunks)
+
+
+def test_chunks_carry_the_previous_tail_as_context(words_are_tokens):
+    sections = ["AUTH\n- Users can log in", "- Users can log out", "- Admins can ban users",
+                "- Admins can export reports"]
+
+    chunks = chunk_text("", max_tokens=11, overlap_tokens=10, sections=sections)
+
+    assert [[number for number, _ in c.parts] for c in chunks] == [[0, 1], [2, 3]]
+    assert chunks[0].context == ""
+    # The whole last section fits the overlap; of the one before it only its last line does
+    assert chunks[1].context == "- Users can log in\n\n- Users can log out"
+
+
+def test_an_oversized_section_is_split_at_lines(words_are_tokens):
+    section = "\n".join(f"- Item {n} of the list" for n in range(5))  # 5 tokens a line
+
+    chunks = chunk_text("", max_tokens=12, overlap_tokens=0, sections=["intro text", section])
+
+    assert all(c.tokens <= 12 for c in chunks)
+    assert [number for c in chunks for number, _ in c.parts] == [0, 1, 1, 1]
+    assert "\n".join(text for c in chunks for number, text in c.parts if number == 1) == section
+
+
+def test_requirements_repeated_across_chunks_are_merged_once(words_are_tokens):
+    sections = ["- Users can log in\n- Users can log out", "- users can  LOG in\n- Admins can ban users"]
+    chunks = chunk_text("", max_tokens=10, overlap_tokens=5, sections=sections)
+    assert len(chunks) == 2
+
+    stories = asyncio.run(ChunkRefiner(client=FakeLLM(), concurrency=2).refine(chunks))
+
+    assert [s.requirement for s in stories] == ["Users can log in", "Users can log out", "Admins can ban users"]
+    assert len({s.requirement_hash for s in stories}) == 3
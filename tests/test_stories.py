@@ -0,0 +1,54 @@
+import os
+import threading
+
+from src.stories import Story, build_index, index_path, read_page, read_story, story_count, write_stories
+
+
+def stories(n, start=0):
+    return [Story(f"Requirement {i}") for i in range(start, start + n)]
+
+
+def test_index_round_trip(tmp_path):
+    path = str(tmp_path / "stories_spec.jsonl")
+    assert write_stories(path, stories(5)) == 5
+    assert write_stories(path, stories(2, start=5), append=True) == 2
+
+    assert story_count(path) == 7
+    assert read_story(path, 6).requirement == "Requirement 6"
+    assert [s.requirement for s in read_page(path, 2, 3)] == ["Requirement 2", "Requirement 3", "Requirement 4"]
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / "stories_spec.jsonl")
+    write_stories(path, stories(3))
+    # Appended without going through write_stories, so the index no longer matches
+    with open(path, "ab") as f:
+        f.write(b'{"requirement": "Requirement 3"}\n')
+
+    assert story_count(path) == 4
+    assert read_story(path, 3).requirement == "Requirement 3"
+
+
+def test_concurrent_rebuilds_leave_a_valid_index(tmp_path):
+    path = str(tmp_path / "stories_spec.jsonl")
+    write_stories(path, stories(200))
+    os.remove(index_path(path))
+
+    errors = []
+
+    def rebuild():
+        try:
+            build_index(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=rebuild) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert story_count(path) == 200
+    assert read_story(path, 199).requirement == "Requirement 199"
+    assert sorted(os.listdir(tmp_path)) == ["stories_spec.jsonl", "stories_spec.jsonl.idx"]
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from src.requirement_classifier import Requirement
+from src.stories import Story
+from src.story_store import StoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StoryStore(str(tmp_path / "stories.sqlite3"))
+    yield store
+    store.close()
+
+
+def requirement(text):
+    return Requirement(text, "1.", "decimal", 0)
+
+
+def build(requirement):
+    return Story(requirement.text)
+
+
+def upload(store, source, texts):
+    with store.revision(source) as revision:
+        for text in texts:
+            revision.story_for(requirement(text), build)
+        return revision.finish()
+
+
+def test_reupload_reports_changes_and_reuses_stories(store):
+    first = upload(store, "spec.txt", ["Login", "Logout"])
+    second = upload(store, "spec.txt", ["login ", "Reset password"])
+
+    assert first == {"added": 2, "removed": 0, "unchanged": 0, "generated": 2, "reused": 0}
+    assert second == {"added": 1, "removed": 1, "unchanged": 1, "generated": 1, "reused": 1}
+
+
+@pytest.mark.parametrize("path", [None, ":memory:"])
+def test_aborted_revision_keeps_concurrent_one(store, path):
+    if path is not None:
+        store = StoryStore(path)
+    kept, aborted = store.revision("spec.txt"), store.revision("spec.txt")
+    assert kept.number != aborted.number
+
+    kept.story_for(requirement("Login"), build)
+    aborted.story_for(requirement("Logout"), build)
+    aborted.abort()
+
+    assert kept.finish()["added"] == 1
+    assert upload(store, "spec.txt", ["Login", "Logout"]) == \
+        {"added": 1, "removed": 0, "unchanged": 1, "generated": 1, "reused": 1}
+
+
+def test_concurrent_uploads_get_distinct_revisions(store):
+    revisions, errors = [], []
+
+    def start():
+        try:
+            revisions.append(store.revision("spec.txt"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(r.number for r in revisions) == list(range(1, 9))
+    for revision in revisions:
+        revision.story_for(requirement(f"Story {revision.number}"), build)
+        revision.finish()
+    # Each finished upload replaced the previous one, so only the last one's manifest is left
+    assert store._conn.execute("SELECT COUNT(*) FROM manifests").fetchone()[0] == 1
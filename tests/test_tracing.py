@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import functools
+import threading
+import time
+
+import pytest
+
+from src import tracing
+
+
+@pytest.fixture
+def trace_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "Trace", functools.partial(tracing.Trace, trace_dir=str(tmp_path)))
+    return tmp_path
+
+
+def by_name(spans):
+    return {s["name"]: s for s in spans}
+
+
+def test_spans_nest_and_are_flushed_on_exit(trace_dir):
+    with tracing.trace_run("run"):
+        with tracing.span("outer", stage="stories") as attrs:
+            attrs["count"] = 2
+            with tracing.span("inner"):
+                pass
+        with pytest.raises(ValueError):
+            with tracing.span("failing"):
+                raise ValueError("boom")
+
+    spans = by_name(tracing.load_spans(str(trace_dir / "run.jsonl")))
+    assert spans["outer"]["parent_id"] is None
+    assert spans["outer"]["attrs"] == {"stage": "stories", "count": 2}
+    assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+    assert spans["failing"]["parent_id"] is None
+    assert "boom" in spans["failing"]["error"]
+    assert all(s["run_id"] == "run" for s in spans.values())
+
+
+def test_spans_are_not_recorded_without_a_trace(trace_dir):
+    with tracing.span("untraced") as attrs:
+        assert attrs is None
+    assert tracing.current_trace() is None
+    assert not list(trace_dir.iterdir())
+
+
+def test_copied_context_carries_the_trace_into_threads(trace_dir):
+    def work(name, seconds):
+        with tracing.span(name):
+            time.sleep(seconds)
+
+    with tracing.trace_run("run"):
+        with tracing.span("root"):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, work, name, seconds)
+                           for name, seconds in (("slow", 0.15), ("fast", 0.02))]
+                for future in futures:
+                    future.result()
+            work("after", 0.02)
+            # A thread started without the caller's context is not traced
+            thread = threading.Thread(target=work, args=("lost", 0))
+            thread.start()
+            thread.join()
+
+    spans = tracing.load_spans(str(trace_dir / "run.jsonl"))
+    named = by_name(spans)
+    assert "lost" not in named
+    root = named["root"]["span_id"]
+    assert [named[name]["parent_id"] for name in ("slow", "fast", "after")] == [root] * 3
+    assert named["slow"]["thread"] != named["root"]["thread"]
+
+    # The fast child ran alongside the slow one, so it is not on the critical path
+    path = tracing.critical_path(spans)
+    assert [(depth, s["name"]) for depth, s in path] == [(0, "root"), (1, "slow"), (1, "after")]
+
+
+def test_stage_breakdown_subtracts_child_time():
+    spans = [
+        {"span_id": 1, "parent_id": None, "name": "leg", "start": 0.0, "duration_ms": 100.0, "attrs": {}},
+        {"span_id": 2, "parent_id": 1, "name": "turn", "start": 0.0, "duration_ms": 30.0, "attrs": {"agent": "BA"}},
+        {"span_id": 3, "parent_id": 1, "name": "turn", "start": 0.03, "duration_ms": 50.0, "attrs": {"agent": "BA"}},
+    ]
+    assert tracing.stage_breakdown(spans) == [("turn:BA", 2, 80.0, 80.0), ("leg", 1, 100.0, 20.0)]
@@ -0,0 +1,210 @@
+"""Nested timing spans for workflow runs, exported to a JSONL trace per run.
+
+Spans are only recorded while a trace is active (see ``WorkflowRun.advance``);
+elsewhere ``span()`` costs a single context lookup. Print a per-stage latency
+breakdown and the critical path of a run with::
+
+    python -m src.tracing traces/<run_id>.jsonl
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+import argparse
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+project_root = str(Path(__file__).parent.parent)
+TRACE_DIR = os.getenv("SDLC_TRACE_DIR", os.path.join(project_root, "traces"))
+
+_active_trace = ContextVar("active_trace", default=None)
+_current_span = ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Trace:
+    """Buffers finished spans for one run and appends them to its JSONL file."""
+
+    def __init__(self, run_id: str, trace_dir: str = TRACE_DIR):
+        self.run_id = run_id
+        self.path = os.path.join(trace_dir, f"{run_id}.jsonl")
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def record(self, span: dict) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+
+@contextmanager
+def trace_run(run_id: str):
+    """Activate tracing for `run_id` in this context and flush spans on exit."""
+    trace = Trace(run_id)
+    token = _active_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _active_trace.reset(token)
+        try:
+            trace.flush()
+        except OSError as e:
+            logger.error("Failed to write trace %s: %s", trace.path, e)
+
+
+def current_trace() -> Trace:
+    return _active_trace.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    trace = _active_trace.get()
+    if trace is None:
+        yield None
+        return
+    span_id = next(_span_ids)
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    start = time.time()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.record({
+            "run_id": trace.run_id,
+            "span_id": span_id,
+            "parent_id": parent,
+            "name": name,
+            "start": start,
+            "duration_ms": (time.perf_counter() - started) * 1000,
+            "thread": threading.current_thread().name,
+            "attrs": attrs,
+            "error": error,
+        })
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_agents(agents) -> None:
+    """Wrap each agent's turns and LLM requests in spans."""
+    for agent in agents:
+        generate_reply = agent.generate_reply
+
+        def traced_reply(*args, _generate=generate_reply, _name=agent.name, **kwargs):
+            with span("turn", agent=_name):
+                return _generate(*args, **kwargs)
+
+        agent.generate_reply = traced_reply
+
+        client = getattr(agent, "client", None)
+        if client is not None:
+            create = client.create
+
+            def traced_create(*args, _create=create, _name=agent.name, **kwargs):
+                with span("llm", agent=_name):
+                    return _create(*args, **kwargs)
+
+            client.create = traced_create
+
+
+def load_spans(path: str) -> list:
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def stage_breakdown(spans: list) -> list:
+    """Per-stage totals: (stage, count, total ms, self ms) sorted by self time."""
+    child_ms = {}
+    for s in spans:
+        if s["parent_id"] is not None:
+            child_ms[s["parent_id"]] = child_ms.get(s["parent_id"], 0.0) + s["duration_ms"]
+    stages = {}
+    for s in spans:
+        stage = s["name"] if "agent" not in s["attrs"] else f"{s['name']}:{s['attrs']['agent']}"
+        count, total, self_ms = stages.get(stage, (0, 0.0, 0.0))
+        own = max(s["duration_ms"] - child_ms.get(s["span_id"], 0.0), 0.0)
+        stages[stage] = (count + 1, total + s["duration_ms"], self_ms + own)
+    return sorted(((k, *v) for k, v in stages.items()), key=lambda row: row[3], reverse=True)
+
+
+def critical_path(spans: list) -> list:
+    """Chain of spans that determined wall-clock time, outermost first."""
+    children = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+
+    def end(s):
+        return s["start"] + s["duration_ms"] / 1000
+
+    path = []
+
+    def walk(node, depth):
+        path.append((depth, node))
+        # Walk back from the child that finished last, skipping children that overlap it
+        chain, cursor = [], None
+        for child in sorted(children.get(node["span_id"], []), key=end, reverse=True):
+            if cursor is None or end(child) <= cursor:
+                chain.append(child)
+                cursor = child["start"]
+        for child in reversed(chain):
+            walk(child, depth + 1)
+
+    for root in sorted(children.get(None, []), key=lambda s: s["start"]):
+        walk(root, 0)
+    return path
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Summarize a workflow trace")
+    parser.add_argument("trace", help="path to traces/<run_id>.jsonl")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="hide critical-path spans shorter than this")
+    args = parser.parse_args(argv)
+
+    spans = load_spans(args.trace)
+    wall = sum(s["duration_ms"] for s in spans if s["parent_id"] is None)
+    print(f"Run {spans[0]['run_id'] if spans else '?'}: {len(spans)} spans, {wall:.1f} ms traced\n")
+
+    print(f"{'stage':<40} {'count':>6} {'total ms':>10} {'self ms':>10} {'self %':>7}")
+    for stage, count, total, self_ms in stage_breakdown(spans):
+        share = self_ms / wall * 100 if wall else 0.0
+        print(f"{stage:<40} {count:>6} {total:>10.1f} {self_ms:>10.1f} {share:>6.1f}%")
+
+    print("\nCritical path:")
+    for depth, s in critical_path(spans):
+        if s["duration_ms"] < args.min_ms:
+            continue
+        label = s["name"] + (f" [{s['attrs']['agent']}]" if "agent" in s["attrs"] else "")
+        print(f"{'  ' * depth}{label:<{40 - 2 * depth}} {s['duration_ms']:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
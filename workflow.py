@@ -0,0 +1,135 @@
+"""Transition table driving speaker selection for the SDLC group chat."""
+from contextvars import ContextVar
+import logging
+
+from src.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Completion signals emitted by the registered tools
+STORIES_GENERATED = "stories_generated"
+JIRA_CREATED = "jira_created"
+CODE_GENERATED = "code_generated"
+
+# HITL approval signals
+STORIES_APPROVED = "stories_approved"
+CODE_APPROVED = "code_approved"
+
+START_AGENT = "BA_Agent"
+APPROVER_AGENT = "User_Agent"
+
+# Target that pauses the group chat until a human approves in the UI. The run
+# is checkpointed and later resumed with the approver as the last speaker.
+HITL = "HITL"
+
+# (speaker, signal) -> (next speaker, workflow_status to record).
+# A signal of None is the default for turns where no tool completed;
+# a next speaker of None ends the group chat.
+TRANSITIONS = {
+    ("BA_Agent", STORIES_GENERATED): (HITL, "stories_generated"),
+    ("BA_Agent", None): ("BA_Agent", None),
+    ("User_Agent", STORIES_APPROVED): ("Jira_Agent", "stories_approved"),
+    ("User_Agent", CODE_APPROVED): (None, "code_approved"),
+    ("User_Agent", None): (HITL, None),
+    ("Jira_Agent", JIRA_CREATED): ("Coder_Agent", "code_generation"),
+    # Story pipelining generates code alongside issue creation
+    ("Jira_Agent", CODE_GENERATED): (HITL, "code_generated"),
+    ("Jira_Agent", None): ("Jira_Agent", None),
+    ("Coder_Agent", CODE_GENERATED): (HITL, "code_generated"),
+    ("Coder_Agent", None): ("Coder_Agent", None),
+}
+
+# workflow_status -> (approval flag in state, signal it stands for)
+APPROVALS = {
+    "stories_approved": ("stories_approved", STORIES_APPROVED),
+    "code_approved": ("code_approved", CODE_APPROVED),
+}
+
+_active_machine = ContextVar("active_workflow_machine", default=None)
+
+
+def emit_signal(signal: str, **artifacts) -> None:
+    """Report a tool completion to the workflow running in this context."""
+    machine = _active_machine.get()
+    if machine is not None:
+        machine.emit(signal, **artifacts)
+
+
+def session_state() -> dict:
+    """State of the workflow running in this context, else the NiceGUI user storage."""
+    machine = _active_machine.get()
+    if machine is not None:
+        return machine.state
+    # Imported lazily so headless runs (src.batch) never load the UI stack
+    from nicegui import app
+    return app.storage.user
+
+
+class WorkflowMachine:
+    """Compiled speaker-selection state machine for one group chat."""
+
+    def __init__(self, agents, state: dict, transitions: dict = TRANSITIONS, start: str = START_AGENT, job=None):
+        by_name = {agent.name: agent for agent in agents}
+        self._table = {
+            (by_name[speaker], signal): (by_name.get(target, target), status)
+            for (speaker, signal), (target, status) in transitions.items()
+        }
+        self._start = by_name[start]
+        self._approver = by_name.get(APPROVER_AGENT)
+        self._pending = None
+        self.paused = False
+        self.state = state
+        self.job = job
+
+    @property
+    def pending(self):
+        """Signal emitted since the last speaker selection, if any."""
+        return self._pending
+
+    def emit(self, signal: str, **artifacts) -> None:
+        self._pending = signal
+        if artifacts:
+            with span("state.write", keys=sorted(artifacts)):
+                self.state.update(artifacts)
+
+    def activate(self):
+        """Make this machine the target of emit_signal in the current context."""
+        return _active_machine.set(self)
+
+    def deactivate(self, token) -> None:
+        _active_machine.reset(token)
+
+    def _approval_signal(self):
+        flag_signal = APPROVALS.get(self.state.get("workflow_status"))
+        if flag_signal and self.state.get(flag_signal[0], False):
+            return flag_signal[1]
+        return None
+
+    def select(self, last_speaker, groupchat=None):
+        """Speaker selection callable for GroupChat(speaker_selection_method=...)."""
+        if self.job is not None and self.job.cancelled:
+            logger.info("Workflow cancelled, ending group chat")
+            return None
+        if last_speaker is None:
+            return self._start
+        self.paused = False
+
+        signal, self._pending = self._pending, None
+        if signal is None and last_speaker is self._approver:
+            signal = self._approval_signal()
+
+        target = self._table.get((last_speaker, signal)) or self._table.get((last_speaker, None))
+        if target is None:
+            return self._start
+
+        next_speaker, status = target
+        if next_speaker == HITL:
+            next_speaker = None
+            self.paused = True
+        if status:
+            with span("state.write", key="workflow_status"):
+                self.state["workflow_status"] = status
+            if self.job is not None:
+                self.job.report("status", workflow_status=status)
+            logger.debug("%s -> %s on %s", last_speaker.name, next_speaker.name if next_speaker else "END", signal)
+        return next_speaker